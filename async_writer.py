@@ -0,0 +1,234 @@
+import cv2
+import queue
+import threading
+
+
+# Политики переполнения очереди
+OVERFLOW_BLOCK = "block"              # ждать, пока кодировщик освободит место
+OVERFLOW_DROP_OLDEST = "drop_oldest"  # выбросить самый старый кадр из очереди
+OVERFLOW_DROP_NEWEST = "drop_newest"  # не добавлять новый кадр
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST)
+
+
+class _Batch(list):
+    """
+    Несколько кадров одним элементом очереди: список (кадр, метка)
+    """
+
+
+class AsyncVideoWriter:
+    """
+    VideoWriter с очередью и отдельным потоком кодирования
+
+    write() только кладёт кадр в ограниченную очередь, кодирование
+    выполняется в фоне, поэтому всплески времени кодирования не
+    задерживают следующий cap.read(). При переполнении очереди
+    действует политика overflow (см. OVERFLOW_POLICIES); пачки из
+    write_batch() при OVERFLOW_DROP_OLDEST не отбрасываются.
+    Кадр после write() изменять нельзя - он пишется позже. Ошибки
+    кодека и обработчиков не останавливают поток кодирования, последняя
+    из них сохраняется в error.
+
+    on_written(tag) вызывается из потока кодирования для каждого
+    действительно записанного кадра с меткой tag из write(),
+    on_dropped(tag) - для каждого кадра, отброшенного очередью или не
+    записанного из-за ошибки кодека. Для каждого принятого кадра
+    вызывается ровно один из них.
+    """
+
+    # Маркер окончания записи
+    _STOP = object()
+
+    def __init__(self, path, fourcc, fps, frame_size, is_color=True,
+                 queue_size=64, overflow=OVERFLOW_BLOCK, on_written=None,
+                 on_dropped=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Неизвестная политика переполнения: {overflow}")
+
+        self.path = path
+        self.overflow = overflow
+        self.on_written = on_written
+        self.on_dropped = on_dropped
+
+        if isinstance(fourcc, str):
+            fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self._writer = cv2.VideoWriter(path, fourcc, fps, frame_size,
+                                       isColor=is_color)
+
+        # Счётчики
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.error = None
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._released = False
+
+        if self._writer.isOpened():
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+
+    def isOpened(self):
+        return self._thread is not None and not self._released
+
+    def depth(self):
+        """
+        Текущее число элементов в очереди (пачка - один элемент)
+        """
+        return self._queue.qsize()
+
+    def _notify(self, callback, tag):
+        if callback is None:
+            return
+        try:
+            callback(tag)
+        except Exception as e:
+            # Ошибка обработчика не должна останавливать запись
+            self.error = e
+
+    def _encode(self, frame, tag):
+        try:
+            self._writer.write(frame)
+        except Exception as e:
+            self.error = e
+            self._notify(self.on_dropped, tag)
+            return
+        self.written += 1
+        self._notify(self.on_written, tag)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    break
+                if isinstance(item, _Batch):
+                    for frame, tag in item:
+                        self._encode(frame, tag)
+                else:
+                    self._encode(*item)
+            except Exception as e:
+                # Поток записи не должен умирать: иначе drain() и
+                # release() ждали бы вечно
+                self.error = e
+            finally:
+                self._queue.task_done()
+        self._writer.release()
+
+    @staticmethod
+    def _size(item):
+        return len(item) if isinstance(item, _Batch) else 1
+
+    def _drop(self, item):
+        self.dropped += self._size(item)
+        for _, tag in (item if isinstance(item, _Batch) else [item]):
+            self._notify(self.on_dropped, tag)
+
+    def _remove_oldest_frame(self):
+        """
+        Удаление из очереди самого старого одиночного кадра
+
+        Пачки (буфер предзаписи) не отбрасываются: пачка занимает одно
+        место в очереди, но содержит много кадров. None - в очереди нет
+        одиночных кадров.
+        """
+        with self._queue.mutex:
+            for i, item in enumerate(self._queue.queue):
+                if not isinstance(item, _Batch) and item is not self._STOP:
+                    del self._queue.queue[i]
+                    self._queue.not_full.notify()
+                    break
+            else:
+                return None
+        self._queue.task_done()
+        return item
+
+    def write(self, frame, block=False, tag=None):
+        """
+        Постановка кадра в очередь; False - кадр отброшен
+
+        block=True - ждать места в очереди независимо от политики.
+        tag - метка кадра для on_written и on_dropped.
+        """
+        return self._submit((frame, tag), 1, block)
+
+    def write_batch(self, frames, tags=None):
+        """
+        Постановка нескольких кадров одним элементом очереди
+
+        Пачка занимает одно место в очереди, поэтому, например, весь
+        буфер предзаписи передаётся кодировщику без ожидания его
+        кодирования. Кадры пачки нельзя изменять, пока они не записаны.
+        """
+        if tags is None:
+            tags = [None] * len(frames)
+        batch = _Batch(zip(frames, tags))
+        if not batch:
+            return True
+        # Ждём одно место в очереди: при начале записи она пуста
+        return self._submit(batch, len(batch), True)
+
+    def _submit(self, item, count, block):
+        if not self.isOpened():
+            return False
+
+        self.submitted += count
+
+        if block or self.overflow == OVERFLOW_BLOCK:
+            self._queue.put(item)
+        elif self.overflow == OVERFLOW_DROP_NEWEST:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                self._drop(item)
+                return False
+        else:
+            with self._lock:
+                while True:
+                    try:
+                        self._queue.put_nowait(item)
+                        break
+                    except queue.Full:
+                        dropped = self._remove_oldest_frame()
+                        if dropped is None:
+                            # В очереди только пачки - отбрасывается новый
+                            self._drop(item)
+                            return False
+                        self._drop(dropped)
+
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def drain(self):
+        """
+        Ожидание, пока все кадры из очереди будут записаны
+        """
+        if self.isOpened():
+            self._queue.join()
+
+    def release(self):
+        """
+        Дозапись оставшихся кадров и закрытие файла
+        """
+        if self._released:
+            return
+        self._released = True
+
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join()
+        else:
+            self._writer.release()
+
+    def stats(self):
+        return {
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "depth": self.depth(),
+            "max_depth": self.max_depth,
+        }
@@ -0,0 +1,209 @@
+import csv
+import cv2
+import json
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from video_probe import probe_video
+
+
+def ssim(img1, img2):
+    """
+    SSIM двух изображений (по яркости, окно Гаусса 11x11, sigma 1.5)
+    """
+    if img1.ndim == 3:
+        img1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
+    if img2.ndim == 3:
+        img2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
+
+    img1 = img1.astype(np.float32)
+    img2 = img2.astype(np.float32)
+
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    def blur(img):
+        return cv2.GaussianBlur(img, (11, 11), 1.5)
+
+    mu1 = blur(img1)
+    mu2 = blur(img2)
+    mu1_sq = mu1 * mu1
+    mu2_sq = mu2 * mu2
+    mu12 = mu1 * mu2
+
+    sigma1_sq = blur(img1 * img1) - mu1_sq
+    sigma2_sq = blur(img2 * img2) - mu2_sq
+    sigma12 = blur(img1 * img2) - mu12
+
+    ssim_map = ((2 * mu12 + c1) * (2 * sigma12 + c2)) / \
+               ((mu1_sq + mu2_sq + c1) * (sigma1_sq + sigma2_sq + c2))
+    return float(ssim_map.mean())
+
+
+def decode_to_shared_memory(input_path, max_frames):
+    """
+    Декодирование первых max_frames кадров в общую память
+
+    Возвращает (SharedMemory, shape, fps). Вызывающий код обязан
+    выполнить shm.close() и shm.unlink(). Если в источнике нет ни
+    одного кадра, выбрасывается IOError.
+    """
+    info = probe_video(input_path)
+    count = min(max_frames, info.frame_count) if info.frame_count > 0 \
+        else max_frames
+    shape = (count, info.height, info.width, 3)
+
+    # SharedMemory нулевого размера падает с непонятным ValueError
+    if count <= 0 or info.width <= 0 or info.height <= 0:
+        raise IOError(f"В видео нет кадров для теста кодеков: {input_path} "
+                      f"({info.width}x{info.height}, {count} кадров)")
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)))
+    frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+
+    cap = cv2.VideoCapture(input_path)
+    decoded = 0
+    while decoded < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames[decoded] = frame
+        decoded += 1
+    cap.release()
+
+    del frames
+    if decoded == 0:
+        shm.close()
+        shm.unlink()
+        raise IOError(f"Не удалось декодировать кадры: {input_path}")
+    return shm, (decoded,) + shape[1:], info.fps
+
+
+def _measure_quality(frames, output_path):
+    """
+    PSNR и SSIM закодированного файла относительно исходных кадров
+    """
+    psnr_values = []
+    ssim_values = []
+    cap = cv2.VideoCapture(output_path)
+    for i in range(len(frames)):
+        ret, decoded = cap.read()
+        if not ret:
+            break
+        psnr_values.append(cv2.PSNR(frames[i], decoded))
+        ssim_values.append(ssim(frames[i], decoded))
+    cap.release()
+
+    if not psnr_values:
+        return None, None
+    # Для совпадающих кадров cv2.PSNR возвращает 361 дБ
+    return float(np.mean(psnr_values)), float(np.mean(ssim_values))
+
+
+def _encode_codec(task):
+    """
+    Кодирование кадров из общей памяти одним кодеком (в своём процессе)
+
+    Скорость считается по процессорному времени процесса
+    (time.process_time), а не по настенному: кодеки работают
+    параллельно, и на машине, где ядер меньше, чем кодеков, настенное
+    время включало бы работу соседних процессов.
+    """
+    shm_name, shape, fps, codec_name, output_path = task
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frames = None
+    try:
+        frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        count, height, width = shape[:3]
+
+        result = {"codec": codec_name, "path": output_path, "frames": 0,
+                  "encode_fps": 0.0, "size_bytes": 0, "bits_per_frame": 0.0,
+                  "psnr": None, "ssim": None, "error": None}
+
+        try:
+            writer = cv2.VideoWriter(output_path,
+                                     cv2.VideoWriter_fourcc(*codec_name),
+                                     fps, (width, height))
+        except cv2.error as e:
+            result["error"] = str(e)
+            return result
+
+        if not writer.isOpened():
+            result["error"] = "кодек недоступен"
+            return result
+
+        start = time.process_time()
+        for i in range(count):
+            writer.write(frames[i])
+        writer.release()
+        elapsed = time.process_time() - start
+
+        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
+            result["error"] = "файл не создан или пуст"
+            return result
+
+        size_bytes = os.path.getsize(output_path)
+        result.update({
+            "frames": count,
+            "encode_fps": count / elapsed if elapsed > 0 else 0.0,
+            "size_bytes": size_bytes,
+            "bits_per_frame": size_bytes * 8 / count if count else 0.0,
+        })
+
+        # Качество: декодируем результат и сравниваем с исходными кадрами
+        result["psnr"], result["ssim"] = _measure_quality(frames, output_path)
+        return result
+    finally:
+        # Представление нужно освободить до закрытия общей памяти
+        del frames
+        shm.close()
+
+
+def run_codec_matrix(input_path, codecs, max_frames=90, output_dir="output",
+                     workers=None):
+    """
+    Параллельный прогон кодеков на одних и тех же кадрах
+
+    codecs - список (fourcc, расширение). Кадры декодируются один раз
+    в общую память, каждый кодек кодирует и оценивает качество в
+    отдельном процессе. encode_fps - кадры в секунду процессорного
+    времени кодека, поэтому соседние кодеки на него не влияют.
+    Возвращает список словарей с результатами в порядке codecs.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    shm, shape, fps = decode_to_shared_memory(input_path, max_frames)
+    try:
+        tasks = [(shm.name, shape, fps, codec_name,
+                  os.path.join(output_dir, f"video_{codec_name}.{extension}"))
+                 for codec_name, extension in codecs]
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_encode_codec, tasks))
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+REPORT_FIELDS = ["codec", "frames", "encode_fps", "size_bytes",
+                 "bits_per_frame", "psnr", "ssim", "path", "error"]
+
+
+def save_report(results, csv_path=None, json_path=None):
+    """
+    Сохранение результатов в CSV и/или JSON
+    """
+    if csv_path is not None:
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS)
+            writer.writeheader()
+            for result in results:
+                writer.writerow({k: result.get(k) for k in REPORT_FIELDS})
+
+    if json_path is not None:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,86 @@
+import cv2
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from frame_reader import ThreadedFrameReader
+
+
+# Цветовые режимы: (название, код конвертации или None для оригинала)
+COLOR_MODES = [
+    ("BGR (оригинал)", None),
+    ("Grayscale (оттенки серого)", cv2.COLOR_BGR2GRAY),
+    ("HSV", cv2.COLOR_BGR2HSV),
+    ("LAB", cv2.COLOR_BGR2LAB),
+    ("YCrCb", cv2.COLOR_BGR2YCrCb)
+]
+
+
+class MultiColorConverter:
+    """
+    Конвертация одного кадра сразу во все цветовые пространства
+
+    Конвертации выполняются параллельно в пуле потоков (OpenCV
+    отпускает GIL внутри cvtColor). Выходные массивы выделяются
+    на первом кадре и затем переиспользуются через dst=...,
+    поэтому результаты перезаписываются следующим кадром.
+    """
+
+    def __init__(self, color_modes=COLOR_MODES, max_workers=None):
+        self.color_modes = list(color_modes)
+        self._buffers = {}
+
+        conversions = sum(1 for _, code in self.color_modes if code is not None)
+        if max_workers is None:
+            max_workers = max(1, min(conversions, os.cpu_count() or 1))
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _convert(self, name, code, frame):
+        buffer = self._buffers.get(name)
+
+        if buffer is None or buffer.shape[:2] != frame.shape[:2]:
+            buffer = cv2.cvtColor(frame, code)
+            self._buffers[name] = buffer
+        else:
+            cv2.cvtColor(frame, code, dst=buffer)
+
+        return buffer
+
+    def process(self, frame):
+        """
+        Словарь {режим: кадр} для одного исходного кадра
+        """
+        futures = {}
+        for name, code in self.color_modes:
+            if code is not None:
+                futures[name] = self._pool.submit(self._convert, name, code,
+                                                  frame)
+
+        results = {}
+        for name, code in self.color_modes:
+            results[name] = frame if code is None else futures[name].result()
+
+        return results
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def color_stream(cap, color_modes=COLOR_MODES, max_frames=None, prefetch=8,
+                 start_frame=0, max_workers=None):
+    """
+    Генератор (номер кадра, {режим: кадр}) с одним декодированием на кадр
+    """
+    with MultiColorConverter(color_modes, max_workers=max_workers) as converter:
+        with ThreadedFrameReader(cap, prefetch=prefetch,
+                                 start_frame=start_frame,
+                                 max_frames=max_frames) as reader:
+            for frame_index, frame in enumerate(reader):
+                yield frame_index, converter.process(frame)
@@ -0,0 +1,201 @@
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from frame_reader import ThreadedFrameReader
+
+
+# Диапазон цвета в HSV (H 0-179, S и V 0-255). Если h_min > h_max,
+# диапазон тона переходит через 0: например, красный 170..10
+ColorRange = namedtuple("ColorRange", ["name", "lower", "upper"])
+
+# Результат для одного диапазона. mask - буфер сегментатора, он
+# перезаписывается следующим кадром; boxes - список (x, y, w, h, area),
+# centroids - список (cx, cy) для компонент не меньше min_area
+RangeResult = namedtuple("RangeResult", ["mask", "pixels", "boxes",
+                                         "centroids"])
+
+DEFAULT_RANGES = [
+    ColorRange("red", (170, 100, 70), (10, 255, 255)),
+    ColorRange("yellow", (20, 100, 100), (35, 255, 255)),
+    ColorRange("green", (40, 70, 50), (85, 255, 255)),
+    ColorRange("blue", (95, 100, 50), (130, 255, 255)),
+]
+
+
+class _RangeState:
+    """
+    Предвыделенные буферы одного диапазона
+    """
+
+    def __init__(self, color_range, shape):
+        h_min, s_min, v_min = color_range.lower
+        h_max, s_max, v_max = color_range.upper
+
+        self.name = color_range.name
+        self.wraps = h_min > h_max
+        if self.wraps:
+            # Две части: h_min..179 и 0..h_max
+            self.bounds = [
+                (np.array([h_min, s_min, v_min], np.uint8),
+                 np.array([179, s_max, v_max], np.uint8)),
+                (np.array([0, s_min, v_min], np.uint8),
+                 np.array([h_max, s_max, v_max], np.uint8)),
+            ]
+        else:
+            self.bounds = [(np.array(color_range.lower, np.uint8),
+                            np.array(color_range.upper, np.uint8))]
+
+        self.mask = np.zeros(shape, dtype=np.uint8)
+        self.scratch = np.zeros(shape, dtype=np.uint8) if self.wraps else None
+        self.labels = np.zeros(shape[0] * shape[1], dtype=np.int32)
+
+
+class ColorSegmenter:
+    """
+    Выделение объектов по нескольким именованным диапазонам HSV
+
+    На каждый кадр: одна конвертация BGR -> HSV, затем для каждого
+    диапазона inRange, морфологическое открытие (убирает шум) и
+    закрытие (заполняет дыры), разметка связных компонент. Все
+    операции пишут в буферы, выделенные на первом кадре (dst=...),
+    диапазоны обрабатываются параллельно в пуле потоков (OpenCV
+    отпускает GIL). Морфология и разметка компонент работают только
+    в рамке ненулевых пикселей маски, поэтому время на кадр зависит от
+    размера объектов, а не от разрешения.
+
+    min_area - компоненты меньше этой площади (в пикселях) не попадают
+    в boxes и centroids; kernel_size - размер ядра морфологии
+    (0 - без морфологии).
+    """
+
+    def __init__(self, ranges=DEFAULT_RANGES, min_area=100, kernel_size=5,
+                 max_workers=None):
+        self.ranges = list(ranges)
+        self.min_area = min_area
+        self.kernel = (cv2.getStructuringElement(cv2.MORPH_ELLIPSE,
+                                                 (kernel_size, kernel_size))
+                       if kernel_size > 0 else None)
+
+        self._hsv = None
+        self._states = None
+
+        if max_workers is None:
+            max_workers = max(1, min(len(self.ranges), os.cpu_count() or 1))
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _allocate(self, shape):
+        self._hsv = np.empty(shape, dtype=np.uint8)
+        self._states = [_RangeState(r, shape[:2]) for r in self.ranges]
+
+    def _segment(self, state):
+        lower, upper = state.bounds[0]
+        cv2.inRange(self._hsv, lower, upper, dst=state.mask)
+        if state.wraps:
+            lower, upper = state.bounds[1]
+            cv2.inRange(self._hsv, lower, upper, dst=state.scratch)
+            cv2.bitwise_or(state.mask, state.scratch, dst=state.mask)
+
+        # Морфология и разметка выполняются только в рамке ненулевых
+        # пикселей (с запасом на ядро): вне её маска и так пустая
+        x, y, w, h = cv2.boundingRect(state.mask)
+        boxes = []
+        centroids = []
+        if w == 0:
+            return RangeResult(state.mask, 0, boxes, centroids)
+
+        if self.kernel is not None:
+            pad = self.kernel.shape[0]
+            rows, cols = state.mask.shape
+            x0, y0 = max(0, x - pad), max(0, y - pad)
+            x1, y1 = min(cols, x + w + pad), min(rows, y + h + pad)
+            roi = state.mask[y0:y1, x0:x1]
+            cv2.morphologyEx(roi, cv2.MORPH_OPEN, self.kernel, dst=roi)
+            cv2.morphologyEx(roi, cv2.MORPH_CLOSE, self.kernel, dst=roi)
+            rx, ry, w, h = cv2.boundingRect(roi)
+            x, y = x0 + rx, y0 + ry
+            if w == 0:
+                return RangeResult(state.mask, 0, boxes, centroids)
+
+        roi = state.mask[y:y + h, x:x + w]
+        pixels = cv2.countNonZero(roi)
+
+        # Буфер меток непрерывный, поэтому берётся его начало нужного размера
+        labels = state.labels[:w * h].reshape(h, w)
+        count, _, stats, centers = cv2.connectedComponentsWithStats(
+            roi, labels=labels, connectivity=8, ltype=cv2.CV_32S
+        )
+        # Компонента 0 - фон
+        for i in range(1, count):
+            bx, by, bw, bh, area = (int(v) for v in stats[i])
+            if area < self.min_area:
+                continue
+            boxes.append((x + bx, y + by, bw, bh, area))
+            centroids.append((x + float(centers[i][0]),
+                              y + float(centers[i][1])))
+
+        return RangeResult(state.mask, pixels, boxes, centroids)
+
+    def process(self, frame):
+        """
+        Словарь {имя диапазона: RangeResult} для BGR-кадра
+        """
+        if self._hsv is None or self._hsv.shape != frame.shape:
+            self._allocate(frame.shape)
+
+        cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=self._hsv)
+
+        futures = [self._pool.submit(self._segment, state)
+                   for state in self._states]
+        return {state.name: future.result()
+                for state, future in zip(self._states, futures)}
+
+    def close(self):
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def draw_segments(frame, results, colors=None, thickness=2):
+    """
+    Рамки и центры найденных объектов поверх кадра (на месте)
+    """
+    for name, result in results.items():
+        color = (colors or {}).get(name, (255, 255, 255))
+        for (x, y, w, h, _), (cx, cy) in zip(result.boxes, result.centroids):
+            cv2.rectangle(frame, (x, y), (x + w, y + h), color, thickness)
+            cv2.circle(frame, (int(cx), int(cy)), 4, color, -1)
+            cv2.putText(frame, name, (x, max(0, y - 5)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    return frame
+
+
+def segment_images(images, ranges=DEFAULT_RANGES, min_area=100,
+                   kernel_size=5):
+    """
+    Генератор (индекс, изображение, результаты) для набора изображений
+    """
+    with ColorSegmenter(ranges, min_area, kernel_size) as segmenter:
+        for index, image in enumerate(images):
+            yield index, image, segmenter.process(image)
+
+
+def segment_stream(cap, ranges=DEFAULT_RANGES, min_area=100, kernel_size=5,
+                   max_frames=None, prefetch=8, start_frame=0):
+    """
+    Генератор (номер кадра, кадр, результаты) для видеопотока
+    """
+    with ColorSegmenter(ranges, min_area, kernel_size) as segmenter:
+        with ThreadedFrameReader(cap, prefetch=prefetch,
+                                 start_frame=start_frame,
+                                 max_frames=max_frames) as reader:
+            for frame_index, frame in enumerate(reader):
+                yield frame_index, frame, segmenter.process(frame)
@@ -0,0 +1,183 @@
+import cv2
+import os
+import re
+
+
+# Код клавиши ESC: его возвращают безоконные приёмники после frame_limit
+ESC_KEY = 27
+
+
+class DisplaySink:
+    """
+    Базовый приёмник кадров: интерфейс повторяет функции HighGUI
+
+    frame_limit - после стольких вызовов wait_key() с момента создания
+    последнего окна wait_key() вернёт ESC, чтобы бесконечные циклы воспроизведения
+    завершались без окна.
+    no_wait - wait_key() не ждёт, задержка игнорируется (замер
+    пропускной способности конвейера без сна на каждом кадре).
+    """
+
+    def __init__(self, no_wait=False, frame_limit=None):
+        self.no_wait = no_wait
+        self.frame_limit = frame_limit
+        self.frames_shown = 0
+        self.frames_per_window = {}
+        self._waits_since_window = 0
+
+    def named_window(self, name, flags=cv2.WINDOW_NORMAL):
+        self.frames_per_window.setdefault(name, 0)
+        self._waits_since_window = 0
+
+    def move_window(self, name, x, y):
+        pass
+
+    def show(self, name, frame):
+        self.frames_shown += 1
+        self.frames_per_window[name] = self.frames_per_window.get(name, 0) + 1
+
+    def wait_key(self, delay=0):
+        """
+        Аналог cv2.waitKey(): код клавиши или -1
+        """
+        self._waits_since_window += 1
+        if (self.frame_limit is not None
+                and self._waits_since_window >= self.frame_limit):
+            return ESC_KEY
+        return -1
+
+    def destroy_window(self, name):
+        pass
+
+    def destroy_all_windows(self):
+        pass
+
+
+class HighGuiSink(DisplaySink):
+    """
+    Обычные окна OpenCV (cv2.imshow / cv2.waitKey)
+    """
+
+    def named_window(self, name, flags=cv2.WINDOW_NORMAL):
+        super().named_window(name, flags)
+        cv2.namedWindow(name, flags)
+
+    def move_window(self, name, x, y):
+        cv2.moveWindow(name, x, y)
+
+    def show(self, name, frame):
+        super().show(name, frame)
+        cv2.imshow(name, frame)
+
+    def wait_key(self, delay=0):
+        # В режиме no_wait окна только обрабатывают события
+        key = cv2.waitKey(1 if self.no_wait else delay)
+        if key == -1:
+            return super().wait_key(delay)
+        return key
+
+    def destroy_window(self, name):
+        cv2.destroyWindow(name)
+
+    def destroy_all_windows(self):
+        cv2.destroyAllWindows()
+
+
+class NullSink(DisplaySink):
+    """
+    Приёмник без вывода: только считает кадры, никогда не ждёт
+    """
+
+    def __init__(self, frame_limit=None):
+        super().__init__(no_wait=True, frame_limit=frame_limit)
+
+
+class FileSink(DisplaySink):
+    """
+    Сохранение кадров в файлы: <папка>/<окно>_<номер>.<формат>
+
+    every - сохранять только каждый N-й кадр окна.
+    """
+
+    def __init__(self, output_dir="output/display", ext="png", every=1,
+                 frame_limit=None):
+        super().__init__(no_wait=True, frame_limit=frame_limit)
+        self.output_dir = output_dir
+        self.ext = ext
+        self.every = max(1, every)
+        self.files_written = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    @staticmethod
+    def _safe_name(name):
+        return re.sub(r"[^\w.-]+", "_", name).strip("_") or "window"
+
+    def show(self, name, frame):
+        super().show(name, frame)
+
+        index = self.frames_per_window[name]
+        if (index - 1) % self.every != 0:
+            return
+
+        filename = f"{self._safe_name(name)}_{index:06d}.{self.ext}"
+        if cv2.imwrite(os.path.join(self.output_dir, filename), frame):
+            self.files_written += 1
+
+
+def create_sink(kind="highgui", no_wait=False, frame_limit=None,
+                output_dir="output/display"):
+    """
+    Создание приёмника по имени: "highgui", "null" или "file"
+    """
+    if kind == "highgui":
+        return HighGuiSink(no_wait=no_wait, frame_limit=frame_limit)
+    if kind == "null":
+        return NullSink(frame_limit=frame_limit)
+    if kind == "file":
+        return FileSink(output_dir=output_dir, frame_limit=frame_limit)
+    raise ValueError(f"Неизвестный тип вывода: {kind}")
+
+
+def sink_from_env():
+    """
+    Приёмник из переменных окружения
+
+    CV_DISPLAY             - highgui (по умолчанию), null или file
+    CV_DISPLAY_NO_WAIT     - 1: не ждать в wait_key()
+    CV_DISPLAY_FRAME_LIMIT - число wait_key() до автоматического ESC
+                             (для null и file по умолчанию 300)
+    CV_DISPLAY_DIR         - папка для file
+    """
+    kind = os.environ.get("CV_DISPLAY", "highgui").lower()
+    no_wait = os.environ.get("CV_DISPLAY_NO_WAIT", "0") == "1"
+
+    frame_limit = os.environ.get("CV_DISPLAY_FRAME_LIMIT")
+    if frame_limit is not None:
+        frame_limit = int(frame_limit)
+    elif kind != "highgui":
+        frame_limit = 300
+
+    return create_sink(kind, no_wait=no_wait, frame_limit=frame_limit,
+                       output_dir=os.environ.get("CV_DISPLAY_DIR",
+                                                 "output/display"))
+
+
+_display = None
+
+
+def get_display():
+    """
+    Текущий приёмник кадров (создаётся при первом обращении)
+    """
+    global _display
+    if _display is None:
+        _display = sink_from_env()
+    return _display
+
+
+def set_display(sink):
+    """
+    Замена текущего приёмника (например, NullSink в тестах)
+    """
+    global _display
+    _display = sink
@@ -0,0 +1,188 @@
+import cv2
+import queue
+import threading
+
+from frame_reader import ThreadedFrameReader
+
+
+def grayscale_effect(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def resize_effect(scale):
+    """
+    Эффект масштабирования с заданным коэффициентом
+    """
+    def effect(frame):
+        height, width = frame.shape[:2]
+        return cv2.resize(frame, (int(width * scale), int(height * scale)))
+    return effect
+
+
+def flip_effect(flip_code=1):
+    """
+    Эффект отражения (1 - по горизонтали, 0 - по вертикали, -1 - оба)
+    """
+    def effect(frame):
+        return cv2.flip(frame, flip_code)
+    return effect
+
+
+# Зарегистрированные эффекты: имя -> функция(кадр) -> новый кадр
+EFFECTS = {
+    "grayscale": grayscale_effect,
+    "resized": resize_effect(0.5),
+    "flipped": flip_effect(1),
+}
+
+
+def register_effect(name, effect):
+    """
+    Регистрация пользовательского эффекта
+
+    Эффект получает исходный кадр и возвращает новый; менять входной
+    кадр нельзя - он общий для всех ветвей.
+    """
+    if not callable(effect):
+        raise TypeError("Эффект должен быть вызываемым объектом")
+    EFFECTS[name] = effect
+
+
+class _Branch:
+    """
+    Ветвь графа: эффект + VideoWriter в собственном потоке
+    """
+
+    # Маркер окончания потока кадров
+    _STOP = object()
+
+    def __init__(self, name, effect, output_path, fps, fourcc, queue_size):
+        self.name = name
+        self.effect = effect
+        self.output_path = output_path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.queue_size = queue_size
+        self.frames = 0
+        self.error = None
+
+        self._writer = None
+        self._queue = None
+        self._thread = None
+
+    def start(self):
+        """
+        Новый проход: сброс счётчиков, новая очередь и поток
+
+        Поток можно запустить только один раз, поэтому для каждого
+        прохода он создаётся заново; выходной файл перезаписывается.
+        """
+        self.frames = 0
+        self.error = None
+        self._writer = None
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def submit(self, frame):
+        self._queue.put(frame)
+
+    def finish(self):
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def _open_writer(self, processed):
+        # Размер и цветность берутся из первого обработанного кадра
+        height, width = processed.shape[:2]
+        is_color = processed.ndim == 3
+        writer = cv2.VideoWriter(self.output_path,
+                                 cv2.VideoWriter_fourcc(*self.fourcc),
+                                 self.fps, (width, height), isColor=is_color)
+        if not writer.isOpened():
+            raise IOError(f"Не удалось создать выходной файл: "
+                          f"{self.output_path}")
+        return writer
+
+    def _worker(self):
+        while True:
+            frame = self._queue.get()
+            if frame is self._STOP:
+                break
+
+            # После ошибки кадры только вычитываются, чтобы не блокировать
+            if self.error is not None:
+                continue
+
+            try:
+                processed = self.effect(frame)
+                if self._writer is None:
+                    self._writer = self._open_writer(processed)
+                self._writer.write(processed)
+                self.frames += 1
+            except Exception as e:
+                self.error = e
+
+        if self._writer is not None:
+            self._writer.release()
+
+
+class EffectGraph:
+    """
+    Граф эффектов: один декодированный кадр питает все ветви
+
+    У каждой ветви своя очередь, поток и VideoWriter, поэтому медленный
+    кодировщик не останавливает декодирование (пока не заполнится
+    его очередь из queue_size кадров).
+    """
+
+    def __init__(self, fps, fourcc="XVID", queue_size=16):
+        self.fps = fps
+        self.fourcc = fourcc
+        self.queue_size = queue_size
+        self.branches = []
+
+    def add_branch(self, name, output_path, effect=None, fourcc=None):
+        """
+        Добавление ветви; effect - функция или имя из EFFECTS
+        (по умолчанию совпадает с name)
+        """
+        if effect is None:
+            effect = name
+        if isinstance(effect, str):
+            if effect not in EFFECTS:
+                raise KeyError(f"Неизвестный эффект: {effect}")
+            effect = EFFECTS[effect]
+
+        branch = _Branch(name, effect, output_path, self.fps,
+                         fourcc or self.fourcc, self.queue_size)
+        self.branches.append(branch)
+        return branch
+
+    def run(self, cap, max_frames=None, start_frame=0, prefetch=8):
+        """
+        Один проход декодирования по видео для всех ветвей
+
+        Возвращает число декодированных кадров. Результаты ветвей -
+        в branch.frames и branch.error; они относятся к последнему
+        проходу, повторный run() перезаписывает выходные файлы.
+        """
+        if not self.branches:
+            raise ValueError("В графе нет ни одной ветви")
+
+        for branch in self.branches:
+            branch.start()
+
+        decoded = 0
+        try:
+            with ThreadedFrameReader(cap, prefetch=prefetch,
+                                     start_frame=start_frame,
+                                     max_frames=max_frames) as reader:
+                for frame in reader:
+                    for branch in self.branches:
+                        branch.submit(frame)
+                    decoded += 1
+        finally:
+            for branch in self.branches:
+                branch.finish()
+
+        return decoded
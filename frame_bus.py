@@ -0,0 +1,593 @@
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from frame_source import open_source
+
+# Имя шины по умолчанию
+DEFAULT_BUS_NAME = "lab_frame_bus"
+
+# Число ячеек кольца: сколько кадров потребитель может отстать,
+# прежде чем начнёт терять кадры
+DEFAULT_CAPACITY = 8
+
+# Интервал опроса шины потребителем, ожидающим новый кадр
+POLL_INTERVAL = 0.001
+
+# Сколько секунд потребитель по умолчанию ждёт новый кадр
+DEFAULT_READ_TIMEOUT = 5.0
+
+# Как часто ожидающий потребитель проверяет, жив ли производитель
+PRODUCER_CHECK_INTERVAL = 0.1
+
+# Поля заголовка (int64)
+_MAGIC = 0x4652414D45425553  # "FRAMEBUS"
+_H_MAGIC, _H_CAPACITY, _H_HEIGHT, _H_WIDTH, _H_CHANNELS, \
+    _H_WRITE_SEQ, _H_CLOSED, _H_PID = range(8)
+_HEADER_FIELDS = 8
+
+# Начало массива кадров выравнивается по 64 байтам
+_ALIGN = 64
+
+# Константы WinAPI для проверки процесса производителя
+_PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+_ERROR_ACCESS_DENIED = 5
+_STILL_ACTIVE = 259
+
+
+def _process_alive(pid):
+    """
+    Существует ли процесс pid
+
+    В POSIX сигнал 0 только проверяет доступность процесса. В Windows
+    os.kill(pid, 0) не проверка, а отправка CTRL_C_EVENT, поэтому там
+    процесс открывается через WinAPI и проверяется код завершения.
+    """
+    if sys.platform == "win32":
+        return _windows_process_alive(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _windows_process_alive(pid):
+    import ctypes
+    from ctypes import wintypes
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL,
+                                     wintypes.DWORD)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE,
+                                            ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+
+    handle = kernel32.OpenProcess(_PROCESS_QUERY_LIMITED_INFORMATION,
+                                  False, pid)
+    if not handle:
+        # Нет доступа - процесс существует, но принадлежит другому
+        # пользователю; любая другая ошибка - процесса нет
+        return ctypes.get_last_error() == _ERROR_ACCESS_DENIED
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == _STILL_ACTIVE
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _remove_stale(name):
+    """
+    Удаление сегмента, оставшегося от аварийно завершённого
+    производителя; сегмент живого производителя не трогается
+    """
+    shm = shared_memory.SharedMemory(name=name)
+
+    alive = False
+    pid = 0
+    if shm.size >= _HEADER_FIELDS * 8:
+        header = np.ndarray((_HEADER_FIELDS,), np.int64, shm.buf, 0)
+        pid = int(header[_H_PID])
+        alive = (header[_H_MAGIC] == _MAGIC and not header[_H_CLOSED]
+                 and pid > 0 and _process_alive(pid))
+        del header
+    shm.close()
+
+    if alive:
+        # Сегмент живого производителя: снимаем регистрацию в
+        # resource_tracker, которую сделало подключение (см. _attach)
+        if sys.version_info < (3, 13):
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        raise FileExistsError(f"Шина {name} уже используется "
+                              f"процессом {pid}")
+    # unlink() сам снимает регистрацию в resource_tracker
+    shm.unlink()
+
+
+def _layout(capacity, frame_shape):
+    """
+    Смещения частей сегмента и его общий размер
+
+    [заголовок int64 x 8][fps float64][номера кадров ячеек int64 x N]
+    [метки времени float64 x N][выравнивание][кадры uint8 x N]
+    """
+    header = 0
+    fps = header + _HEADER_FIELDS * 8
+    seqs = fps + 8
+    times = seqs + capacity * 8
+    frames = -(-(times + capacity * 8) // _ALIGN) * _ALIGN
+    size = frames + capacity * int(np.prod(frame_shape))
+    return {"fps": fps, "seqs": seqs, "times": times, "frames": frames,
+            "size": size}
+
+
+class _BusArrays:
+    """
+    Представления numpy над сегментом общей памяти
+    """
+
+    def __init__(self, shm, capacity, frame_shape):
+        layout = _layout(capacity, frame_shape)
+        buf = shm.buf
+        self.header = np.ndarray((_HEADER_FIELDS,), np.int64, buf, 0)
+        self.fps = np.ndarray((1,), np.float64, buf, layout["fps"])
+        self.seqs = np.ndarray((capacity,), np.int64, buf, layout["seqs"])
+        self.times = np.ndarray((capacity,), np.float64, buf, layout["times"])
+        self.frames = np.ndarray((capacity,) + tuple(frame_shape), np.uint8,
+                                 buf, layout["frames"])
+
+
+class FrameBusProducer:
+    """
+    Публикация кадров в кольцевой буфер общей памяти
+
+    Кадр с номером seq пишется в ячейку seq % capacity: номер ячейки
+    сначала сбрасывается в -1, затем копируется кадр и метка времени,
+    затем записывается номер кадра и счётчик опубликованных кадров.
+    Производитель никогда не ждёт потребителей: отставший потребитель
+    сам обнаруживает, что его кадры перезаписаны, и пропускает их.
+    Сегмент с тем же именем, оставшийся от упавшего производителя,
+    удаляется и создаётся заново.
+    """
+
+    def __init__(self, name=DEFAULT_BUS_NAME, frame_shape=(480, 640, 3),
+                 capacity=DEFAULT_CAPACITY, fps=0.0):
+        if capacity < 2:
+            raise ValueError("capacity должен быть >= 2")
+        frame_shape = tuple(frame_shape)
+        if len(frame_shape) not in (2, 3):
+            raise ValueError(f"Неподдерживаемая форма кадра: {frame_shape}")
+
+        self.name = name
+        self.capacity = capacity
+        self.frame_shape = frame_shape
+
+        size = _layout(capacity, frame_shape)["size"]
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=size)
+        except FileExistsError:
+            _remove_stale(name)
+            self._shm = shared_memory.SharedMemory(name=name, create=True,
+                                                   size=size)
+        self._arrays = _BusArrays(self._shm, capacity, frame_shape)
+
+        self._arrays.seqs[:] = -1
+        self._arrays.times[:] = 0.0
+        self._arrays.fps[0] = fps
+        header = self._arrays.header
+        header[:] = 0
+        header[_H_CAPACITY] = capacity
+        header[_H_HEIGHT], header[_H_WIDTH] = frame_shape[:2]
+        header[_H_CHANNELS] = frame_shape[2] if len(frame_shape) == 3 else 0
+        header[_H_PID] = os.getpid()
+        # Магическое число пишется последним: по нему потребитель
+        # узнаёт, что заголовок заполнен
+        header[_H_MAGIC] = _MAGIC
+
+        self.published = 0
+        self._pending = None
+
+    def slot(self):
+        """
+        Ячейка для следующего кадра (захват прямо в общую память)
+
+        После заполнения ячейки нужно вызвать commit(). До commit()
+        ячейка помечена как записываемая, и потребители её не читают.
+        """
+        index = self.published % self.capacity
+        self._arrays.seqs[index] = -1
+        self._pending = index
+        return self._arrays.frames[index]
+
+    def commit(self, timestamp=None):
+        """
+        Публикация кадра, записанного в ячейку из slot()
+        """
+        if self._pending is None:
+            raise RuntimeError("commit() без slot()")
+        index = self._pending
+        self._pending = None
+
+        seq = self.published
+        self._arrays.times[index] = (time.monotonic() if timestamp is None
+                                     else timestamp)
+        self._arrays.seqs[index] = seq
+        self.published = seq + 1
+        self._arrays.header[_H_WRITE_SEQ] = self.published
+        return seq
+
+    def publish(self, frame, timestamp=None):
+        """
+        Копирование кадра в шину; возвращает его номер
+        """
+        np.copyto(self.slot(), frame)
+        return self.commit(timestamp)
+
+    def close(self, unlink=True):
+        """
+        Завершение публикации: потребители дочитывают оставшиеся кадры
+        и получают (False, None)
+        """
+        if self._shm is None:
+            return
+        self._arrays.header[_H_CLOSED] = 1
+        # Представления должны быть удалены до закрытия сегмента
+        self._arrays = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def _attach(name, timeout):
+    """
+    Подключение к существующему сегменту с ожиданием его появления
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            shm = shared_memory.SharedMemory(name=name)
+            break
+        except FileNotFoundError:
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.01)
+
+    # До Python 3.13 подключившийся процесс регистрирует сегмент в
+    # resource_tracker, и тот удаляет его при выходе потребителя.
+    # Сегментом владеет производитель, поэтому регистрацию снимаем
+    if sys.version_info < (3, 13):
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+
+    # Ждём, пока производитель заполнит заголовок
+    header = np.ndarray((_HEADER_FIELDS,), np.int64, shm.buf, 0)
+    while header[_H_MAGIC] != _MAGIC:
+        if time.monotonic() >= deadline:
+            del header
+            shm.close()
+            raise TimeoutError(f"Шина {name} не инициализирована")
+        time.sleep(0.001)
+    values = header.copy()
+    del header
+    return shm, values
+
+
+class FrameBusConsumer:
+    """
+    Чтение кадров из шины со своим курсором
+
+    Курсор - номер следующего кадра этого потребителя; потребители
+    независимы друг от друга и не влияют на производителя. Если
+    потребитель отстал больше, чем на capacity - 1 кадров, курсор
+    переносится на самый старый ещё не перезаписанный кадр, а
+    пропущенные кадры учитываются в dropped. latest=True - всегда
+    читать самый свежий кадр (предпросмотр), пропуская промежуточные.
+    """
+
+    def __init__(self, name=DEFAULT_BUS_NAME, latest=False, timeout=5.0,
+                 from_start=False):
+        self.name = name
+        self.latest = latest
+        self._shm, header = _attach(name, timeout)
+
+        self.capacity = int(header[_H_CAPACITY])
+        height, width = int(header[_H_HEIGHT]), int(header[_H_WIDTH])
+        channels = int(header[_H_CHANNELS])
+        self.frame_shape = ((height, width, channels) if channels
+                            else (height, width))
+        self._arrays = _BusArrays(self._shm, self.capacity, self.frame_shape)
+        self.fps = float(self._arrays.fps[0])
+        self.producer_pid = int(header[_H_PID])
+
+        # По умолчанию читаются кадры, опубликованные после подключения
+        self.cursor = (0 if from_start
+                       else int(self._arrays.header[_H_WRITE_SEQ]))
+        self.received = 0
+        self.dropped = 0
+        self.last_seq = -1
+        self.last_timestamp = 0.0
+        self._buffer = None
+
+    def lag(self):
+        """
+        Сколько опубликованных кадров ещё не прочитано
+        """
+        return int(self._arrays.header[_H_WRITE_SEQ]) - self.cursor
+
+    def closed(self):
+        """
+        Закрыта ли шина: производитель вызвал close() или его процесс
+        завершился, не закрыв её
+        """
+        return (bool(self._arrays.header[_H_CLOSED])
+                or not _process_alive(self.producer_pid))
+
+    def _skip_to(self, seq):
+        if seq > self.cursor:
+            self.dropped += seq - self.cursor
+            self.cursor = seq
+
+    def read(self, out=None, timeout=DEFAULT_READ_TIMEOUT, copy=True):
+        """
+        Следующий кадр: (ret, frame)
+
+        copy=True - кадр копируется в out (или во внутренний буфер
+        потребителя) и после копирования проверяется, что производитель
+        не успел перезаписать ячейку. copy=False - представление ячейки
+        общей памяти без копирования: оно действительно, пока
+        is_current() возвращает True. timeout - секунды ожидания нового
+        кадра (None - ждать, пока шина не закрыта; 0 - не ждать). Если
+        процесс производителя завершился, не закрыв шину, оставшиеся
+        кадры дочитываются, затем возвращается (False, None).
+        """
+        arrays = self._arrays
+        now = time.monotonic()
+        deadline = None if timeout is None else now + timeout
+        next_check = now + PRODUCER_CHECK_INTERVAL
+
+        while True:
+            write_seq = int(arrays.header[_H_WRITE_SEQ])
+
+            # Ячейка следующего кадра может перезаписываться прямо
+            # сейчас, поэтому доступны только capacity - 1 последних
+            if self.latest:
+                self._skip_to(write_seq - 1)
+            else:
+                self._skip_to(write_seq - self.capacity + 1)
+
+            if self.cursor < write_seq:
+                seq = self.cursor
+                index = seq % self.capacity
+                if arrays.seqs[index] != seq:
+                    # Производитель обогнал потребителя
+                    self._skip_to(seq + 1)
+                    continue
+
+                timestamp = float(arrays.times[index])
+                if copy:
+                    if out is None:
+                        if self._buffer is None:
+                            self._buffer = np.empty(self.frame_shape, np.uint8)
+                        out = self._buffer
+                    np.copyto(out, arrays.frames[index])
+                    frame = out
+                else:
+                    frame = arrays.frames[index]
+
+                if arrays.seqs[index] != seq:
+                    # Ячейка перезаписана во время копирования
+                    self._skip_to(seq + 1)
+                    continue
+
+                self.cursor = seq + 1
+                self.last_seq = seq
+                self.last_timestamp = timestamp
+                self.received += 1
+                return True, frame
+
+            if arrays.header[_H_CLOSED]:
+                return False, None
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                return False, None
+            if now >= next_check:
+                if not _process_alive(self.producer_pid):
+                    return False, None
+                next_check = now + PRODUCER_CHECK_INTERVAL
+            time.sleep(POLL_INTERVAL)
+
+    def is_current(self):
+        """
+        Не перезаписан ли последний прочитанный кадр (для copy=False)
+        """
+        if self.last_seq < 0:
+            return False
+        index = self.last_seq % self.capacity
+        return int(self._arrays.seqs[index]) == self.last_seq
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "lag": self.lag(),
+        }
+
+    def close(self):
+        if self._shm is None:
+            return
+        self._arrays = None
+        self._buffer = None
+        self._shm.close()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class BusCapture:
+    """
+    Замена cv2.VideoCapture, читающая кадры из шины
+
+    read() без аргумента возвращает новый массив (как VideoCapture),
+    read(image) копирует кадр в переданный буфер. Если шина не
+    появилась за timeout секунд, isOpened() == False; read() ждёт кадр
+    не дольше read_timeout секунд. Разрешение задаёт
+    производитель, поэтому set() ничего не меняет.
+    """
+
+    def __init__(self, name=DEFAULT_BUS_NAME, latest=False, timeout=5.0,
+                 read_timeout=DEFAULT_READ_TIMEOUT):
+        self.read_timeout = read_timeout
+        # Как у VideoCapture: недоступная шина - isOpened() == False
+        try:
+            self.consumer = FrameBusConsumer(name, latest=latest,
+                                             timeout=timeout)
+        except (FileNotFoundError, TimeoutError):
+            self.consumer = None
+
+    def isOpened(self):
+        return self.consumer is not None
+
+    def read(self, image=None):
+        if self.consumer is None:
+            return False, None
+        if image is None or image.shape != self.consumer.frame_shape:
+            image = np.empty(self.consumer.frame_shape, np.uint8)
+        return self.consumer.read(image, timeout=self.read_timeout)
+
+    def get(self, prop):
+        if self.consumer is None:
+            return 0.0
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.consumer.frame_shape[1])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.consumer.frame_shape[0])
+        if prop == cv2.CAP_PROP_FPS:
+            return self.consumer.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.consumer.cursor)
+        return 0.0
+
+    def set(self, prop, value):
+        return False
+
+    def release(self):
+        if self.consumer is not None:
+            self.consumer.close()
+            self.consumer = None
+
+
+def publish_capture(cap, producer, max_frames=None, fps=None):
+    """
+    Публикация кадров из VideoCapture в шину до конца источника
+
+    Кадр декодируется прямо в ячейку общей памяти, если источник
+    поддерживает read(image) с готовым буфером. fps - ограничение
+    частоты (для видеофайлов, которые иначе читаются без пауз).
+    Возвращает число опубликованных кадров.
+    """
+    interval = 1.0 / fps if fps else 0.0
+    next_time = time.monotonic()
+    count = 0
+
+    while max_frames is None or count < max_frames:
+        slot = producer.slot()
+        ret, frame = cap.read(slot)
+        if not ret:
+            break
+        if frame is not slot:
+            np.copyto(slot, frame)
+        producer.commit()
+        count += 1
+
+        if interval:
+            next_time += interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()
+    return count
+
+
+def run_producer(source=0, name=DEFAULT_BUS_NAME, capacity=DEFAULT_CAPACITY,
+                 max_frames=None, fps=None, frame_size=(640, 480)):
+    """
+    Производитель: любой источник open_source() - камера, видеофайл
+    по кругу, папка изображений или "synthetic[:узор]"
+
+    Темп задаёт сам источник (камера или выдержка fps у остальных).
+    """
+    cap = open_source(source, frame_size, fps)
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть источник: {source}")
+
+    try:
+        ret, first = cap.read()
+        if not ret:
+            raise IOError(f"Не удалось прочитать кадр: {source}")
+
+        with FrameBusProducer(name, first.shape, capacity,
+                              cap.get(cv2.CAP_PROP_FPS)) as producer:
+            producer.publish(first)
+            remaining = None if max_frames is None else max_frames - 1
+            return 1 + publish_capture(cap, producer, remaining)
+    finally:
+        cap.release()
+
+
+def start_producer_process(source=0, name=DEFAULT_BUS_NAME,
+                           capacity=DEFAULT_CAPACITY, max_frames=None,
+                           fps=None, frame_size=(640, 480)):
+    """
+    Запуск производителя в отдельном процессе
+
+    Потребители подключаются по имени; FrameBusConsumer ждёт появления
+    шины (timeout), поэтому синхронизация запуска не нужна.
+    """
+    process = multiprocessing.Process(
+        target=run_producer,
+        args=(source, name, capacity, max_frames, fps, frame_size),
+        daemon=True,
+    )
+    process.start()
+    return process
+
+
+if __name__ == "__main__":
+    # python frame_bus.py [камера | видеофайл | папка | synthetic] [имя шины]
+    # Затем task_6 / task_7 с bus_name=<имя> читают те же кадры
+    arg = sys.argv[1] if len(sys.argv) > 1 else "0"
+    bus_name = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_BUS_NAME
+    bus_source = int(arg) if arg.isdigit() else arg
+
+    print(f"Шина {bus_name}: публикация из {arg} (Ctrl+C - остановка)")
+    try:
+        published = run_producer(bus_source, bus_name)
+        print(f"Опубликовано кадров: {published}")
+    except KeyboardInterrupt:
+        print("\nОстановлено")
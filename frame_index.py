@@ -0,0 +1,228 @@
+import bisect
+import cv2
+import hashlib
+import json
+import os
+
+from video_probe import file_key
+
+
+# Папка с сохранёнными индексами кадров
+DEFAULT_INDEX_DIR = "output/frame_index"
+
+
+def scan_keyframes(video_path):
+    """
+    Поиск ключевых кадров без декодирования
+
+    Видео читается в режиме сырых пакетов (CAP_PROP_FORMAT = -1),
+    флаг ключевого кадра берётся из CAP_PROP_LRF_HAS_KEY_FRAME.
+    Возвращает (число кадров, [(номер кадра, время в мс), ...]).
+    Если backend не поддерживает сырой режим, ключевым считается
+    только кадр 0 (поиск останется точным, но медленным).
+    """
+    cap = cv2.VideoCapture(video_path)
+
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть видео: {video_path}")
+
+    raw_mode = cap.set(cv2.CAP_PROP_FORMAT, -1)
+
+    keyframes = []
+    frame_count = 0
+
+    while True:
+        if raw_mode:
+            ret, _ = cap.read()
+        else:
+            ret = cap.grab()
+
+        if not ret:
+            break
+
+        is_key = frame_count == 0
+        if raw_mode and cap.get(cv2.CAP_PROP_LRF_HAS_KEY_FRAME):
+            is_key = True
+
+        if is_key:
+            keyframes.append((frame_count, cap.get(cv2.CAP_PROP_POS_MSEC)))
+
+        frame_count += 1
+
+    cap.release()
+
+    if not keyframes:
+        keyframes.append((0, 0.0))
+
+    return frame_count, keyframes
+
+
+class FrameIndex:
+    """
+    Точный произвольный доступ к кадрам видео по индексу ключевых кадров
+
+    При первом открытии файл сканируется один раз, индекс сохраняется
+    на диск (проверяется по размеру и времени изменения файла).
+    Кадр n получается переходом к ближайшему ключевому кадру k <= n
+    и декодированием вперёд; если текущая позиция уже между k и n,
+    перехода нет совсем. Переход выполняется по времени ключевого
+    кадра из индекса (CAP_PROP_POS_MSEC), и позиция после него
+    проверяется; если backend встал не туда, используется переход по
+    номеру кадра, а в крайнем случае - чтение с начала файла.
+    """
+
+    def __init__(self, video_path, index_dir=DEFAULT_INDEX_DIR):
+        self.video_path = video_path
+        self.index_dir = index_dir
+
+        self.frame_count, keyframes = self._load_or_build()
+        self.keyframes = [frame for frame, _ in keyframes]
+        self.timestamps = [msec for _, msec in keyframes]
+
+        self._cap = None
+        # Номер кадра, который вернёт следующий cap.read()
+        self._position = None
+
+    def _index_path(self):
+        abs_path = os.path.abspath(self.video_path)
+        digest = hashlib.md5(abs_path.encode("utf-8")).hexdigest()[:16]
+        name = os.path.basename(abs_path)
+        return os.path.join(self.index_dir, f"{name}.{digest}.json")
+
+    def _load_or_build(self):
+        _, size, mtime_ns = file_key(self.video_path)
+
+        if self.index_dir is not None:
+            index_path = self._index_path()
+            if os.path.exists(index_path):
+                try:
+                    with open(index_path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    if data["size"] == size and data["mtime_ns"] == mtime_ns:
+                        return data["frame_count"], data["keyframes"]
+                except (OSError, ValueError, KeyError):
+                    pass
+
+        frame_count, keyframes = scan_keyframes(self.video_path)
+
+        if self.index_dir is not None:
+            os.makedirs(self.index_dir, exist_ok=True)
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"size": size, "mtime_ns": mtime_ns,
+                           "frame_count": frame_count,
+                           "keyframes": keyframes}, f)
+            os.replace(tmp_path, index_path)
+
+        return frame_count, keyframes
+
+    def __len__(self):
+        return self.frame_count
+
+    def nearest_keyframe(self, frame_number):
+        """
+        Ближайший ключевой кадр, не превышающий frame_number
+        """
+        pos = bisect.bisect_right(self.keyframes, frame_number) - 1
+        return self.keyframes[max(pos, 0)]
+
+    def keyframe_timestamp(self, keyframe):
+        """
+        Время ключевого кадра в миллисекундах
+        """
+        pos = bisect.bisect_left(self.keyframes, keyframe)
+        return self.timestamps[pos]
+
+    def _open(self):
+        if self._cap is None:
+            self._cap = cv2.VideoCapture(self.video_path)
+            if not self._cap.isOpened():
+                self._cap = None
+                raise IOError(f"Не удалось открыть видео: {self.video_path}")
+            self._position = 0
+        return self._cap
+
+    def _seek(self, keyframe):
+        """
+        Переход к ключевому кадру с проверкой, куда встал backend
+        """
+        cap = self._cap
+        if keyframe == 0 and self._position == 0:
+            return
+
+        # Время ключевого кадра из индекса: переход по pts попадает
+        # прямо в ключевой кадр, без пересчёта номера в время backend-ом
+        if (cap.set(cv2.CAP_PROP_POS_MSEC, self.keyframe_timestamp(keyframe))
+                and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == keyframe):
+            self._position = keyframe
+            return
+
+        if (cap.set(cv2.CAP_PROP_POS_FRAMES, keyframe)
+                and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == keyframe):
+            self._position = keyframe
+            return
+
+        # Оба перехода неточны: открываем файл заново и читаем с начала
+        self.release()
+        self._open()
+
+    def get_frame(self, frame_number):
+        """
+        Кадр с номером frame_number (или None, если прочитать не удалось)
+        """
+        if frame_number < 0:
+            frame_number += self.frame_count
+        if not 0 <= frame_number < self.frame_count:
+            raise IndexError(f"Кадр {frame_number} вне диапазона "
+                             f"0..{self.frame_count - 1}")
+
+        cap = self._open()
+        keyframe = self.nearest_keyframe(frame_number)
+
+        # Переход нужен, только если текущая позиция не между k и n
+        if (self._position is None
+                or not keyframe <= self._position <= frame_number):
+            self._seek(keyframe)
+            cap = self._cap
+
+        # Промежуточные кадры только захватываются, без retrieve()
+        while self._position < frame_number:
+            if not cap.grab():
+                self._position = None
+                return None
+            self._position += 1
+
+        ret, frame = cap.read()
+        if not ret:
+            self._position = None
+            return None
+
+        self._position += 1
+        return frame
+
+    def get_frames(self, frames):
+        """
+        Генератор (номер, кадр) для range или списка номеров
+
+        Номера обрабатываются в порядке возрастания, поэтому соседние
+        кадры декодируются последовательно без лишних переходов.
+        """
+        # range обрезается по длине видео, как срез списка
+        if isinstance(frames, range):
+            frames = [n for n in frames if 0 <= n < self.frame_count]
+
+        for frame_number in sorted(frames):
+            yield frame_number, self.get_frame(frame_number)
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+            self._position = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
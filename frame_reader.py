@@ -0,0 +1,140 @@
+import cv2
+import queue
+import threading
+
+
+class ThreadedFrameReader:
+    """
+    Чтение кадров из VideoCapture в фоновом потоке с опережением
+
+    Декодирование выполняется в отдельном потоке и складывается в
+    ограниченную очередь (prefetch кадров). Когда очередь заполнена,
+    поток чтения ждёт (backpressure), поэтому память не растёт.
+    Метод read() повторяет интерфейс cap.read(): возвращает (ret, frame).
+    """
+
+    # Маркеры конца прохода по видео и окончания чтения
+    _END = object()
+    _DONE = object()
+
+    def __init__(self, cap, prefetch=8, loop=False, start_frame=None,
+                 max_frames=None):
+        if prefetch < 1:
+            raise ValueError("prefetch должен быть >= 1")
+
+        self.cap = cap
+        self.loop = loop
+        self.max_frames = max_frames
+
+        # Переход к нужному кадру до запуска потока
+        if start_frame is not None:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        self._queue = queue.Queue(maxsize=prefetch)
+        self._stop = threading.Event()
+        self._finished = False
+        self._error = None
+
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+
+    def _put(self, item):
+        """
+        Помещение в очередь с ожиданием свободного места
+        """
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _worker(self):
+        """
+        Фоновый поток: читает кадры, пока не остановлен
+        """
+        decoded = 0
+        try:
+            while not self._stop.is_set():
+                if self.max_frames is not None and decoded >= self.max_frames:
+                    self._put(self._DONE)
+                    break
+
+                ret, frame = self.cap.read()
+
+                if not ret:
+                    if not self.loop:
+                        self._put(self._DONE)
+                        break
+                    # Конец прохода: сообщаем потребителю и начинаем заново
+                    if not self._put(self._END):
+                        break
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    continue
+
+                if not self._put(frame):
+                    break
+                decoded += 1
+        except Exception as e:
+            self._error = e
+            self._put(self._DONE)
+
+    def read(self, timeout=None):
+        """
+        Получение следующего кадра: (ret, frame)
+
+        В режиме loop=True в конце каждого прохода возвращается
+        (False, None), после чего чтение продолжается с начала.
+        max_frames ограничивает общее число кадров.
+        """
+        if self._finished:
+            return False, None
+
+        item = self._queue.get(timeout=timeout)
+
+        if item is self._DONE:
+            self._finished = True
+            if self._error is not None:
+                raise self._error
+            return False, None
+
+        if item is self._END:
+            return False, None
+
+        return True, item
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def qsize(self):
+        """
+        Количество кадров, уже декодированных наперёд
+        """
+        return self._queue.qsize()
+
+    def stop(self):
+        """
+        Остановка фонового потока (VideoCapture не освобождается)
+        """
+        self._stop.set()
+
+        # Освобождаем очередь, чтобы поток не завис на put()
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
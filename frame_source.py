@@ -0,0 +1,473 @@
+import os
+import time
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+
+from frame_store import open_capture
+from image_loader import decode_variants, expand_paths, load_images
+
+# Узоры синтетического источника
+SYNTHETIC_PATTERNS = ("bars", "gradient", "checker", "noise")
+
+# Цветные полосы (BGR): белый, жёлтый, голубой, зелёный, пурпурный,
+# красный, синий
+_BAR_COLORS = [(255, 255, 255), (0, 255, 255), (255, 255, 0), (0, 255, 0),
+               (255, 0, 255), (0, 0, 255), (255, 0, 0)]
+
+# Размер клетки шахматного узора
+_CHECKER_CELL = 32
+
+# Сколько разных кадров шума генерируется заранее
+_NOISE_FRAMES = 8
+
+# Предел памяти под заранее загруженные изображения; если набор
+# больше, изображения читаются с диска по одному на кадр
+DEFAULT_PRELOAD_BYTES = 256 * 1024 * 1024
+
+
+class _Pacer:
+    """
+    Выдержка темпа: кадр i отдаётся не раньше start + i / fps
+
+    Если источник отстал больше чем на кадр, отсчёт начинается заново -
+    пропущенное время не догоняется пачкой кадров без пауз.
+    """
+
+    def __init__(self, fps):
+        self.interval = 1.0 / fps
+        self._next = None
+
+    def wait(self):
+        now = time.perf_counter()
+        if self._next is None or now - self._next > self.interval:
+            self._next = now
+        delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+        self._next += self.interval
+
+    def reset(self):
+        self._next = None
+
+
+class FrameSource(ABC):
+    """
+    Источник кадров с интерфейсом cv2.VideoCapture
+
+    read(image) пишет кадр в переданный буфер, read() без буфера
+    возвращает новый массив - как VideoCapture, поэтому кадр можно
+    отдать в очередь записи. reuse_output=True - read() без буфера
+    каждый раз возвращает один и тот же предвыделенный буфер (кадр
+    действителен до следующего read()).
+
+    pace=True - источник отдаёт кадры не чаще fps (видеофайл,
+    папка изображений и синтетика иначе читаются без пауз),
+    pace=False - с максимальной скоростью.
+    """
+
+    def __init__(self, frame_size, fps, pace=True, reuse_output=False):
+        self.frame_size = tuple(frame_size)
+        self.fps = float(fps)
+        self.frames_read = 0
+        self._pacer = _Pacer(self.fps) if pace and self.fps > 0 else None
+        self._output = None
+        self._reuse_output = reuse_output
+        self._opened = True
+
+    @property
+    def frame_shape(self):
+        width, height = self.frame_size
+        return height, width, 3
+
+    @abstractmethod
+    def _fill(self, image):
+        """
+        Запись следующего кадра в image: (ret, кадр)
+
+        Возвращённый кадр может быть другим массивом, если источник
+        не умеет писать в готовый буфер.
+        """
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+
+        if image is None or image.shape != self.frame_shape:
+            if self._reuse_output:
+                if self._output is None:
+                    self._output = np.empty(self.frame_shape, np.uint8)
+                image = self._output
+            else:
+                image = np.empty(self.frame_shape, np.uint8)
+
+        ret, frame = self._fill(image)
+        if not ret:
+            return False, None
+
+        if self._pacer is not None:
+            self._pacer.wait()
+        self.frames_read += 1
+        return True, frame
+
+    def isOpened(self):
+        return self._opened
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frame_size[0])
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frame_size[1])
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self.frames_read)
+        return 0.0
+
+    def set(self, prop, value):
+        # Размер и частота задаются при создании источника
+        return False
+
+    def release(self):
+        self._opened = False
+        self._output = None
+
+    def __iter__(self):
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
+
+
+class _CaptureSource(FrameSource):
+    """
+    Источник поверх объекта с интерфейсом VideoCapture
+    """
+
+    def __init__(self, cap, fps, pace, reuse_output):
+        self.cap = cap
+        if cap.isOpened():
+            frame_size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                          int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        else:
+            frame_size = (0, 0)
+        super().__init__(frame_size, fps, pace, reuse_output)
+        self._opened = cap.isOpened()
+
+    def _read_capture(self, image):
+        ret, frame = self.cap.read(image)
+        if ret and frame is not image and frame.shape == image.shape:
+            np.copyto(image, frame)
+            frame = image
+        return ret, frame
+
+    def _fill(self, image):
+        return self._read_capture(image)
+
+    def release(self):
+        self.cap.release()
+        super().release()
+
+
+class DeviceSource(_CaptureSource):
+    """
+    Камера (номер устройства cv2.VideoCapture); темп задаёт камера
+    """
+
+    def __init__(self, index=0, frame_size=(640, 480), reuse_output=False):
+        cap = cv2.VideoCapture(index)
+        if cap.isOpened() and frame_size is not None:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, frame_size[0])
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, frame_size[1])
+        fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+        super().__init__(cap, fps, False, reuse_output)
+        self.index = index
+
+
+class VideoFileSource(_CaptureSource):
+    """
+    Видеофайл по кругу - замена камеры для тестов и замеров
+
+    По умолчанию кадры отдаются с частотой файла (fps задаёт другую).
+    cached=True - кадры берутся из хранилища декодированных кадров
+    (frame_store), и декодирование не входит в замер.
+    """
+
+    def __init__(self, path, loop=True, fps=None, pace=True, cached=False,
+                 reuse_output=False):
+        cap = open_capture(path) if cached else cv2.VideoCapture(path)
+        if fps is None:
+            fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0.0
+        super().__init__(cap, fps, pace, reuse_output)
+        self.path = path
+        self.loop = loop
+        self.loops = 0
+
+    def _fill(self, image):
+        ret, frame = self._read_capture(image)
+        if not ret and self.loop and self.frames_read > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self.loops += 1
+            ret, frame = self._read_capture(image)
+        return ret, frame
+
+
+class ImageDirectorySource(FrameSource):
+    """
+    Набор изображений как видеопоток
+
+    source - папка, glob-шаблон или список путей. Если все кадры
+    размера frame_size (по умолчанию - размер первого изображения)
+    помещаются в max_bytes, изображения загружаются заранее
+    (параллельно, через image_loader) в один массив (N, H, W, 3), и
+    чтение кадра - одна копия. Иначе изображения читаются с диска по
+    одному на кадр; файлы, которые не удалось прочитать, пропускаются.
+    """
+
+    def __init__(self, source, fps=10.0, frame_size=None, loop=True,
+                 pace=True, reuse_output=False,
+                 max_bytes=DEFAULT_PRELOAD_BYTES):
+        paths = sorted(expand_paths(source))
+        if not paths:
+            raise IOError(f"Нет изображений: {source}")
+
+        if frame_size is None:
+            first = next((img for img in map(self._decode, paths)
+                          if img is not None), None)
+            if first is None:
+                raise IOError(f"Нет изображений: {source}")
+            frame_size = (first.shape[1], first.shape[0])
+        super().__init__(frame_size, fps, pace, reuse_output)
+
+        self.loop = loop
+        self._frames = None
+        self._next = 0
+
+        frame_bytes = int(np.prod(self.frame_shape))
+        self.preloaded = (max_bytes is None
+                          or len(paths) * frame_bytes <= max_bytes)
+        if self.preloaded:
+            paths = self._preload(source, paths)
+        self.paths = paths
+
+    def _preload(self, source, paths):
+        images = {}
+        for result in load_images(paths, ("color",)):
+            if result.error is None:
+                images[result.path] = result.images["color"]
+        paths = sorted(images)
+        if not paths:
+            raise IOError(f"Нет изображений: {source}")
+
+        self._frames = np.empty((len(paths),) + self.frame_shape, np.uint8)
+        for i, path in enumerate(paths):
+            self._put(images.pop(path), self._frames[i])
+        return paths
+
+    @staticmethod
+    def _decode(path):
+        try:
+            data = np.fromfile(path, dtype=np.uint8)
+            return decode_variants(data, ("color",)).get("color")
+        except (OSError, cv2.error):
+            return None
+
+    def _put(self, img, out):
+        if img.shape == self.frame_shape:
+            np.copyto(out, img)
+        else:
+            cv2.resize(img, self.frame_size, dst=out,
+                       interpolation=cv2.INTER_AREA)
+
+    def _fill(self, image):
+        if self._frames is not None:
+            index = self.frames_read
+            if index >= len(self._frames):
+                if not self.loop:
+                    return False, None
+                index %= len(self._frames)
+            np.copyto(image, self._frames[index])
+            return True, image
+
+        # Чтение с диска: не больше одного прохода по списку в поиске
+        # читаемого файла
+        for _ in range(len(self.paths)):
+            if self._next >= len(self.paths):
+                if not self.loop:
+                    return False, None
+                self._next = 0
+            img = self._decode(self.paths[self._next])
+            self._next += 1
+            if img is not None:
+                self._put(img, image)
+                return True, image
+        return False, None
+
+    def release(self):
+        super().release()
+        self._frames = None
+
+
+def _pattern_base(pattern, frame_size, seed):
+    """
+    Заранее построенный узор, из которого кадры вырезаются сдвигом
+    """
+    width, height = frame_size
+
+    if pattern == "bars":
+        # Полосы повторяются с периодом width по горизонтали
+        columns = np.arange(2 * width) % width * len(_BAR_COLORS) // width
+        row = np.array(_BAR_COLORS, np.uint8)[columns]
+        return np.ascontiguousarray(
+            np.broadcast_to(row, (height, 2 * width, 3)))
+
+    if pattern == "gradient":
+        # Тон меняется по горизонтали, яркость - по вертикали
+        hue = (np.arange(2 * width) % width * 180 // width).astype(np.uint8)
+        value = np.linspace(255, 64, height).astype(np.uint8)
+        hsv = np.empty((height, 2 * width, 3), np.uint8)
+        hsv[..., 0] = hue
+        hsv[..., 1] = 255
+        hsv[..., 2] = value[:, None]
+        return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+    if pattern == "checker":
+        size = 2 * _CHECKER_CELL
+        ys = np.arange(height + size) // _CHECKER_CELL
+        xs = np.arange(width + size) // _CHECKER_CELL
+        cells = ((ys[:, None] + xs[None, :]) % 2 * 255).astype(np.uint8)
+        return cv2.cvtColor(cells, cv2.COLOR_GRAY2BGR)
+
+    if pattern == "noise":
+        rng = np.random.default_rng(seed)
+        return rng.integers(0, 256, (_NOISE_FRAMES, height, width, 3),
+                            dtype=np.uint8)
+
+    raise ValueError(f"Неизвестный узор: {pattern} "
+                     f"(доступны: {', '.join(SYNTHETIC_PATTERNS)})")
+
+
+class SyntheticSource(FrameSource):
+    """
+    Детерминированный генератор кадров
+
+    Узор строится один раз при создании; кадр i - сдвинутый срез узора
+    (или i-й из заранее сгенерированных кадров шума), скопированный в
+    буфер, и номер кадра поверх (stamp=True). Выделений памяти на кадр
+    нет, одинаковые параметры дают одинаковые кадры. frame_count=None -
+    бесконечный поток. pace=False - максимальная скорость (замер
+    пропускной способности), иначе кадры отдаются с частотой fps.
+    """
+
+    def __init__(self, frame_size=(640, 480), fps=30.0, pattern="bars",
+                 pace=True, frame_count=None, stamp=True, speed=4, seed=0,
+                 reuse_output=False):
+        super().__init__(frame_size, fps, pace, reuse_output)
+        self.pattern = pattern
+        self.frame_count = frame_count
+        self.stamp = stamp
+        self.speed = speed
+        self._base = _pattern_base(pattern, self.frame_size, seed)
+
+    def frame(self, index, out):
+        """
+        Кадр с номером index в буфер out
+        """
+        width, height = self.frame_size
+        base = self._base
+
+        if self.pattern == "noise":
+            np.copyto(out, base[index % len(base)])
+        elif self.pattern == "checker":
+            offset = index * self.speed % (2 * _CHECKER_CELL)
+            np.copyto(out, base[offset:offset + height,
+                                offset:offset + width])
+        else:
+            offset = index * self.speed % width
+            np.copyto(out, base[:, offset:offset + width])
+
+        if self.stamp:
+            cv2.putText(out, str(index), (10, height - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 4)
+            cv2.putText(out, str(index), (10, height - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        return out
+
+    def _fill(self, image):
+        if (self.frame_count is not None
+                and self.frames_read >= self.frame_count):
+            return False, None
+        return True, self.frame(self.frames_read, image)
+
+    def release(self):
+        super().release()
+        self._base = None
+
+
+def open_source(source=0, frame_size=(640, 480), fps=None, pace=True):
+    """
+    Источник кадров по описанию
+
+    - номер устройства (int) - камера;
+    - "synthetic" или "synthetic:<узор>" - синтетические кадры
+      frame_size с частотой fps (по умолчанию 30);
+    - папка или glob-шаблон - изображения как кадры;
+    - путь к файлу - видео по кругу;
+    - готовый FrameSource (или объект с интерфейсом VideoCapture)
+      возвращается как есть.
+    """
+    if not isinstance(source, (int, str)):
+        return source
+    if isinstance(source, int):
+        return DeviceSource(source, frame_size)
+
+    if source == "synthetic" or source.startswith("synthetic:"):
+        pattern = source.partition(":")[2] or "bars"
+        return SyntheticSource(frame_size, fps or 30.0, pattern, pace)
+
+    if os.path.isdir(source) or any(c in source for c in "*?["):
+        return ImageDirectorySource(source, fps or 10.0, frame_size, pace=pace)
+
+    return VideoFileSource(source, fps=fps, pace=pace)
+
+
+def benchmark_source(source, frames=300, reuse_buffer=True):
+    """
+    Пропускная способность источника: кадров в секунду
+
+    reuse_buffer=True - кадры читаются в один буфер (read(image)),
+    иначе - read() с новым массивом на кадр.
+    """
+    buffer = None
+    count = 0
+    start = time.perf_counter()
+    for _ in range(frames):
+        ret, frame = source.read(buffer)
+        if not ret:
+            break
+        if reuse_buffer:
+            buffer = frame
+        count += 1
+    elapsed = time.perf_counter() - start
+    return count / elapsed if elapsed > 0 else 0.0
+
+
+if __name__ == "__main__":
+    for size in ((640, 480), (1280, 720), (1920, 1080)):
+        for name in SYNTHETIC_PATTERNS:
+            with SyntheticSource(size, pattern=name, pace=False) as src:
+                fps_reused = benchmark_source(src, 200)
+            with SyntheticSource(size, pattern=name, pace=False) as src:
+                fps_new = benchmark_source(src, 200, reuse_buffer=False)
+            print(f"   {size[0]}x{size[1]} {name:>8}: "
+                  f"{fps_reused:7.0f} кадров/с (один буфер), "
+                  f"{fps_new:7.0f} кадров/с (новый массив)")
@@ -0,0 +1,324 @@
+import hashlib
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_reader import ThreadedFrameReader
+from video_probe import file_key, probe_video
+
+# Папка хранилища декодированных кадров
+DEFAULT_STORE_DIR = "output/frame_store"
+
+# Предел общего объёма хранилища
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2
+
+
+class StoredVideo:
+    """
+    Декодированное видео в хранилище: кадры как массив (N, H, W, 3)
+
+    frames - np.memmap только для чтения; индексация и срезы дают
+    представления без копирования, страницы читаются с диска по мере
+    обращения и разделяются между процессами через кеш страниц ОС.
+    """
+
+    def __init__(self, source_path, frames_path, header, max_frames=None):
+        self.source_path = source_path
+        self.frames_path = frames_path
+        self.fps = header["fps"]
+        frames = np.memmap(frames_path, dtype=np.uint8, mode="r",
+                           shape=tuple(header["shape"]))
+        # Ограничение числа кадров - срез полной записи, без копирования
+        self.frames = frames if max_frames is None else frames[:max_frames]
+
+    @property
+    def shape(self):
+        return self.frames.shape
+
+    def __len__(self):
+        return self.frames.shape[0]
+
+    def __getitem__(self, index):
+        return self.frames[index]
+
+    def capture(self):
+        """
+        Объект с интерфейсом VideoCapture поверх хранилища
+        """
+        return StoredCapture(self)
+
+
+class StoredCapture:
+    """
+    Замена cv2.VideoCapture, читающая кадры из StoredVideo
+
+    Поддерживает read(), grab(), retrieve(), get()/set() для позиции и
+    размеров, isOpened() и release(), поэтому работает с
+    ThreadedFrameReader, resize_stream и color_stream. Кадры -
+    представления только для чтения: рисовать на них нельзя.
+    """
+
+    def __init__(self, video):
+        self.video = video
+        self._position = 0
+        self._current = None
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def grab(self):
+        if not self._opened or self._position >= len(self.video):
+            self._current = None
+            return False
+        self._current = self.video[self._position]
+        self._position += 1
+        return True
+
+    def retrieve(self):
+        return self._current is not None, self._current
+
+    def read(self, image=None):
+        """
+        (ret, кадр); с буфером image кадр копируется в него
+        """
+        if not self.grab():
+            return False, None
+        if image is not None and image.shape == self._current.shape:
+            np.copyto(image, self._current)
+            return True, image
+        return True, self._current
+
+    def get(self, prop):
+        count, height, width = self.video.shape[:3]
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            return float(self._position)
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return float(count)
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(width)
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(height)
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.video.fps)
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            fps = self.video.fps
+            return self._position * 1000.0 / fps if fps > 0 else 0.0
+        return 0.0
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self._position = min(max(0, int(value)), len(self.video))
+            return True
+        return False
+
+    def release(self):
+        self._opened = False
+        self._current = None
+
+
+class FrameStore:
+    """
+    Хранилище декодированных кадров с вытеснением по LRU
+
+    Для каждого видео хранится файл сырых кадров <ключ>.frames и
+    заголовок <ключ>.json: ключ источника (путь, размер, время
+    изменения), форма массива, fps и время последнего обращения.
+    Изменённый источник не совпадает по ключу - запись строится
+    заново. Запись одна на видео: полная запись обслуживает любой
+    max_frames, частичная (первые max_frames кадров) строится, только
+    если полной нет, и заменяется полной при запросе большего числа
+    кадров. Перед записью нового видео вытесняются давно не
+    использованные записи, пока общий объём не станет меньше max_bytes.
+    """
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR,
+                 max_bytes=DEFAULT_MAX_BYTES, verbose=True):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.verbose = verbose
+        os.makedirs(store_dir, exist_ok=True)
+
+    def _paths(self, video_path):
+        digest = hashlib.sha1(
+            os.path.abspath(video_path).encode("utf-8")).hexdigest()
+        base = os.path.join(self.store_dir, digest)
+        return base + ".frames", base + ".json"
+
+    @staticmethod
+    def _read_header(header_path):
+        try:
+            with open(header_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_header(header_path, header):
+        # Запись через временный файл, чтобы заголовок не повредился
+        tmp_path = f"{header_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, header_path)
+
+    def entries(self):
+        """
+        Список (путь заголовка, заголовок) всех записей хранилища
+        """
+        result = []
+        for name in os.listdir(self.store_dir):
+            if not name.endswith(".json"):
+                continue
+            header_path = os.path.join(self.store_dir, name)
+            header = self._read_header(header_path)
+            if header is not None:
+                result.append((header_path, header))
+        return result
+
+    def total_bytes(self):
+        return sum(header["nbytes"] for _, header in self.entries())
+
+    def _remove(self, header_path):
+        frames_path = header_path[:-len(".json")] + ".frames"
+        for path in (header_path, frames_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def evict(self, video_path):
+        """
+        Удаление записи одного видео
+        """
+        self._remove(self._paths(video_path)[1])
+
+    def clear(self):
+        for header_path, _ in self.entries():
+            self._remove(header_path)
+
+    def _make_room(self, needed):
+        entries = sorted(self.entries(), key=lambda e: e[1]["last_access"])
+        total = sum(header["nbytes"] for _, header in entries)
+        for header_path, header in entries:
+            if total + needed <= self.max_bytes:
+                break
+            self._remove(header_path)
+            total -= header["nbytes"]
+
+    def open(self, video_path, max_frames=None, prefetch=8):
+        """
+        StoredVideo для видео; при первом обращении кадры декодируются
+
+        max_frames - нужны только первые max_frames кадров: подходит
+        любая запись, где они есть, а новая запись декодирует только их.
+        """
+        frames_path, header_path = self._paths(video_path)
+        key = list(file_key(video_path))
+
+        header = self._read_header(header_path)
+        if (header is not None and header.get("source") == key
+                and os.path.exists(frames_path)
+                and (header.get("complete")
+                     or (max_frames is not None
+                         and header["shape"][0] >= max_frames))):
+            header["last_access"] = time.time()
+            self._write_header(header_path, header)
+            return StoredVideo(video_path, frames_path, header, max_frames)
+
+        header = self._build(video_path, frames_path, key, max_frames,
+                             prefetch)
+        self._write_header(header_path, header)
+        return StoredVideo(video_path, frames_path, header, max_frames)
+
+    def _build(self, video_path, frames_path, key, max_frames, prefetch):
+        info = probe_video(video_path)
+        count = info.frame_count
+        if max_frames is not None:
+            count = min(count, max_frames)
+        frame_shape = (info.height, info.width, 3)
+        frame_bytes = int(np.prod(frame_shape))
+        needed = count * frame_bytes
+
+        if needed > self.max_bytes:
+            raise ValueError(f"Видео {video_path} ({needed / 1024 ** 2:.0f} МБ) "
+                             f"больше предела хранилища")
+
+        # Старая запись этого видео не должна мешать освобождению места
+        self._remove(self._paths(video_path)[1])
+        self._make_room(needed)
+
+        if self.verbose:
+            print(f"Хранилище кадров: декодирование {video_path} "
+                  f"({count} кадров, {needed / 1024 ** 2:.0f} МБ) "
+                  f"в {self.store_dir}")
+
+        tmp_path = f"{frames_path}.{os.getpid()}.tmp"
+        frames = np.memmap(tmp_path, dtype=np.uint8, mode="w+",
+                           shape=(max(count, 1),) + frame_shape)
+
+        decoded = 0
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            del frames
+            os.remove(tmp_path)
+            raise IOError(f"Не удалось открыть видео: {video_path}")
+
+        # Число кадров из метаданных бывает неточным: пишем, сколько
+        # реально декодировалось, но не больше выделенного
+        with ThreadedFrameReader(cap, prefetch=prefetch,
+                                 max_frames=count) as reader:
+            for frame in reader:
+                frames[decoded] = frame
+                decoded += 1
+        cap.release()
+
+        frames.flush()
+        del frames
+        if decoded == 0:
+            os.remove(tmp_path)
+            raise IOError(f"Не удалось декодировать кадры: {video_path}")
+        os.truncate(tmp_path, decoded * frame_bytes)
+        os.replace(tmp_path, frames_path)
+
+        # Запись полная, если декодировано всё видео, а не только
+        # запрошенные первые кадры
+        complete = max_frames is None or decoded < max_frames \
+            or info.frame_count <= max_frames
+        return {
+            "source": key,
+            "complete": complete,
+            "shape": [decoded, *frame_shape],
+            "fps": info.fps,
+            "nbytes": decoded * frame_bytes,
+            "last_access": time.time(),
+        }
+
+
+# Хранилище по умолчанию (создаётся при первом обращении)
+_default_store = None
+
+
+def get_frame_store():
+    global _default_store
+    if _default_store is None:
+        _default_store = FrameStore()
+    return _default_store
+
+
+def open_capture(video_path, max_frames=None, fallback=True):
+    """
+    VideoCapture-совместимый объект с кадрами из хранилища
+
+    Первый вызов декодирует видео в хранилище, следующие (в том числе
+    из других процессов) только отображают файл в память. Если видео
+    не помещается в хранилище или не декодируется, при fallback=True
+    возвращается обычный cv2.VideoCapture.
+    """
+    try:
+        return get_frame_store().open(video_path, max_frames).capture()
+    except (IOError, ValueError) as e:
+        if not fallback:
+            raise
+        print(f"⚠️  Хранилище кадров недоступно ({e}), декодируем напрямую")
+        return cv2.VideoCapture(video_path)
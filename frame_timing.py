@@ -0,0 +1,256 @@
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Сколько последних интервалов между кадрами хранится для перцентилей
+INTERVAL_WINDOW = 4096
+
+
+def measure_capture_fps(cap, frames=30, clock=time.monotonic):
+    """
+    Измерение реальной частоты кадров источника по frames кадрам
+
+    Возвращает 0.0, если кадры прочитать не удалось.
+    """
+    timestamps = []
+    for _ in range(frames + 1):
+        ret, _ = cap.read()
+        if not ret:
+            break
+        timestamps.append(clock())
+
+    if len(timestamps) < 2 or timestamps[-1] <= timestamps[0]:
+        return 0.0
+    return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+
+class ConstantRateConformer:
+    """
+    Приведение неравномерного захвата к постоянной частоте кадров
+
+    Выходной кадр k соответствует моменту origin + k / fps. Для каждого
+    захваченного кадра frames_for() говорит, сколько раз его записать:
+    0 - кадр лишний (отбрасывается), 1 - обычный случай,
+    больше 1 - кадры пропущены камерой и текущий дублируется.
+    Тогда длительность файла совпадает с реальным временем записи.
+    """
+
+    def __init__(self, fps):
+        if fps <= 0:
+            raise ValueError("fps должен быть > 0")
+
+        self.fps = fps
+        self.emitted = 0
+        self.duplicated = 0
+        self.dropped = 0
+        self._origin = None
+
+    def pause(self):
+        """
+        Пауза записи: следующий кадр начнёт отсчёт заново, без дублей
+        за время паузы
+        """
+        self._origin = None
+
+    def frames_for(self, timestamp):
+        if self._origin is None:
+            # Продолжаем нумерацию выходных кадров с текущего момента
+            self._origin = timestamp - self.emitted / self.fps
+
+        due = math.floor((timestamp - self._origin) * self.fps + 1e-9) + 1
+        repeats = max(0, due - self.emitted)
+
+        if repeats == 0:
+            self.dropped += 1
+        elif repeats > 1:
+            self.duplicated += repeats - 1
+
+        self.emitted += repeats
+        return repeats
+
+
+class TimestampTrack:
+    """
+    Дорожка временных меток захваченных кадров
+
+    Метки пишутся в CSV-файл рядом с видео:
+    capture_index, capture_ms, output_index, repeats
+    (output_index - номер первого выходного кадра, repeats - сколько
+    раз кадр записан в файл). Строка дописывается в файл (с flush), как
+    только судьба кадра известна, поэтому при аварийном завершении
+    дорожка сохраняется до последних записанных кадров.
+
+    При confirm_writes=True записанными считаются только
+    подтверждённые кодировщиком кадры: метку из add() нужно передать в
+    write() кодировщика, а written() и dropped() сделать его обратными
+    вызовами on_written и on_dropped. Строка кадра пишется, когда
+    каждая из repeats его копий записана или отброшена; кадры,
+    отброшенные очередью уже после постановки, получают меньший
+    repeats (0 - кадр не попал в файл) и не сдвигают output_index
+    следующих. В памяти остаются только строки кадров, ещё не
+    покинувших очередь.
+
+    Для статистики хранятся итоговые суммы и последние INTERVAL_WINDOW
+    интервалов между кадрами (для перцентилей).
+    """
+
+    def __init__(self, path=None, confirm_writes=False):
+        self.path = path
+        self.confirm_writes = confirm_writes
+        self.count = 0
+        self.first = None
+        self.last = None
+        self._intervals = deque(maxlen=INTERVAL_WINDOW)
+        self._interval_count = 0
+        self._interval_sum = 0.0
+
+        # Незаписанные строки: [capture, поставлено, записано, завершено];
+        # первая из них - кадр с номером _pending_base
+        self._pending = deque()
+        self._pending_base = 0
+        self._output_index = 0
+        self._output_frames = 0
+        self._lock = threading.Lock()
+        self._file = None
+
+        if path is not None:
+            self._file = open(path, "w", encoding="utf-8")
+            self._file.write("capture_index,capture_ms,output_index,repeats\n")
+            self._file.flush()
+
+    @property
+    def output_frames(self):
+        """
+        Сколько кадров записано в файл
+        """
+        with self._lock:
+            return self._output_frames
+
+    def add(self, timestamp, repeats=1):
+        """
+        Захваченный кадр; возвращает его метку для write()
+
+        repeats - сколько раз кадр поставлен в очередь записи (при
+        confirm_writes=True записанные копии считает written()).
+        """
+        if self.first is None:
+            self.first = timestamp
+        elif self.last is not None:
+            interval = timestamp - self.last
+            self._intervals.append(interval)
+            self._interval_count += 1
+            self._interval_sum += interval
+
+        with self._lock:
+            done = 0 if self.confirm_writes else repeats
+            self._pending.append([timestamp - self.first, repeats, done, done])
+            self._output_frames += done
+            self._write_ready()
+
+        self.last = timestamp
+        self.count += 1
+        return self.count - 1
+
+    def _row(self, tag):
+        index = tag - self._pending_base
+        if 0 <= index < len(self._pending):
+            return self._pending[index]
+        return None
+
+    def written(self, tag):
+        """
+        Обратный вызов кодировщика: копия кадра с меткой tag записана
+        """
+        if tag is None:
+            return
+        with self._lock:
+            row = self._row(tag)
+            if row is None:
+                return
+            row[2] += 1
+            row[3] += 1
+            self._output_frames += 1
+            self._write_ready()
+
+    def dropped(self, tag):
+        """
+        Обратный вызов кодировщика: копия кадра с меткой tag отброшена
+        """
+        if tag is None:
+            return
+        with self._lock:
+            row = self._row(tag)
+            if row is None:
+                return
+            row[3] += 1
+            self._write_ready()
+
+    def settled(self, tag):
+        """
+        Записана ли строка кадра tag: все его копии (и всех кадров до
+        него) записаны кодировщиком или отброшены
+        """
+        with self._lock:
+            return tag < self._pending_base
+
+    def _write_ready(self, everything=False):
+        """
+        Запись в файл строк по порядку, пока у первой из них все копии
+        записаны или отброшены (everything=True - всех строк)
+        """
+        lines = []
+        while self._pending and (everything
+                                 or self._pending[0][3] >= self._pending[0][1]):
+            capture, _, written, _ = self._pending.popleft()
+            lines.append(f"{self._pending_base},{capture * 1000:.3f},"
+                         f"{self._output_index},{written}\n")
+            self._pending_base += 1
+            self._output_index += written
+
+        if lines and self._file is not None:
+            self._file.write("".join(lines))
+            self._file.flush()
+
+    def break_interval(self):
+        """
+        Разрыв (пауза записи): следующий интервал не учитывается
+        """
+        self.last = None
+
+    def close(self):
+        """
+        Запись оставшихся строк (вызывать после закрытия кодировщика)
+        """
+        with self._lock:
+            self._write_ready(everything=True)
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def stats(self, percentiles=(50, 90, 99)):
+        """
+        Эффективная частота захвата и перцентили интервалов и джиттера
+
+        Частота считается по всем интервалам, перцентили - по последним
+        INTERVAL_WINDOW. Джиттер - отклонение интервала от среднего
+        интервала, в мс.
+        """
+        result = {"frames": self.count, "effective_fps": 0.0,
+                  "interval_ms": {}, "jitter_ms": {}}
+
+        if not self._interval_count:
+            return result
+
+        mean = self._interval_sum / self._interval_count * 1000
+        intervals = np.array(self._intervals) * 1000
+        jitter = np.abs(intervals - mean)
+
+        result["effective_fps"] = float(1000.0 / mean) if mean > 0 else 0.0
+        for p in percentiles:
+            result["interval_ms"][p] = float(np.percentile(intervals, p))
+            result["jitter_ms"][p] = float(np.percentile(jitter, p))
+
+        return result
@@ -0,0 +1,166 @@
+import time
+import numpy as np
+
+# Максимальное значение тона в OpenCV (0-179 для 8-битных изображений)
+HUE_MAX = 179
+
+
+def _hue_row(width, hue_max=HUE_MAX):
+    # Та же целочисленная формула, что и в цикле: int(x * 179 / width)
+    return (np.arange(width, dtype=np.int64) * hue_max // width).astype(np.uint8)
+
+
+def _descending_column(height):
+    # 255 - int(y * 255 / height): сверху 255, вниз убывает
+    return (255 - np.arange(height, dtype=np.int64) * 255 // height).astype(np.uint8)
+
+
+def hsv_spectrum(width=360, height=256, fixed="s", level=255):
+    """
+    Спектр HSV: по оси X тон, по оси Y - убывающий второй канал
+
+    fixed - какой канал постоянен: "s" (по Y меняется яркость V) или
+    "v" (по Y меняется насыщенность S); level - его значение.
+    Возвращает HSV-изображение (height, width, 3), собранное
+    broadcasting'ом строки тона и столбца второго канала.
+    """
+    if fixed not in ("s", "v"):
+        raise ValueError("fixed должен быть 's' или 'v'")
+
+    spectrum = np.empty((height, width, 3), dtype=np.uint8)
+    spectrum[:, :, 0] = _hue_row(width)[None, :]
+
+    column = _descending_column(height)[:, None]
+    if fixed == "s":
+        spectrum[:, :, 1] = level
+        spectrum[:, :, 2] = column
+    else:
+        spectrum[:, :, 1] = column
+        spectrum[:, :, 2] = level
+
+    return spectrum
+
+
+def hsv_spectrum_loop(width=360, height=256):
+    """
+    Исходный вариант спектра вложенным циклом (для сравнения)
+    """
+    hsv_spectrum = np.zeros((height, width, 3), dtype=np.uint8)
+
+    for x in range(width):
+        for y in range(height):
+            h = int(x * 179 / width)
+            s = 255
+            v = 255 - int(y * 255 / height)
+
+            hsv_spectrum[y, x] = [h, s, v]
+
+    return hsv_spectrum
+
+
+def hsv_disc(size=512, value=255):
+    """
+    Круг тон/насыщенность: угол - тон, расстояние от центра -
+    насыщенность, яркость постоянна
+
+    Пиксели вне круга чёрные (V = 0).
+    """
+    center = (size - 1) / 2.0
+    coords = np.arange(size, dtype=np.float32) - center
+    dx = coords[None, :]
+    dy = coords[:, None]
+
+    radius = np.sqrt(dx * dx + dy * dy) / center
+    angle = np.arctan2(-dy, dx)  # против часовой стрелки, 0 - вправо
+
+    disc = np.empty((size, size, 3), dtype=np.uint8)
+    hue = (angle % (2 * np.pi)) * ((HUE_MAX + 1) / (2 * np.pi))
+    disc[:, :, 0] = np.minimum(hue, HUE_MAX).astype(np.uint8)
+    disc[:, :, 1] = np.minimum(radius * 255, 255).astype(np.uint8)
+    disc[:, :, 2] = np.where(radius <= 1.0, value, 0).astype(np.uint8)
+
+    return disc
+
+
+def hsv_cube_atlas(tile_width=180, tile_height=128, levels=8, columns=4,
+                   gap=4):
+    """
+    Атлас куба HSV: плитки-срезы с постоянной яркостью
+
+    В каждой плитке по X тон, по Y убывающая насыщенность; яркость
+    плиток растёт от 255 / levels до 255 слева направо, сверху вниз.
+    Между плитками gap пикселей чёрного фона.
+    """
+    rows = (levels + columns - 1) // columns
+    atlas = np.zeros((rows * tile_height + (rows - 1) * gap,
+                      columns * tile_width + (columns - 1) * gap, 3),
+                     dtype=np.uint8)
+
+    # Общий срез тон x насыщенность, в плитках меняется только V
+    tile = hsv_spectrum(tile_width, tile_height, fixed="v", level=0)
+
+    for i in range(levels):
+        row, col = divmod(i, columns)
+        y = row * (tile_height + gap)
+        x = col * (tile_width + gap)
+        tile[:, :, 2] = round(255 * (i + 1) / levels)
+        atlas[y:y + tile_height, x:x + tile_width] = tile
+
+    return atlas
+
+
+def benchmark_spectrum(sizes=((360, 256), (1920, 1080), (3840, 2160)),
+                       loop_max_pixels=360 * 256, repeats=3):
+    """
+    Сравнение векторизованного спектра с исходным циклом
+
+    Цикл запускается только для размеров до loop_max_pixels пикселей,
+    для больших время цикла оценивается по времени на пиксель.
+    Возвращает список словарей: size, vector_ms, loop_ms,
+    loop_estimated, speedup, equal.
+    """
+    loop_per_pixel = None
+    results = []
+
+    for width, height in sizes:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            spectrum = hsv_spectrum(width, height)
+        vector_ms = (time.perf_counter() - start) / repeats * 1000
+
+        result = {"size": (width, height), "vector_ms": vector_ms,
+                  "loop_ms": None, "loop_estimated": False, "equal": None}
+
+        if width * height <= loop_max_pixels:
+            start = time.perf_counter()
+            reference = hsv_spectrum_loop(width, height)
+            result["loop_ms"] = (time.perf_counter() - start) * 1000
+            result["equal"] = bool(np.array_equal(spectrum, reference))
+            loop_per_pixel = result["loop_ms"] / (width * height)
+        elif loop_per_pixel is not None:
+            result["loop_ms"] = loop_per_pixel * width * height
+            result["loop_estimated"] = True
+
+        if result["loop_ms"] is not None and vector_ms > 0:
+            result["speedup"] = result["loop_ms"] / vector_ms
+        results.append(result)
+
+    return results
+
+
+def print_benchmark(results):
+    print("\nСпектр HSV: векторизация против цикла")
+    for result in results:
+        width, height = result["size"]
+        line = f"   {width}x{height}: numpy {result['vector_ms']:.2f} мс"
+        if result["loop_ms"] is not None:
+            mark = " (оценка)" if result["loop_estimated"] else ""
+            line += (f", цикл {result['loop_ms']:.0f} мс{mark}, "
+                     f"ускорение x{result['speedup']:.0f}")
+        if result["equal"] is not None:
+            line += ", совпадает" if result["equal"] else ", НЕ совпадает"
+        print(line)
+
+
+if __name__ == "__main__":
+    print_benchmark(benchmark_spectrum())
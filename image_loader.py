@@ -0,0 +1,195 @@
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+
+# Варианты декодирования и соответствующие флаги cv2.imread
+VARIANT_FLAGS = {
+    "unchanged": cv2.IMREAD_UNCHANGED,
+    "color": cv2.IMREAD_COLOR,
+    "grayscale": cv2.IMREAD_GRAYSCALE,
+}
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff",
+                    ".webp")
+
+# Результат загрузки одного файла. images - {вариант: массив};
+# при ошибке images пустой, а error содержит описание
+LoadResult = namedtuple("LoadResult", ["path", "images", "error",
+                                       "file_size", "elapsed"])
+
+# Сколько первых байт JPEG просматривается в поиске блока EXIF
+_EXIF_SCAN_BYTES = 64 * 1024
+
+# Флаг наличия EXIF в заголовке VP8X файла WebP
+_WEBP_EXIF_FLAG = 0x08
+
+# Сколько файлов на поток load_images держит в работе одновременно
+IN_FLIGHT_PER_WORKER = 2
+
+
+def expand_paths(source, extensions=IMAGE_EXTENSIONS):
+    """
+    Список файлов: папка, glob-шаблон, путь к файлу или список путей
+    """
+    if isinstance(source, (list, tuple)):
+        return list(source)
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, name)
+                      for name in os.listdir(source)
+                      if name.lower().endswith(extensions))
+    if glob.has_magic(source):
+        return sorted(glob.glob(source))
+    return [source]
+
+
+def _color_from_unchanged(img):
+    # IMREAD_COLOR для 8-битных данных - это те же пиксели, приведённые
+    # к трём каналам
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
+
+def _png_has_exif(data):
+    # Проход по блокам PNG: длина (4 байта), тип (4), данные, CRC (4)
+    offset = 8
+    while offset + 8 <= len(data):
+        length = int.from_bytes(data[offset:offset + 4].tobytes(), "big")
+        chunk = data[offset + 4:offset + 8].tobytes()
+        if chunk == b"eXIf":
+            return True
+        if chunk == b"IEND":
+            return False
+        offset += 12 + length
+    return False
+
+
+def may_have_exif(data):
+    """
+    Может ли в файле быть EXIF (а значит, и поворот для IMREAD_COLOR)
+
+    Место EXIF зависит от формата: блок APP1 в JPEG, блок eXIf в PNG,
+    флаг в заголовке VP8X в WebP. В BMP EXIF нет. Для остальных
+    форматов (TIFF и др.) ответ - True: лучше лишнее декодирование,
+    чем неповёрнутое изображение.
+    """
+    head = data[:16].tobytes()
+
+    if head.startswith(b"\xff\xd8"):
+        return data[:_EXIF_SCAN_BYTES].tobytes().find(b"Exif\0\0") >= 0
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return _png_has_exif(data)
+    if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+        # EXIF бывает только в расширенном формате (VP8X)
+        return (head[12:16] == b"VP8X" and len(data) > 20
+                and bool(data[20] & _WEBP_EXIF_FLAG))
+    if head.startswith(b"BM"):
+        return False
+    return True
+
+
+def decode_variants(data, variants=("color",), exact_grayscale=True):
+    """
+    Декодирование байт файла в несколько вариантов
+
+    Файл декодируется один раз с IMREAD_UNCHANGED, цветной вариант
+    получается из него без потерь, если изображение 8-битное и в нём
+    нет EXIF (IMREAD_COLOR применяет поворот из EXIF, а UNCHANGED -
+    нет, см. may_have_exif). Иначе вариант декодируется отдельно из
+    тех же байт.
+    Оттенки серого кодеки вычисляют по-своему (отличие от cvtColor до
+    нескольких уровней), поэтому при exact_grayscale=True серый
+    вариант декодируется отдельно, при False - выводится cvtColor.
+    """
+    images = {}
+    base = cv2.imdecode(data, cv2.IMREAD_UNCHANGED)
+    if base is None:
+        return images
+
+    derivable = base.dtype == np.uint8 and not may_have_exif(data)
+
+    if "unchanged" in variants:
+        images["unchanged"] = base
+
+    color = None
+    if "color" in variants or ("grayscale" in variants
+                               and not exact_grayscale):
+        color = (_color_from_unchanged(base) if derivable
+                 else cv2.imdecode(data, cv2.IMREAD_COLOR))
+        if "color" in variants:
+            images["color"] = color
+
+    if "grayscale" in variants:
+        if exact_grayscale or color is None:
+            images["grayscale"] = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+        else:
+            images["grayscale"] = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+
+    return images
+
+
+def _load(path, variants, exact_grayscale):
+    start = time.perf_counter()
+    try:
+        data = np.fromfile(path, dtype=np.uint8)
+    except OSError as e:
+        return LoadResult(path, {}, f"не удалось прочитать файл: {e}", 0,
+                          time.perf_counter() - start)
+
+    try:
+        images = decode_variants(data, variants, exact_grayscale)
+        error = None if images else "не удалось декодировать изображение"
+    except cv2.error as e:
+        images, error = {}, f"ошибка декодирования: {e}"
+
+    return LoadResult(path, images, error, len(data),
+                      time.perf_counter() - start)
+
+
+def load_images(source, variants=("color",), workers=None,
+                exact_grayscale=True):
+    """
+    Параллельная загрузка изображений в пуле потоков
+
+    source - папка, glob-шаблон или список путей. Генератор выдаёт
+    LoadResult по мере готовности (порядок - порядок завершения);
+    ошибки отдельных файлов не прерывают загрузку, а возвращаются
+    в поле error. imdecode отпускает GIL, поэтому потоки декодируют
+    действительно параллельно. В работе одновременно не больше
+    IN_FLIGHT_PER_WORKER * workers файлов: следующие ставятся в пул
+    по мере выдачи результатов, поэтому память не растёт, даже если
+    потребитель обрабатывает изображения медленнее, чем они
+    декодируются.
+    """
+    for variant in variants:
+        if variant not in VARIANT_FLAGS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+
+    paths = iter(expand_paths(source))
+    if workers is None:
+        workers = os.cpu_count() or 1
+    limit = IN_FLIGHT_PER_WORKER * workers
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        while True:
+            for path in paths:
+                pending.add(pool.submit(_load, path, variants,
+                                        exact_grayscale))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            # Выданный результат больше не хранится в генераторе
+            while done:
+                yield done.pop().result()
@@ -0,0 +1,336 @@
+import hashlib
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import cv2
+
+from image_loader import expand_paths
+from video_probe import file_key
+
+# Папка с кешем миниатюр
+DEFAULT_THUMBNAIL_DIR = "output/thumbnails"
+
+# Предел суммарного размера миниатюр на диске (байт)
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Флаги уменьшенного декодирования: коэффициент -> флаг
+REDUCED_COLOR_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+REDUCED_GRAYSCALE_FLAGS = {
+    1: cv2.IMREAD_GRAYSCALE,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+# Маркеры JPEG SOF с размерами кадра (кроме DHT, JPG и DAC)
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+             0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+# Тег EXIF Orientation; значения 5-8 - поворот на 90 или 270 градусов
+_EXIF_ORIENTATION = 0x0112
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def read_image_size(path):
+    """
+    Размер изображения (ширина, высота) из заголовка файла
+
+    Поддерживаются PNG, JPEG и BMP; для других форматов или
+    повреждённого заголовка - None. Пиксели не декодируются.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(26)
+            if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+                return struct.unpack(">II", head[16:24])
+
+            if head[:2] == b"BM":
+                width, height = struct.unpack("<ii", head[18:26])
+                return width, abs(height)
+
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    if marker[1] == 0xFF:
+                        # Заполняющий байт перед маркером
+                        f.seek(-1, os.SEEK_CUR)
+                        continue
+                    length = struct.unpack(">H", f.read(2))[0]
+                    if marker[1] in _JPEG_SOF:
+                        height, width = struct.unpack(">xHH", f.read(5))
+                        return width, height
+                    f.seek(length - 2, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+def _tiff_orientation(tiff):
+    # Поиск тега Orientation в IFD0 блока TIFF из EXIF
+    if tiff[:4] == b"II*\x00":
+        order = "<"
+    elif tiff[:4] == b"MM\x00*":
+        order = ">"
+    else:
+        return None
+    offset = struct.unpack(order + "I", tiff[4:8])[0]
+    count = struct.unpack(order + "H", tiff[offset:offset + 2])[0]
+    for i in range(count):
+        entry = tiff[offset + 2 + 12 * i:offset + 14 + 12 * i]
+        tag, _, _, value = struct.unpack(order + "HHIH", entry[:10])
+        if tag == _EXIF_ORIENTATION:
+            return value
+    return None
+
+
+def read_exif_orientation(path):
+    """
+    Значение EXIF Orientation (1-8) из JPEG (APP1) или PNG (eXIf)
+
+    None, если тега нет или заголовок не разобран.
+    """
+    try:
+        with open(path, "rb") as f:
+            head = f.read(8)
+            if head[:2] == b"\xff\xd8":
+                f.seek(2)
+                while True:
+                    marker = f.read(2)
+                    if len(marker) < 2 or marker[0] != 0xFF:
+                        return None
+                    if marker[1] == 0xFF:
+                        f.seek(-1, os.SEEK_CUR)
+                        continue
+                    if marker[1] == 0xDA or marker[1] in _JPEG_SOF:
+                        # EXIF всегда раньше кадра и данных скана
+                        return None
+                    length = struct.unpack(">H", f.read(2))[0]
+                    data = f.read(length - 2)
+                    if marker[1] == 0xE1 and data[:6] == b"Exif\x00\x00":
+                        return _tiff_orientation(data[6:])
+
+            if head == b"\x89PNG\r\n\x1a\n":
+                while True:
+                    chunk = f.read(8)
+                    if len(chunk) < 8 or chunk[4:] in (b"IDAT", b"IEND"):
+                        return None
+                    length = struct.unpack(">I", chunk[:4])[0]
+                    if chunk[4:] == b"eXIf":
+                        return _tiff_orientation(f.read(length))
+                    f.seek(length + 4, os.SEEK_CUR)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+def read_oriented_size(path):
+    """
+    Размер изображения после поворота из EXIF, как его вернёт imread
+    """
+    size = read_image_size(path)
+    if (size is not None
+            and read_exif_orientation(path) in _TRANSPOSED_ORIENTATIONS):
+        return size[1], size[0]
+    return size
+
+
+def choose_reduction(image_size, target_size):
+    """
+    Наибольший коэффициент 1/2/4/8, при котором изображение после
+    уменьшенного декодирования ещё не меньше target_size по обеим осям
+    """
+    if image_size is None:
+        return 1
+    width, height = image_size
+    target_width, target_height = target_size
+    for factor in (8, 4, 2):
+        if (-(-width // factor) >= target_width
+                and -(-height // factor) >= target_height):
+            return factor
+    return 1
+
+
+def fit_size(image_size, max_size):
+    """
+    Размер, вписанный в max_size с сохранением пропорций
+    """
+    width, height = image_size
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def load_preview(path, max_size=(256, 256), grayscale=False):
+    """
+    Уменьшенная копия изображения, вписанная в max_size
+
+    Коэффициент IMREAD_REDUCED_* выбирается по размеру из заголовка
+    (с учётом поворота из EXIF, который imread применяет) так, чтобы
+    декодированное изображение было не меньше нужного превью; остаток
+    уменьшения - cv2.resize с INTER_AREA. Для JPEG уменьшение
+    выполняется в области DCT, и большая часть декодирования не
+    выполняется. Возвращает None при ошибке.
+    """
+    size = read_oriented_size(path)
+    flags = REDUCED_GRAYSCALE_FLAGS if grayscale else REDUCED_COLOR_FLAGS
+
+    if size is not None:
+        target = fit_size(size, max_size)
+        img = cv2.imread(path, flags[choose_reduction(size, target)])
+    else:
+        img = cv2.imread(path, flags[1])
+
+    if img is None:
+        return None
+
+    target = fit_size((img.shape[1], img.shape[0]), max_size)
+    if target != (img.shape[1], img.shape[0]):
+        img = cv2.resize(img, target, interpolation=cv2.INTER_AREA)
+    return img
+
+
+class ThumbnailCache:
+    """
+    Кеш миниатюр на диске
+
+    Имя файла миниатюры - хеш от пути, размера и времени изменения
+    исходного файла и параметров превью, поэтому изменённый файл
+    получает новую миниатюру, а старая перестаёт использоваться.
+    Суммарный размер миниатюр ограничен max_bytes (None - без
+    предела): при переполнении удаляются давно не читанные (LRU по
+    времени изменения, которое обновляется при попадании). clear()
+    удаляет все.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_THUMBNAIL_DIR, max_size=(256, 256),
+                 grayscale=False, quality=90, max_bytes=DEFAULT_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_size = tuple(max_size)
+        self.grayscale = grayscale
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+
+        # Имя миниатюры -> размер, от давно использованных к недавним
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        found = []
+        for entry in os.scandir(cache_dir):
+            if entry.name.endswith(".jpg") and ".tmp." not in entry.name:
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+
+    def _touch(self, name, size):
+        # Вызывается под self._lock: миниатюра становится самой свежей
+        self._total_bytes += size - self._entries.pop(name, 0)
+        self._entries[name] = size
+
+    def _evict(self):
+        # Вызывается под self._lock; самая свежая миниатюра остаётся,
+        # даже если одна она больше предела
+        if self.max_bytes is None:
+            return
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evicted += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+
+    def _thumbnail_path(self, path):
+        key = repr((file_key(path), self.max_size, self.grayscale))
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, digest + ".jpg")
+
+    def get(self, path):
+        """
+        Миниатюра из кеша или построенная через load_preview
+        """
+        thumbnail_path = self._thumbnail_path(path)
+
+        thumbnail = None
+        if os.path.exists(thumbnail_path):
+            flag = cv2.IMREAD_GRAYSCALE if self.grayscale else cv2.IMREAD_COLOR
+            thumbnail = cv2.imread(thumbnail_path, flag)
+        name = os.path.basename(thumbnail_path)
+        with self._lock:
+            if thumbnail is not None:
+                self.hits += 1
+                try:
+                    os.utime(thumbnail_path)
+                    size = self._entries.get(name)
+                    if size is None:
+                        # Записана другим экземпляром кеша
+                        size = os.path.getsize(thumbnail_path)
+                    self._touch(name, size)
+                except FileNotFoundError:
+                    pass
+                return thumbnail
+            self.misses += 1
+
+        thumbnail = load_preview(path, self.max_size, self.grayscale)
+        if thumbnail is None:
+            return None
+
+        # Запись через временный файл: параллельный читатель не увидит
+        # недописанную миниатюру
+        tmp_path = (f"{thumbnail_path[:-4]}.{os.getpid()}."
+                    f"{threading.get_ident()}.tmp.jpg")
+        if cv2.imwrite(tmp_path, thumbnail, self.params):
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, thumbnail_path)
+            with self._lock:
+                self._touch(name, size)
+                self._evict()
+        return thumbnail
+
+    def get_many(self, source, workers=None):
+        """
+        Генератор (путь, миниатюра или None) по мере готовности
+
+        source - папка, glob-шаблон или список путей.
+        """
+        paths = expand_paths(source)
+        if workers is None:
+            workers = min(len(paths), os.cpu_count() or 1) or 1
+
+        def load(path):
+            try:
+                return path, self.get(path)
+            except OSError:
+                return path, None
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(load, path) for path in paths]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".jpg"):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,141 @@
+import cv2
+import numpy as np
+
+
+class OverlaySprite:
+    """
+    Статичный элемент интерфейса, отрисованный один раз
+
+    Элемент рисуется на прозрачном холсте размера кадра и обрезается до
+    своей ограничивающей рамки в BGRA-спрайт. Из спрайта заранее
+    получаются индексы закрашенных пикселей в кадре, поэтому apply()
+    трогает только их - на месте и без выделения памяти: непрозрачные
+    пиксели записываются готовыми значениями, сглаженные края
+    смешиваются по альфа-каналу во внутренних буферах.
+    """
+
+    def __init__(self, sprite, x, y, frame_size):
+        self.sprite = sprite
+        self.x = x
+        self.y = y
+        self.height, self.width = sprite.shape[:2]
+        self.frame_size = frame_size
+
+        bgr = sprite[:, :, :3]
+        alpha = sprite[:, :, 3]
+        frame_width = frame_size[0]
+
+        def frame_indices(mask):
+            # Индексы байтов в плоском кадре: по три канала на пиксель
+            ys, xs = np.nonzero(mask)
+            pixels = (ys + y) * frame_width + (xs + x)
+            return (pixels[:, None] * 3 + np.arange(3)).ravel(), ys, xs
+
+        # Непрозрачные пиксели: просто запись цвета
+        self._opaque, ys, xs = frame_indices(alpha == 255)
+        self._opaque_bgr = bgr[ys, xs].ravel()
+
+        # Сглаженные края: roi = (roi * (255 - a) + color * 255) / 255,
+        # цвет на холсте уже умножен на альфу
+        self._edge, ys, xs = frame_indices((alpha > 0) & (alpha < 255))
+        self._edge_inv_alpha = np.repeat(255 - alpha[ys, xs], 3).astype(np.uint32)
+        self._edge_premultiplied = bgr[ys, xs].ravel().astype(np.uint32) * 255 + 127
+        self._edge_bytes = np.empty(len(self._edge), dtype=np.uint8)
+        self._edge_scratch = np.empty(len(self._edge), dtype=np.uint32)
+
+    @classmethod
+    def from_drawing(cls, frame_size, draw):
+        """
+        Создание спрайта функцией draw(canvas), рисующей на холсте
+
+        frame_size - (ширина, высота) кадра. draw вызывается дважды: на
+        чёрном BGR-холсте (цвет) и на одноканальном (покрытие, из
+        которого получается альфа-канал).
+        """
+        width, height = frame_size
+        canvas = np.zeros((height, width, 3), dtype=np.uint8)
+        coverage = np.zeros((height, width), dtype=np.uint8)
+
+        draw(canvas)
+        draw(coverage)
+
+        ys, xs = np.nonzero(coverage)
+        if len(xs) == 0:
+            raise ValueError("Функция рисования ничего не нарисовала")
+
+        x0, x1 = xs.min(), xs.max() + 1
+        y0, y1 = ys.min(), ys.max() + 1
+
+        sprite = np.empty((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        sprite[:, :, :3] = canvas[y0:y1, x0:x1]
+        sprite[:, :, 3] = coverage[y0:y1, x0:x1]
+
+        return cls(sprite, int(x0), int(y0), frame_size)
+
+    def apply(self, frame):
+        """
+        Наложение спрайта на кадр на месте
+
+        Кадр должен быть непрерывным массивом (H, W, 3) размера
+        frame_size - как кадры из cap.read().
+        """
+        width, height = self.frame_size
+        if frame.shape != (height, width, 3) or not frame.flags.c_contiguous:
+            raise ValueError(f"Ожидается непрерывный кадр {width}x{height}x3, "
+                             f"получен {frame.shape}")
+
+        data = frame.reshape(-1)
+        data[self._opaque] = self._opaque_bgr
+
+        if len(self._edge):
+            scratch = self._edge_scratch
+            np.take(data, self._edge, out=self._edge_bytes)
+            np.multiply(self._edge_bytes, self._edge_inv_alpha, out=scratch)
+            np.add(scratch, self._edge_premultiplied, out=scratch)
+            np.floor_divide(scratch, 255, out=scratch)
+            data[self._edge] = scratch
+
+        return frame
+
+
+class Overlay:
+    """
+    Набор спрайтов, накладываемых вместе
+    """
+
+    def __init__(self, frame_size):
+        self.frame_size = frame_size
+        self.sprites = []
+
+    def add(self, draw):
+        """
+        Добавление элемента; draw(canvas) рисует его на холсте
+        """
+        sprite = OverlaySprite.from_drawing(self.frame_size, draw)
+        self.sprites.append(sprite)
+        return sprite
+
+    def add_text(self, text, org, font_scale, color, thickness,
+                 font=cv2.FONT_HERSHEY_SIMPLEX):
+        # На одноканальном холсте рисуется покрытие (255)
+        def draw(canvas):
+            paint = color if canvas.ndim == 3 else 255
+            cv2.putText(canvas, text, org, font, font_scale, paint, thickness)
+        return self.add(draw)
+
+    def add_rectangle(self, pt1, pt2, color, thickness):
+        def draw(canvas):
+            paint = color if canvas.ndim == 3 else 255
+            cv2.rectangle(canvas, pt1, pt2, paint, thickness)
+        return self.add(draw)
+
+    def add_circle(self, center, radius, color, thickness):
+        def draw(canvas):
+            paint = color if canvas.ndim == 3 else 255
+            cv2.circle(canvas, center, radius, paint, thickness)
+        return self.add(draw)
+
+    def apply(self, frame):
+        for sprite in self.sprites:
+            sprite.apply(frame)
+        return frame
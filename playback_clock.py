@@ -0,0 +1,141 @@
+import math
+import time
+from collections import deque
+
+
+class PlaybackClock:
+    """
+    Часы воспроизведения: каждый кадр привязан к своему времени показа
+
+    Время показа кадра i равно start + i / fps (или явно переданному pts
+    в секундах). Ожидание считается от этого времени, а не фиксированной
+    задержкой, поэтому время декодирования и отрисовки не накапливается.
+    Кадры, опоздавшие больше чем на late_tolerance секунд, не показываются.
+
+    Типичный цикл:
+
+        clock = PlaybackClock(fps)
+        for frame in frames:
+            if not clock.should_display():
+                continue
+            cv2.imshow(window_name, frame)
+            key = cv2.waitKey(clock.wait_ms())
+
+    Без окна вместо wait_ms() вызывается wait(). Источник времени и
+    функцию сна можно подменить (например, для тестов).
+    """
+
+    def __init__(self, fps, late_tolerance=None, clock=time.perf_counter,
+                 sleep=time.sleep, history=10000):
+        if fps <= 0:
+            raise ValueError("fps должен быть > 0")
+
+        self.fps = fps
+        self.interval = 1.0 / fps
+        # По умолчанию допускается опоздание на один кадр
+        self.late_tolerance = (self.interval if late_tolerance is None
+                               else late_tolerance)
+        self._clock = clock
+        self._sleep = sleep
+
+        # Счётчики за всё время; опоздания - по последним history кадрам
+        self.displayed = 0
+        self.dropped = 0
+        self.drift = 0.0
+        self._lateness = deque(maxlen=history)
+
+        self.reset()
+
+    def reset(self):
+        """
+        Новый отсчёт времени (например, при перезапуске видео)
+
+        Накопленная статистика сохраняется.
+        """
+        self._start = None
+        self._frame = 0
+        self._pts = None
+
+    def _deadline(self, pts=None):
+        if pts is None:
+            pts = self._frame * self.interval
+        return self._start + pts
+
+    def should_display(self, pts=None):
+        """
+        Нужно ли показывать текущий кадр
+
+        Возвращает False для опоздавшего кадра (он считается пропущенным
+        и сразу засчитывается, переходить к следующему кадру не нужно).
+        """
+        now = self._clock()
+        if self._start is None:
+            self._start = now
+
+        lateness = now - self._deadline(pts)
+        self.drift = lateness
+        self._pts = pts
+
+        if lateness > self.late_tolerance:
+            self.dropped += 1
+            self._frame += 1
+            return False
+
+        self.displayed += 1
+        self._lateness.append(lateness)
+        return True
+
+    def remaining(self, next_pts=None):
+        """
+        Сколько секунд осталось до показа следующего кадра
+
+        Вызывается после показа кадра, переводит часы на следующий кадр.
+        """
+        self._frame += 1
+        if next_pts is None and self._pts is not None:
+            next_pts = self._pts + self.interval
+        return self._deadline(next_pts) - self._clock()
+
+    def wait_ms(self, next_pts=None):
+        """
+        Задержка для cv2.waitKey() в миллисекундах (не меньше 1)
+        """
+        return max(1, int(math.ceil(self.remaining(next_pts) * 1000)))
+
+    def wait(self, next_pts=None):
+        """
+        Ожидание следующего кадра без окна (через sleep)
+        """
+        remaining = self.remaining(next_pts)
+        if remaining > 0:
+            self._sleep(remaining)
+
+    def stats(self):
+        """
+        Статистика: показано, пропущено, дрейф и джиттер в миллисекундах
+        """
+        lateness = sorted(self._lateness)
+
+        if lateness:
+            mean = sum(lateness) / len(lateness)
+            variance = sum((x - mean) ** 2 for x in lateness) / len(lateness)
+            p95 = lateness[min(len(lateness) - 1, int(0.95 * len(lateness)))]
+        else:
+            mean = variance = p95 = 0.0
+
+        return {
+            "displayed": self.displayed,
+            "dropped": self.dropped,
+            "drift_ms": self.drift * 1000,
+            "mean_lateness_ms": mean * 1000,
+            "p95_lateness_ms": p95 * 1000,
+            "jitter_ms": math.sqrt(variance) * 1000,
+        }
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"   Показано кадров: {stats['displayed']}, "
+              f"пропущено: {stats['dropped']}")
+        print(f"   Дрейф: {stats['drift_ms']:.1f} мс, "
+              f"джиттер: {stats['jitter_ms']:.1f} мс, "
+              f"p95 опоздания: {stats['p95_lateness_ms']:.1f} мс")
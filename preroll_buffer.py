@@ -0,0 +1,71 @@
+import math
+import numpy as np
+
+
+class FrameRingBuffer:
+    """
+    Кольцевой буфер последних кадров фиксированного размера
+
+    Память под все кадры выделяется один раз (массив формы
+    (capacity, H, W, C)), push() только копирует кадр в следующую
+    ячейку через np.copyto, без выделения памяти. Когда буфер полон,
+    перезаписывается самый старый кадр.
+    """
+
+    def __init__(self, capacity, frame_shape, dtype=np.uint8):
+        if capacity < 1:
+            raise ValueError("capacity должен быть >= 1")
+
+        self.capacity = capacity
+        self._frames = np.empty((capacity,) + tuple(frame_shape), dtype=dtype)
+        self._timestamps = np.zeros(capacity, dtype=np.float64)
+        self._start = 0
+        self._count = 0
+
+    @classmethod
+    def for_duration(cls, seconds, fps, frame_shape, dtype=np.uint8):
+        """
+        Буфер на последние seconds секунд при частоте fps
+        """
+        return cls(max(1, int(math.ceil(seconds * fps))), frame_shape, dtype)
+
+    @property
+    def nbytes(self):
+        """
+        Объём памяти буфера в байтах
+        """
+        return self._frames.nbytes + self._timestamps.nbytes
+
+    @property
+    def frame_shape(self):
+        return self._frames.shape[1:]
+
+    def __len__(self):
+        return self._count
+
+    def push(self, frame, timestamp=0.0):
+        if self._count < self.capacity:
+            index = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            # Буфер полон: перезаписываем самый старый кадр
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+
+        np.copyto(self._frames[index], frame)
+        self._timestamps[index] = timestamp
+
+    def frames(self):
+        """
+        Генератор (кадр, метка времени) от старого к новому
+
+        Кадры - представления внутреннего массива, они перезаписываются
+        следующими push().
+        """
+        for i in range(self._count):
+            index = (self._start + i) % self.capacity
+            yield self._frames[index], float(self._timestamps[index])
+
+    def clear(self):
+        self._start = 0
+        self._count = 0
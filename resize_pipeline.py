@@ -0,0 +1,141 @@
+import cv2
+import hashlib
+import os
+import numpy as np
+
+from frame_reader import ThreadedFrameReader
+
+
+class MultiScaleResizer:
+    """
+    Получение нескольких масштабов из одного декодированного кадра
+
+    Буферы назначения выделяются один раз и переиспользуются через
+    cv2.resize(..., dst=...), поэтому на каждом кадре нет новых выделений
+    памяти. Возвращаемые массивы перезаписываются следующим кадром.
+    Кадр другого размера, числа каналов или типа вызывает ValueError:
+    иначе cv2.resize молча выделил бы новый массив вместо буфера.
+    """
+
+    def __init__(self, width, height, scales, channels=3,
+                 interpolation=cv2.INTER_LINEAR):
+        if not scales:
+            raise ValueError("Нужен хотя бы один масштаб")
+
+        self.scales = list(scales)
+        self.interpolation = interpolation
+        self.sizes = [(int(width * scale), int(height * scale))
+                      for scale in self.scales]
+
+        shape_tail = (channels,) if channels > 1 else ()
+        self.frame_shape = (height, width) + shape_tail
+        self.buffers = [np.empty((h, w) + shape_tail, dtype=np.uint8)
+                        for w, h in self.sizes]
+
+    def process(self, frame):
+        """
+        Масштабирование кадра во все буферы
+        """
+        if frame.shape != self.frame_shape or frame.dtype != np.uint8:
+            raise ValueError(
+                f"Кадр {frame.shape} {frame.dtype} не подходит к буферам: "
+                f"ожидается {self.frame_shape} uint8")
+
+        for size, buffer in zip(self.sizes, self.buffers):
+            cv2.resize(frame, size, dst=buffer,
+                       interpolation=self.interpolation)
+        return self.buffers
+
+
+def resize_stream(cap, scales, max_frames=None, prefetch=8, start_frame=0):
+    """
+    Генератор (номер кадра, [кадры по масштабам]) с одним декодированием
+
+    Кадр читается из видео один раз, а все масштабы получаются из него.
+    """
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    resizer = MultiScaleResizer(width, height, scales)
+
+    with ThreadedFrameReader(cap, prefetch=prefetch, start_frame=start_frame,
+                             max_frames=max_frames) as reader:
+        for frame_index, frame in enumerate(reader):
+            yield frame_index, resizer.process(frame)
+
+
+def run_headless(video_path, scales, mode="hash", output_dir="output",
+                 max_frames=None, fourcc="XVID"):
+    """
+    Масштабирование без отображения: запись в файлы или хеширование
+
+    mode="write" - каждый масштаб пишется в свой .avi файл
+    mode="hash"  - для каждого масштаба считается MD5 всех кадров
+
+    Возвращает список словарей с результатами по каждому масштабу.
+    """
+    if mode not in ("hash", "write"):
+        raise ValueError(f"Неизвестный режим: {mode}")
+
+    cap = cv2.VideoCapture(video_path)
+
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть видео: {video_path}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    results = []
+    for scale in scales:
+        size = (int(width * scale), int(height * scale))
+        result = {"scale": scale, "size": size, "frames": 0}
+
+        if mode == "write":
+            os.makedirs(output_dir, exist_ok=True)
+            path = os.path.join(output_dir, f"video_scale_{scale:g}.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc),
+                                     fps, size)
+            if not writer.isOpened():
+                cap.release()
+                for prev in results:
+                    prev["writer"].release()
+                raise IOError(f"Не удалось создать выходной файл: {path}")
+            result["path"] = path
+            result["writer"] = writer
+        else:
+            result["hasher"] = hashlib.md5()
+
+        results.append(result)
+
+    try:
+        for _, outputs in resize_stream(cap, scales, max_frames=max_frames):
+            for result, resized in zip(results, outputs):
+                if mode == "write":
+                    result["writer"].write(resized)
+                else:
+                    result["hasher"].update(resized)
+                result["frames"] += 1
+    finally:
+        cap.release()
+        for result in results:
+            if "writer" in result:
+                result.pop("writer").release()
+
+    for result in results:
+        if "hasher" in result:
+            result["md5"] = result.pop("hasher").hexdigest()
+
+    return results
+
+
+if __name__ == "__main__":
+    video_path = "videos/test_video.mp4"
+
+    if not os.path.exists(video_path):
+        print(f"❌ Ошибка: файл {video_path} не найден!")
+    else:
+        for result in run_headless(video_path, [0.5, 1.5, 2.0], max_frames=90):
+            print(f"   Масштаб {result['scale']}: {result['size'][0]}x"
+                  f"{result['size'][1]}, кадров {result['frames']}, "
+                  f"md5 {result['md5']}")
@@ -0,0 +1,240 @@
+import cv2
+import os
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from frame_index import FrameIndex
+from video_probe import probe_video
+
+
+# Размер сегмента по умолчанию (кадров на один процесс-обработчик)
+DEFAULT_SEGMENT_SIZE = 300
+
+# Минимальный PSNR (дБ) кадра на границе сегмента относительно исходника
+BOUNDARY_MIN_PSNR = 20.0
+
+# Сколько кадров проверяется с каждой стороны границы сегментов
+SEAM_CHECK_FRAMES = 3
+
+# Насколько (дБ) соседний кадр исходника должен совпадать с кадром копии
+# лучше, чем кадр с тем же номером, чтобы считать кадр сдвинутым
+SEAM_NEIGHBOUR_MARGIN = 0.5
+
+
+def plan_segments(frame_count, segment_size=DEFAULT_SEGMENT_SIZE):
+    """
+    Разбиение [0, frame_count) на диапазоны [start, end)
+    """
+    if segment_size < 1:
+        raise ValueError("segment_size должен быть >= 1")
+
+    return [(start, min(start + segment_size, frame_count))
+            for start in range(0, frame_count, segment_size)]
+
+
+def ffmpeg_available():
+    return shutil.which("ffmpeg") is not None
+
+
+def _copy_segment(task):
+    """
+    Копирование одного сегмента (выполняется в отдельном процессе)
+
+    У каждого процесса свои VideoCapture и VideoWriter.
+    """
+    input_path, output_path, start, end, fourcc, fps, size = task
+
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc),
+                             fps, size)
+    if not writer.isOpened():
+        raise IOError(f"Не удалось создать сегмент: {output_path}")
+
+    written = 0
+    # Точный переход к началу сегмента через индекс ключевых кадров
+    with FrameIndex(input_path) as frame_index:
+        for _, frame in frame_index.get_frames(range(start, end)):
+            if frame is None:
+                break
+            writer.write(frame)
+            written += 1
+
+    writer.release()
+    return start, end, written, output_path
+
+
+def concat_segments(segment_paths, output_path):
+    """
+    Склейка сегментов по порядку без перекодирования (ffmpeg, concat
+    demuxer, -c copy)
+
+    Без ffmpeg выбрасывается RuntimeError: склейка через VideoWriter
+    перекодировала бы каждый кадр второй раз, и параллельное
+    копирование потеряло бы смысл.
+    """
+    if not ffmpeg_available():
+        raise RuntimeError("Для склейки сегментов нужен ffmpeg")
+
+    list_fd, list_path = tempfile.mkstemp(suffix=".txt")
+    try:
+        with os.fdopen(list_fd, "w", encoding="utf-8") as f:
+            for path in segment_paths:
+                escaped = os.path.abspath(path).replace("'", r"'\''")
+                f.write(f"file '{escaped}'\n")
+        subprocess.run(
+            ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat",
+             "-safe", "0", "-i", list_path, "-c", "copy", output_path],
+            check=True
+        )
+    finally:
+        os.remove(list_path)
+
+
+def _seam_windows(segments, frame_count, radius=SEAM_CHECK_FRAMES):
+    """
+    Номера кадров вокруг границ сегментов (и начала видео), без повторов
+    """
+    frames = set()
+    for start, _ in segments:
+        frames.update(range(max(0, start - radius),
+                            min(frame_count, start + radius)))
+    return sorted(frames)
+
+
+def verify_copy(input_path, output_path, segments, results,
+                segment_frames=None):
+    """
+    Проверка количества и порядка кадров
+
+    - сегменты идут подряд и записаны полностью;
+    - в каждом файле-сегменте столько кадров, сколько в его диапазоне
+      (segment_frames - число кадров по файлам сегментов);
+    - число кадров в выходном файле равно числу кадров исходника;
+    - кадры по обе стороны каждой границы сегментов совпадают с кадром
+      исходника с тем же номером: он должен быть похож на кадр копии
+      (PSNR не ниже BOUNDARY_MIN_PSNR) и не хуже соседних кадров
+      исходника - так находятся сдвиг на кадр, дубли и пропуски на
+      стыке, которые по одному PSNR не отличить от нормы.
+    Возвращает список найденных проблем (пустой - всё в порядке).
+    """
+    problems = []
+
+    expected_start = 0
+    for (start, end), (r_start, r_end, written, _) in zip(segments, results):
+        if (start, end) != (r_start, r_end) or start != expected_start:
+            problems.append(f"Нарушен порядок сегментов на кадре {start}")
+        if written != end - start:
+            problems.append(f"Сегмент {start}-{end}: записано {written} "
+                            f"из {end - start} кадров")
+        expected_start = end
+
+    if segment_frames is not None:
+        for (start, end), count in zip(segments, segment_frames):
+            if count != end - start:
+                problems.append(f"Сегмент {start}-{end}: в файле {count} "
+                                f"кадров из {end - start}")
+
+    expected_frames = segments[-1][1] if segments else 0
+    output_frames = probe_video(output_path, index_path=None).frame_count
+    if output_frames != expected_frames:
+        problems.append(f"В копии {output_frames} кадров, "
+                        f"ожидалось {expected_frames}")
+
+    if problems:
+        return problems
+
+    checked = _seam_windows(segments, expected_frames)
+    # Кадры исходника берутся с соседями для сравнения
+    needed = sorted({n for i in checked for n in (i - 1, i, i + 1)
+                     if 0 <= n < expected_frames})
+
+    with FrameIndex(input_path) as source, \
+            FrameIndex(output_path, index_dir=None) as copy:
+        originals = dict(source.get_frames(needed))
+        copies = dict(copy.get_frames(checked))
+
+    for i in checked:
+        copied = copies.get(i)
+        original = originals.get(i)
+        if original is None or copied is None:
+            problems.append(f"Не удалось прочитать кадр {i}")
+            continue
+
+        psnr = cv2.PSNR(original, copied)
+        if psnr < BOUNDARY_MIN_PSNR:
+            problems.append(f"Кадр {i} не совпадает с исходником "
+                            f"(PSNR {psnr:.1f} дБ)")
+            continue
+
+        for neighbour in (i - 1, i + 1):
+            other = originals.get(neighbour)
+            if other is None:
+                continue
+            neighbour_psnr = cv2.PSNR(other, copied)
+            if neighbour_psnr > psnr + SEAM_NEIGHBOUR_MARGIN:
+                problems.append(f"Кадр {i} копии ближе к кадру {neighbour} "
+                                f"исходника ({neighbour_psnr:.1f} дБ против "
+                                f"{psnr:.1f} дБ)")
+                break
+
+    return problems
+
+
+def segmented_copy(input_path, output_path,
+                   segment_size=DEFAULT_SEGMENT_SIZE, workers=None,
+                   fourcc="XVID"):
+    """
+    Параллельное копирование видео по сегментам
+
+    Каждый диапазон кадров кодируется отдельным процессом во временный
+    файл, затем сегменты склеиваются по порядку (нужен ffmpeg, иначе
+    RuntimeError) и результат проверяется. Возвращает словарь со
+    статистикой.
+    """
+    # Проверка до кодирования: без ffmpeg сегменты не склеить
+    if not ffmpeg_available():
+        raise RuntimeError("Для сегментного копирования нужен ffmpeg")
+
+    info = probe_video(input_path)
+    size = (info.width, info.height)
+
+    # Индекс строится один раз здесь, процессы читают его с диска
+    with FrameIndex(input_path) as frame_index:
+        frame_count = len(frame_index)
+
+    segments = plan_segments(frame_count, segment_size)
+    if not segments:
+        raise ValueError(f"В видео нет кадров: {input_path}")
+
+    output_dir = os.path.dirname(output_path) or "."
+    os.makedirs(output_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix="segments_", dir=output_dir)
+
+    try:
+        tasks = [
+            (input_path, os.path.join(temp_dir, f"part_{i:05d}.avi"),
+             start, end, fourcc, info.fps, size)
+            for i, (start, end) in enumerate(segments)
+        ]
+
+        # map сохраняет порядок сегментов
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_copy_segment, tasks))
+
+        # Число кадров в каждом файле-сегменте (до удаления временных)
+        segment_frames = [probe_video(r[3], index_path=None).frame_count
+                          for r in results]
+
+        concat_segments([r[3] for r in results], output_path)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    problems = verify_copy(input_path, output_path, segments, results,
+                           segment_frames)
+
+    return {
+        "frames": sum(r[2] for r in results),
+        "segments": len(segments),
+        "problems": problems,
+    }
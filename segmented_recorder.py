@@ -0,0 +1,295 @@
+import os
+import queue
+import re
+import threading
+import time
+
+from async_writer import AsyncVideoWriter, OVERFLOW_BLOCK
+
+
+class RetentionPolicy:
+    """
+    Политика хранения готовых сегментов
+
+    max_age_seconds - удалять сегменты старше этого возраста
+    max_total_bytes - удалять самые старые, пока общий объём больше
+    Текущий (ещё записываемый) сегмент никогда не удаляется.
+    """
+
+    def __init__(self, max_age_seconds=None, max_total_bytes=None):
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+
+    def apply(self, paths, now=None):
+        """
+        Удаление лишних файлов из paths; возвращает список удалённых
+        """
+        if now is None:
+            now = time.time()
+
+        existing = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            existing.append((stat.st_mtime, stat.st_size, path))
+        # Сортировка устойчивая: при равном времени изменения
+        # сохраняется порядок paths (по номерам сегментов)
+        existing.sort(key=lambda item: item[0])
+
+        removed = []
+        total = sum(size for _, size, _ in existing)
+
+        for mtime, size, path in existing:
+            too_old = (self.max_age_seconds is not None
+                       and now - mtime > self.max_age_seconds)
+            over_budget = (self.max_total_bytes is not None
+                           and total > self.max_total_bytes)
+            if not too_old and not over_budget:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed.append(path)
+
+        return removed
+
+
+class SegmentedVideoWriter:
+    """
+    Запись в последовательность файлов-сегментов с ротацией
+
+    Новый сегмент начинается, когда текущий достиг max_seconds секунд
+    (по числу записанных кадров и fps) или max_bytes байт. Закрытие
+    старого сегмента (дозапись очереди и release()) и применение
+    политики хранения выполняются в фоновом потоке. При аварийном
+    завершении теряется только незакрытый текущий сегмент.
+
+    Сегменты называются <base>_0001<ext>, <base>_0002<ext>, ... (после
+    9999 номер просто становится длиннее). Политика хранения действует
+    на все сегменты этого регистратора в каталоге, в том числе
+    оставшиеся от прошлых запусков: retention_prefix - общее начало
+    пути записей разных запусков (например, "output/rec_" для
+    output/rec_<время>.avi), по умолчанию - только сегменты base_path.
+
+    Интерфейс совпадает с AsyncVideoWriter: write(), write_batch(),
+    drain(), release(), stats(), isOpened().
+    """
+
+    # Как часто проверять размер файла (в кадрах)
+    SIZE_CHECK_INTERVAL = 30
+
+    def __init__(self, base_path, fourcc, fps, frame_size, max_seconds=None,
+                 max_bytes=None, retention=None, is_color=True,
+                 queue_size=64, overflow=OVERFLOW_BLOCK, on_written=None,
+                 on_dropped=None, retention_prefix=None):
+        root, ext = os.path.splitext(base_path)
+        self._pattern = root + "_{:04d}" + ext
+        self._segment_re = re.compile(r"(.*)_(\d{4,})" + re.escape(ext) + "$")
+        self._base_name = os.path.basename(root)
+        self._retention_dir = os.path.dirname(retention_prefix or root) or "."
+        self._retention_prefix = (os.path.basename(retention_prefix)
+                                  if retention_prefix is not None else None)
+
+        self.fourcc = fourcc
+        self.fps = fps
+        self.frame_size = frame_size
+        self.is_color = is_color
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.on_written = on_written
+        self.on_dropped = on_dropped
+        self.max_frames = (int(max_seconds * fps)
+                           if max_seconds is not None else None)
+        self.max_bytes = max_bytes
+        self.retention = retention
+
+        # Готовые сегменты и удалённые политикой хранения
+        self.segments = []
+        self.removed = []
+
+        self._index = 0
+        self._current = None
+        self._current_frames = 0
+        self._totals = {"submitted": 0, "written": 0, "dropped": 0,
+                        "max_depth": 0}
+        self._lock = threading.Lock()
+
+        self._finalize_queue = queue.Queue()
+        self._finalizer = threading.Thread(target=self._finalize_worker,
+                                           daemon=True)
+        self._finalizer.start()
+
+        self._open_segment()
+
+    @property
+    def path(self):
+        """
+        Путь к текущему сегменту
+        """
+        return self._current.path if self._current else None
+
+    def isOpened(self):
+        return self._current is not None and self._current.isOpened()
+
+    def _open_segment(self):
+        self._index += 1
+        self._current = AsyncVideoWriter(
+            self._pattern.format(self._index), self.fourcc, self.fps,
+            self.frame_size, is_color=self.is_color,
+            queue_size=self.queue_size, overflow=self.overflow,
+            on_written=self.on_written, on_dropped=self.on_dropped
+        )
+        self._current_frames = 0
+
+    def _find_segments(self):
+        """
+        Сегменты этого регистратора в каталоге по порядку: по имени
+        записи, затем по номеру сегмента (как число, а не как строка)
+        """
+        try:
+            names = os.listdir(self._retention_dir)
+        except OSError:
+            return []
+
+        found = []
+        for name in names:
+            match = self._segment_re.match(name)
+            if match is None:
+                continue
+            stem, number = match.groups()
+            if self._retention_prefix is None:
+                if stem != self._base_name:
+                    continue
+            elif not stem.startswith(self._retention_prefix):
+                continue
+            found.append((stem, int(number),
+                          os.path.join(self._retention_dir, name)))
+        found.sort()
+        return [path for _, _, path in found]
+
+    def _finalize_worker(self):
+        while True:
+            item = self._finalize_queue.get()
+            if item is None:
+                self._finalize_queue.task_done()
+                break
+            # Путь текущего сегмента передаётся вместе с закрываемым:
+            # _current меняется потоком захвата
+            writer, current = item
+
+            writer.release()
+            stats = writer.stats()
+
+            with self._lock:
+                for key in ("submitted", "written", "dropped"):
+                    self._totals[key] += stats[key]
+                self._totals["max_depth"] = max(self._totals["max_depth"],
+                                                stats["max_depth"])
+
+                if stats["written"] > 0:
+                    self.segments.append(writer.path)
+                elif os.path.exists(writer.path):
+                    os.remove(writer.path)
+
+                if self.retention is not None:
+                    # Текущий сегмент в список не попадает
+                    candidates = [p for p in self._find_segments()
+                                  if p != current]
+                    removed = self.retention.apply(candidates)
+                    self.removed.extend(removed)
+                    self.segments = [p for p in self.segments
+                                     if p not in removed]
+
+            self._finalize_queue.task_done()
+
+    def _needs_rotation(self):
+        if self._current_frames == 0:
+            return False
+        if self.max_frames is not None and self._current_frames >= self.max_frames:
+            return True
+        if (self.max_bytes is not None
+                and self._current_frames % self.SIZE_CHECK_INTERVAL == 0):
+            try:
+                return os.path.getsize(self._current.path) >= self.max_bytes
+            except OSError:
+                return False
+        return False
+
+    def rotate(self):
+        """
+        Принудительное начало нового сегмента
+        """
+        old = self._current
+        self._open_segment()
+        self._finalize_queue.put((old, self._current.path))
+
+    def write(self, frame, block=False, tag=None):
+        if self._current is None:
+            return False
+
+        if self._needs_rotation():
+            self.rotate()
+
+        accepted = self._current.write(frame, block=block, tag=tag)
+        self._current_frames += 1
+        return accepted
+
+    def write_batch(self, frames, tags=None):
+        """
+        Пачка кадров; на границе сегмента делится между сегментами
+        """
+        if self._current is None:
+            return False
+        if tags is None:
+            tags = [None] * len(frames)
+
+        start = 0
+        while start < len(frames):
+            if self._needs_rotation():
+                self.rotate()
+            end = len(frames)
+            if self.max_frames is not None:
+                end = min(end, start + self.max_frames - self._current_frames)
+            self._current.write_batch(frames[start:end], tags[start:end])
+            self._current_frames += end - start
+            start = end
+        return True
+
+    def drain(self):
+        """
+        Ожидание записи всех кадров, в том числе в сегментах, которые
+        уже сменились и ещё закрываются в фоне
+        """
+        if self._current is not None:
+            self._current.drain()
+        self._finalize_queue.join()
+
+    def release(self):
+        """
+        Закрытие текущего сегмента и ожидание фонового потока
+        """
+        if self._current is None:
+            return
+        self._finalize_queue.put((self._current, None))
+        self._current = None
+        self._finalize_queue.put(None)
+        self._finalizer.join()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._totals)
+        if self._current is not None:
+            current = self._current.stats()
+            for key in ("submitted", "written", "dropped"):
+                stats[key] += current[key]
+            stats["max_depth"] = max(stats["max_depth"], current["max_depth"])
+            stats["depth"] = current["depth"]
+        else:
+            stats["depth"] = 0
+        stats["segments"] = len(self.segments)
+        stats["removed"] = len(self.removed)
+        return stats
@@ -0,0 +1,214 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+
+# Форматы снимков: расширение, параметр сжатия и значение по умолчанию
+SNAPSHOT_FORMATS = {
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION, 3),    # уровень 0-9
+    "jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY, 95),      # качество 0-100
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY, 90),    # качество 1-100
+}
+
+# Верхние границы корзин гистограммы задержки, мс
+LATENCY_BINS_MS = (5, 10, 20, 50, 100, 200, 500, 1000)
+
+# По скольким последним снимкам считается p95 задержки
+LATENCY_WINDOW = 1024
+
+
+def encode_params(fmt, level=None):
+    """
+    Расширение файла и параметры cv2.imwrite для формата fmt
+
+    level - уровень сжатия PNG или качество JPEG/WebP
+    (None - значение по умолчанию).
+    """
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Неизвестный формат снимка: {fmt}")
+    ext, param, default = SNAPSHOT_FORMATS[fmt]
+    return ext, [param, default if level is None else int(level)]
+
+
+class SnapshotSaver:
+    """
+    Асинхронное сохранение снимков пулом потоков
+
+    save() копирует кадр и сразу возвращает управление, кодирование и
+    запись файла выполняются в фоне (cv2.imwrite отпускает GIL), поэтому
+    предпросмотр не останавливается. Серия: start_burst(n) - следующие
+    n кадров, переданных в feed(), будут сохранены.
+
+    Если в работе уже max_pending снимков, новый снимок пропускается
+    (счётчик skipped), а не задерживает захват.
+    on_complete(path, latency, error) вызывается из рабочего потока
+    после записи каждого файла; latency - секунды от save() до записи.
+    Гистограмма (корзины latency_bins_ms), средняя и максимальная
+    задержка считаются по всем снимкам нарастающим итогом, p95 - по
+    последним LATENCY_WINDOW, поэтому память не растёт с числом снимков.
+    """
+
+    def __init__(self, output_dir="output", prefix="camera_snapshot",
+                 fmt="png", level=None, workers=2, max_pending=32,
+                 on_complete=None, latency_bins_ms=LATENCY_BINS_MS):
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.ext, self.params = encode_params(fmt, level)
+        self.max_pending = max_pending
+        self.on_complete = on_complete
+
+        # Счётчики
+        self.requested = 0
+        self.saved = 0
+        self.failed = 0
+        self.skipped = 0
+
+        self._index = 0
+        self._pending = 0
+        self._burst_left = 0
+        self._bins_ms = tuple(latency_bins_ms)
+        self._bin_counts = [0] * (len(self._bins_ms) + 1)
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        self._recent = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+        os.makedirs(output_dir, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def pending(self):
+        """
+        Число снимков, ещё не записанных на диск
+        """
+        with self._lock:
+            return self._pending
+
+    def save(self, frame):
+        """
+        Постановка снимка в очередь; возвращает путь файла или None,
+        если снимок пропущен
+        """
+        with self._lock:
+            self.requested += 1
+            if self._pending >= self.max_pending:
+                self.skipped += 1
+                return None
+            self._pending += 1
+            self._index += 1
+            index = self._index
+
+        path = os.path.join(self.output_dir,
+                            f"{self.prefix}_{index}{self.ext}")
+        # Буфер кадра переиспользуется захватом, поэтому нужна копия
+        self._executor.submit(self._write, path, frame.copy(),
+                              time.perf_counter())
+        return path
+
+    def start_burst(self, count):
+        """
+        Серия: сохранить следующие count кадров из feed()
+
+        Повторный вызов во время серии продлевает её.
+        """
+        self._burst_left = max(self._burst_left, count)
+
+    def feed(self, frame):
+        """
+        Передача очередного кадра; сохраняет его, если идёт серия
+        """
+        if self._burst_left <= 0:
+            return None
+        self._burst_left -= 1
+        return self.save(frame)
+
+    def _write(self, path, frame, started):
+        error = None
+        try:
+            if not cv2.imwrite(path, frame, self.params):
+                error = f"cv2.imwrite не смог записать {path}"
+        except cv2.error as e:
+            error = str(e)
+        latency = time.perf_counter() - started
+
+        with self._lock:
+            self._pending -= 1
+            if error is None:
+                self.saved += 1
+                self._add_latency(latency * 1000)
+            else:
+                self.failed += 1
+
+        if self.on_complete is not None:
+            self.on_complete(path, latency, error)
+
+    def _add_latency(self, ms):
+        # Вызывается под self._lock
+        self._bin_counts[bisect.bisect_left(self._bins_ms, ms)] += 1
+        self._latency_sum += ms
+        self._latency_max = max(self._latency_max, ms)
+        self._recent.append(ms)
+
+    def close(self):
+        """
+        Ожидание записи всех снимков
+        """
+        self._burst_left = 0
+        self._executor.shutdown(wait=True)
+
+    def latency_histogram(self):
+        """
+        Гистограмма задержки: список (верхняя граница в мс, число)
+
+        Последняя корзина (граница None) - всё, что дольше
+        latency_bins_ms[-1].
+        """
+        with self._lock:
+            counts = list(self._bin_counts)
+        uppers = list(self._bins_ms) + [None]
+        return list(zip(uppers, counts))
+
+    def stats(self):
+        with self._lock:
+            recent = np.array(self._recent)
+            result = {
+                "requested": self.requested,
+                "saved": self.saved,
+                "failed": self.failed,
+                "skipped": self.skipped,
+                "pending": self._pending,
+            }
+            if self.saved:
+                result["mean_ms"] = self._latency_sum / self.saved
+                result["max_ms"] = self._latency_max
+        if len(recent):
+            result["p95_ms"] = float(np.percentile(recent, 95))
+        return result
+
+    def print_stats(self):
+        stats = self.stats()
+        print(f"\nСнимки: сохранено {stats['saved']}, ошибок {stats['failed']}, "
+              f"пропущено {stats['skipped']}")
+        if stats["saved"] == 0:
+            return
+        print(f"   Задержка: средняя {stats['mean_ms']:.1f} мс, "
+              f"p95 {stats['p95_ms']:.1f} мс, макс {stats['max_ms']:.1f} мс")
+        lower = 0
+        for upper, count in self.latency_histogram():
+            if count:
+                label = (f"{lower}-{upper} мс" if upper is not None
+                         else f"> {lower} мс")
+                print(f"   {label:>14}: {count}")
+            if upper is not None:
+                lower = upper
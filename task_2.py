@@ -1,11 +1,28 @@
 import cv2
 import os
 
+from display_sinks import get_display
+from image_loader import load_images
+from image_preview import ThumbnailCache
+
+
+def to_bgr(img):
+    """
+    Приведение изображения к трём каналам BGR
+    """
+    if img.ndim == 2:
+        return cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+    if img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img
+
 
 def test_imread_flags():
     """
     Тестирование флагов чтения изображения (imread)
     """
+    display = get_display()
+    
     print("=" * 60)
     print("ТЕСТ 1: Флаги чтения изображения (imread)")
     print("=" * 60)
@@ -25,11 +42,22 @@ def test_imread_flags():
         "IMREAD_UNCHANGED": cv2.IMREAD_UNCHANGED    # С альфа-каналом
     }
     
-    for flag_name, flag_value in flags.items():
+    # Файл читается один раз, все три варианта получаются из его байт
+    variants = {
+        "IMREAD_COLOR": "color",
+        "IMREAD_GRAYSCALE": "grayscale",
+        "IMREAD_UNCHANGED": "unchanged"
+    }
+    result = next(load_images([image_path], tuple(variants.values())))
+    
+    if result.error:
+        print(f"❌ Ошибка загрузки: {result.error}")
+        return
+    
+    for flag_name in flags:
         print(f"\n📷 Загрузка с флагом: {flag_name}")
         
-        # Загружаем изображение
-        img = cv2.imread(image_path, flag_value)
+        img = result.images.get(variants[flag_name])
         
         if img is None:
             print(f"   ❌ Ошибка загрузки!")
@@ -41,10 +69,10 @@ def test_imread_flags():
         
         # Отображаем
         window_name = f"imread: {flag_name}"
-        cv2.imshow(window_name, img)
+        display.show(window_name, img)
         print(f"   ✓ Нажмите любую клавишу для продолжения...")
-        cv2.waitKey(0)
-        cv2.destroyWindow(window_name)
+        display.wait_key(0)
+        display.destroy_window(window_name)
     
     print("\n✅ Тест флагов imread завершен\n")
 
@@ -53,6 +81,8 @@ def test_window_flags():
     """
     Тестирование флагов создания окна (namedWindow)
     """
+    display = get_display()
+    
     print("=" * 60)
     print("ТЕСТ 2: Флаги создания окна (namedWindow)")
     print("=" * 60)
@@ -83,7 +113,7 @@ def test_window_flags():
         window_name = f"Window: {flag_name}"
         
         # Создаем окно с флагом
-        cv2.namedWindow(window_name, flag_value)
+        display.named_window(window_name, flag_value)
         
         # Описание флага
         descriptions = {
@@ -94,11 +124,11 @@ def test_window_flags():
         print(descriptions[flag_name])
         
         # Отображаем изображение
-        cv2.imshow(window_name, img)
+        display.show(window_name, img)
         print(f"   ✓ Нажмите любую клавишу для продолжения...")
         
-        cv2.waitKey(0)
-        cv2.destroyWindow(window_name)
+        display.wait_key(0)
+        display.destroy_window(window_name)
     
     print("\n✅ Тест флагов namedWindow завершен\n")
 
@@ -107,6 +137,8 @@ def test_image_formats():
     """
     Тестирование разных форматов изображений
     """
+    display = get_display()
+    
     print("=" * 60)
     print("ТЕСТ 3: Форматы изображений")
     print("=" * 60)
@@ -114,38 +146,90 @@ def test_image_formats():
     # Форматы для тестирования
     formats = ["png", "jpg", "bmp"]
     
-    for fmt in formats:
-        image_path = f"images/test_image.{fmt}"
+    image_paths = [f"images/test_image.{fmt}" for fmt in formats]
+    
+    # Файлы декодируются параллельно, результаты приходят по готовности
+    for result in load_images(image_paths):
+        image_path = result.path
+        fmt = os.path.splitext(image_path)[1][1:]
         print(f"\n📁 Загрузка формата: .{fmt.upper()}")
         
         if not os.path.exists(image_path):
             print(f"   ⚠️  Файл {image_path} не найден, пропускаем...")
             continue
         
-        # Загружаем
-        img = cv2.imread(image_path, cv2.IMREAD_COLOR)
-        
-        if img is None:
-            print(f"   ❌ Ошибка загрузки!")
+        if result.error:
+            print(f"   ❌ Ошибка загрузки: {result.error}")
             continue
         
+        img = result.images["color"]
+        
         # Информация о файле
-        file_size = os.path.getsize(image_path)
-        print(f"   ✓ Размер файла: {file_size / 1024:.2f} KB")
+        print(f"   ✓ Размер файла: {result.file_size / 1024:.2f} KB")
+        print(f"   ✓ Время загрузки: {result.elapsed * 1000:.1f} мс")
         print(f"   ✓ Разрешение: {img.shape[1]}x{img.shape[0]}")
         print(f"   ✓ Каналов: {img.shape[2] if len(img.shape) == 3 else 1}")
         
         # Отображаем
         window_name = f"Format: .{fmt.upper()}"
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-        cv2.imshow(window_name, img)
+        display.named_window(window_name, cv2.WINDOW_NORMAL)
+        display.show(window_name, img)
         print(f"   ✓ Нажмите любую клавишу для продолжения...")
-        cv2.waitKey(0)
-        cv2.destroyWindow(window_name)
+        display.wait_key(0)
+        display.destroy_window(window_name)
     
     print("\n✅ Тест форматов изображений завершен\n")
 
 
+def test_image_previews(max_size=(256, 256)):
+    """
+    Тестирование уменьшенного декодирования (IMREAD_REDUCED_*) для превью
+    """
+    display = get_display()
+    
+    print("=" * 60)
+    print("ТЕСТ 4: Превью изображений (IMREAD_REDUCED_*)")
+    print("=" * 60)
+    
+    if not os.path.isdir("images"):
+        print(f"❌ Ошибка: папка images не найдена!")
+        return
+    
+    # Миниатюры строятся уменьшенным декодированием и кешируются на диске
+    cache = ThumbnailCache(max_size=max_size)
+    thumbnails = []
+    
+    for image_path, thumbnail in cache.get_many("images"):
+        if thumbnail is None:
+            print(f"   ❌ {image_path}: ошибка загрузки!")
+            continue
+        print(f"   ✓ {image_path}: {thumbnail.shape[1]}x{thumbnail.shape[0]}")
+        thumbnails.append(thumbnail)
+    
+    print(f"\n   Из кеша: {cache.hits}, построено: {cache.misses}")
+    
+    if not thumbnails:
+        return
+    
+    # Галерея: миниатюры в один ряд на общем фоне. hconcat требует
+    # одинакового числа каналов, поэтому всё приводится к BGR
+    thumbnails = [to_bgr(t) for t in thumbnails]
+    height = max(t.shape[0] for t in thumbnails)
+    row = [cv2.copyMakeBorder(t, 0, height - t.shape[0], 0, 8,
+                              cv2.BORDER_CONSTANT, value=(40, 40, 40))
+           for t in thumbnails]
+    gallery = cv2.hconcat(row)
+    
+    window_name = "Previews"
+    display.named_window(window_name, cv2.WINDOW_NORMAL)
+    display.show(window_name, gallery)
+    print(f"   ✓ Нажмите любую клавишу для продолжения...")
+    display.wait_key(0)
+    display.destroy_window(window_name)
+    
+    print("\n✅ Тест превью завершен\n")
+
+
 def main():
     """
     Главная функция - запуск всех тестов
@@ -160,6 +244,7 @@ def main():
         test_imread_flags()
         test_window_flags()
         test_image_formats()
+        test_image_previews()
         
         print("=" * 60)
         print("🎉 ВСЕ ТЕСТЫ УСПЕШНО ЗАВЕРШЕНЫ!")
@@ -170,7 +255,7 @@ def main():
     
     finally:
         # Закрываем все окна на всякий случай
-        cv2.destroyAllWindows()
+        get_display().destroy_all_windows()
 
 
 if __name__ == "__main__":
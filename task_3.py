@@ -1,31 +1,53 @@
 import cv2
 import os
 
+from color_engine import COLOR_MODES, color_stream
+from display_sinks import get_display
+from frame_index import FrameIndex
+from frame_reader import ThreadedFrameReader
+from frame_store import open_capture
+from playback_clock import PlaybackClock
+from resize_pipeline import resize_stream
+from video_probe import print_video_info, probe_video
 
-def display_video_info(cap):
+# Сколько кадров декодируется наперёд в фоновом потоке
+PREFETCH_FRAMES = 8
+
+# FPS по умолчанию, если видео его не сообщает (раньше - waitKey(25))
+DEFAULT_FPS = 40.0
+
+# Брать кадры из хранилища декодированных кадров (frame_store) вместо
+# повторного декодирования видео в каждой функции. Хранилище пишет
+# сырые кадры на диск (до frame_store.DEFAULT_MAX_BYTES), поэтому
+# включается явно
+USE_FRAME_STORE = False
+
+
+def open_video(video_path):
     """
-    Вывод информации о видео
+    Источник кадров: хранилище декодированных кадров или VideoCapture
     """
-    # Получаем свойства видео через методы get()
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
-    print(f"\n📹 Информация о видео:")
-    print(f"   • Разрешение: {width}x{height}")
-    print(f"   • FPS (кадров/сек): {fps:.2f}")
-    print(f"   • Всего кадров: {frame_count}")
-    print(f"   • Длительность: {frame_count/fps:.2f} секунд")
-    print(f"   • Backend: {cap.getBackendName()}")
+    if USE_FRAME_STORE:
+        return open_capture(video_path)
+    return cv2.VideoCapture(video_path)
+
+
+def display_video_info(video_path):
+    """
+    Вывод информации о видео (метаданные берутся из кеша)
+    """
+    info = probe_video(video_path)
+    print_video_info(info)
     
-    return width, height, fps, frame_count
+    return info.width, info.height, info.fps, info.frame_count
 
 
 def play_video_original():
     """
     Задание 3.1: Воспроизведение видео в оригинальном виде
     """
+    display = get_display()
+    
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 3.1: Воспроизведение оригинального видео")
     print("=" * 60)
@@ -38,40 +60,49 @@ def play_video_original():
         return
     
     # Открываем видеопоток
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video(video_path)
     
     if not cap.isOpened():
         print("❌ Не удалось открыть видео!")
         return
     
     # Выводим информацию о видео
-    display_video_info(cap)
+    _, _, fps, _ = display_video_info(video_path)
     
     print("\n▶️  Воспроизведение... (Нажмите ESC для выхода)")
     
     # Создаем окно
     window_name = "Original Video"
-    cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+    display.named_window(window_name, cv2.WINDOW_NORMAL)
     
-    # Воспроизведение
-    while True:
-        ret, frame = cap.read()
-        
-        # Если кадры закончились, начинаем заново
-        if not ret:
-            print("🔄 Видео закончилось, перезапуск...")
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
-        
-        # Отображаем кадр
-        cv2.imshow(window_name, frame)
-        
-        # Выход по клавише ESC (код 27)
-        if cv2.waitKey(25) & 0xFF == 27:
-            break
+    # Часы воспроизведения: задержка считается от времени показа кадра
+    clock = PlaybackClock(fps if fps > 0 else DEFAULT_FPS)
     
+    # Воспроизведение: декодирование идёт в фоне, параллельно с показом
+    with ThreadedFrameReader(cap, prefetch=PREFETCH_FRAMES, loop=True) as reader:
+        while True:
+            ret, frame = reader.read()
+            
+            # Если кадры закончились, reader сам начинает заново
+            if not ret:
+                print("🔄 Видео закончилось, перезапуск...")
+                clock.reset()
+                continue
+            
+            # Опоздавший кадр не показываем
+            if not clock.should_display():
+                continue
+            
+            # Отображаем кадр
+            display.show(window_name, frame)
+            
+            # Выход по клавише ESC (код 27)
+            if display.wait_key(clock.wait_ms()) & 0xFF == 27:
+                break
+    
+    clock.print_stats()
     cap.release()
-    cv2.destroyWindow(window_name)
+    display.destroy_window(window_name)
     print("✅ Воспроизведение завершено\n")
 
 
@@ -79,6 +110,8 @@ def play_video_resized():
     """
     Задание 3.2: Воспроизведение с изменением размера
     """
+    display = get_display()
+    
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 3.2: Изменение размера видео")
     print("=" * 60)
@@ -89,13 +122,13 @@ def play_video_resized():
         print(f"❌ Ошибка: файл {video_path} не найден!")
         return
     
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video(video_path)
     
     if not cap.isOpened():
         print("❌ Не удалось открыть видео!")
         return
     
-    width, height, fps, _ = display_video_info(cap)
+    width, height, fps, _ = display_video_info(video_path)
     
     # Варианты масштабирования
     scales = [
@@ -104,6 +137,8 @@ def play_video_resized():
         (2.0, "200% размера")
     ]
     
+    # Окна для всех масштабов: каждый кадр декодируется один раз
+    window_names = []
     for scale, description in scales:
         print(f"\n🔍 Масштаб: {description}")
         
@@ -112,33 +147,30 @@ def play_video_resized():
         print(f"   Новое разрешение: {new_width}x{new_height}")
         
         window_name = f"Resized Video - {description}"
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-        
-        # Сбрасываем позицию в начало
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        
-        frame_counter = 0
-        max_frames = 90  # Показываем по 90 кадров для каждого масштаба
+        display.named_window(window_name, cv2.WINDOW_NORMAL)
+        window_names.append(window_name)
+    
+    max_frames = 90  # Показываем 90 кадров сразу во всех масштабах
+    
+    print(f"\n   ▶️  Воспроизведение... (Нажмите ESC для пропуска)")
+    
+    stream = resize_stream(cap, [scale for scale, _ in scales],
+                           max_frames=max_frames, prefetch=PREFETCH_FRAMES)
+    clock = PlaybackClock(fps if fps > 0 else DEFAULT_FPS)
+    for _, resized_frames in stream:
+        if not clock.should_display():
+            continue
         
-        print(f"   ▶️  Воспроизведение... (Нажмите ESC для пропуска)")
+        for window_name, resized_frame in zip(window_names, resized_frames):
+            display.show(window_name, resized_frame)
         
-        while frame_counter < max_frames:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # Изменяем размер кадра
-            resized_frame = cv2.resize(frame, (new_width, new_height))
-            
-            cv2.imshow(window_name, resized_frame)
-            
-            if cv2.waitKey(25) & 0xFF == 27:
-                break
-            
-            frame_counter += 1
-        
-        cv2.destroyWindow(window_name)
+        if display.wait_key(clock.wait_ms()) & 0xFF == 27:
+            break
+    stream.close()
+    clock.print_stats()
+    
+    for window_name in window_names:
+        display.destroy_window(window_name)
     
     cap.release()
     print("\n✅ Тест масштабирования завершен\n")
@@ -148,6 +180,8 @@ def play_video_color_modes():
     """
     Задание 3.3: Различные цветовые форматы
     """
+    display = get_display()
+    
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 3.3: Цветовые форматы видео")
     print("=" * 60)
@@ -158,57 +192,45 @@ def play_video_color_modes():
         print(f"❌ Ошибка: файл {video_path} не найден!")
         return
     
-    cap = cv2.VideoCapture(video_path)
+    cap = open_video(video_path)
     
     if not cap.isOpened():
         print("❌ Не удалось открыть видео!")
         return
     
-    display_video_info(cap)
+    _, _, fps, _ = display_video_info(video_path)
     
-    # Цветовые режимы
-    color_modes = [
-        ("BGR (оригинал)", None),
-        ("Grayscale (оттенки серого)", cv2.COLOR_BGR2GRAY),
-        ("HSV", cv2.COLOR_BGR2HSV),
-        ("LAB", cv2.COLOR_BGR2LAB),
-        ("YCrCb", cv2.COLOR_BGR2YCrCb)
-    ]
-    
-    for mode_name, conversion in color_modes:
+    # Окна для всех цветовых режимов: каждый кадр декодируется один раз
+    window_names = {}
+    for mode_name, _ in COLOR_MODES:
         print(f"\n🎨 Режим: {mode_name}")
         
         window_name = f"Color Mode: {mode_name}"
-        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-        
-        # Сбрасываем позицию в начало
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        
-        frame_counter = 0
-        max_frames = 90
-        
-        print(f"   ▶️  Воспроизведение... (Нажмите ESC для пропуска)")
+        display.named_window(window_name, cv2.WINDOW_NORMAL)
+        window_names[mode_name] = window_name
+    
+    max_frames = 90
+    
+    print(f"\n   ▶️  Воспроизведение... (Нажмите ESC для пропуска)")
+    
+    # Конвертации выполняются параллельно в пуле потоков
+    stream = color_stream(cap, COLOR_MODES, max_frames=max_frames,
+                          prefetch=PREFETCH_FRAMES)
+    clock = PlaybackClock(fps if fps > 0 else DEFAULT_FPS)
+    for _, converted_frames in stream:
+        if not clock.should_display():
+            continue
         
-        while frame_counter < max_frames:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # Конвертируем цветовое пространство
-            if conversion is not None:
-                converted_frame = cv2.cvtColor(frame, conversion)
-            else:
-                converted_frame = frame
-            
-            cv2.imshow(window_name, converted_frame)
-            
-            if cv2.waitKey(25) & 0xFF == 27:
-                break
-            
-            frame_counter += 1
+        for mode_name, converted_frame in converted_frames.items():
+            display.show(window_names[mode_name], converted_frame)
         
-        cv2.destroyWindow(window_name)
+        if display.wait_key(clock.wait_ms()) & 0xFF == 27:
+            break
+    stream.close()
+    clock.print_stats()
+    
+    for window_name in window_names.values():
+        display.destroy_window(window_name)
     
     cap.release()
     print("\n✅ Тест цветовых форматов завершен\n")
@@ -218,6 +240,8 @@ def test_videocapture_methods():
     """
     Задание 3.4: Тестирование методов класса VideoCapture
     """
+    display = get_display()
+    
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 3.4: Методы класса VideoCapture")
     print("=" * 60)
@@ -262,15 +286,21 @@ def test_videocapture_methods():
     middle_frame = frame_count // 2
     
     print(f"\n   Переход к кадру {middle_frame} (середина видео)...")
-    cap.set(cv2.CAP_PROP_POS_FRAMES, middle_frame)
     
-    ret, frame = cap.read()
-    if ret:
-        cv2.imshow("Middle Frame", frame)
-        print(f"   ✓ Текущая позиция: кадр {int(cap.get(cv2.CAP_PROP_POS_FRAMES))}")
+    # Точный переход через индекс ключевых кадров:
+    # от ближайшего ключевого кадра декодируем вперёд
+    with FrameIndex(video_path) as frame_index:
+        keyframe = frame_index.nearest_keyframe(middle_frame)
+        print(f"   Ближайший ключевой кадр: {keyframe} "
+              f"({frame_index.keyframe_timestamp(keyframe):.0f} мс)")
+        frame = frame_index.get_frame(middle_frame)
+    
+    if frame is not None:
+        display.show("Middle Frame", frame)
+        print(f"   ✓ Текущая позиция: кадр {middle_frame}")
         print("   Нажмите любую клавишу...")
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
+        display.wait_key(0)
+        display.destroy_all_windows()
     
     # Возврат в начало
     print("\n   Возврат в начало видео...")
@@ -313,7 +343,7 @@ def main():
         traceback.print_exc()
     
     finally:
-        cv2.destroyAllWindows()
+        get_display().destroy_all_windows()
 
 if __name__ == "__main__":
     main()
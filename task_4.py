@@ -1,10 +1,27 @@
 import cv2
 import os
 
+from codec_bench import run_codec_matrix, save_report
+from effect_graph import EffectGraph
+from frame_store import open_capture
+from segmented_copy import (DEFAULT_SEGMENT_SIZE, ffmpeg_available,
+                            segmented_copy)
+from video_probe import probe_video
 
-def copy_video_basic():
+# Читать кадры из хранилища декодированных кадров (frame_store):
+# видео декодируется один раз за все запуски, но сырые кадры
+# занимают место на диске, поэтому хранилище включается явно
+USE_FRAME_STORE = False
+
+
+def copy_video_basic(segment_size=None):
     """
     Задание 4.1: Простое копирование видео
+    
+    segment_size - копировать параллельно сегментами по столько кадров.
+    Сегментный режим требует ffmpeg (склейка без перекодирования): без
+    него он отключается. По умолчанию включается сам, если есть ffmpeg
+    и больше одного ядра.
     """
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 4.1: Простое копирование видео")
@@ -28,17 +45,46 @@ def copy_video_basic():
         print("❌ Не удалось открыть видео!")
         return
     
-    # Получаем параметры видео
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Получаем параметры видео (из кеша метаданных)
+    info = probe_video(input_path)
+    width, height = info.width, info.height
+    fps = info.fps
+    frame_count = info.frame_count
     
     print(f"\n📹 Исходное видео:")
     print(f"   • Разрешение: {width}x{height}")
     print(f"   • FPS: {fps:.2f}")
     print(f"   • Кадров: {frame_count}")
     
+    if segment_size is None and ffmpeg_available() and (os.cpu_count() or 1) > 1:
+        segment_size = DEFAULT_SEGMENT_SIZE
+    elif segment_size is not None and not ffmpeg_available():
+        # Без ffmpeg сегменты пришлось бы склеивать перекодированием
+        print("\n⚠️  ffmpeg не найден: сегментное копирование отключено")
+        segment_size = None
+    
+    if segment_size is not None and frame_count > segment_size:
+        cap.release()
+        
+        print(f"\n📝 Параллельное копирование сегментами по {segment_size} кадров...")
+        print(f"   Выходной файл: {output_path}")
+        
+        result = segmented_copy(input_path, output_path, segment_size)
+        
+        file_size = os.path.getsize(output_path) / (1024 * 1024)  # МБ
+        print(f"\n✅ Копирование завершено!")
+        print(f"   Сегментов: {result['segments']} (склейка: ffmpeg)")
+        print(f"   Записано кадров: {result['frames']}")
+        print(f"   Размер файла: {file_size:.2f} МБ")
+        
+        if result["problems"]:
+            print("   ⚠️  Проверка копии не пройдена:")
+            for problem in result["problems"]:
+                print(f"      - {problem}")
+        else:
+            print("   ✓ Количество и порядок кадров проверены")
+        return
+    
     # Создаём VideoWriter
     # fourcc - 4-символьный код кодека
     fourcc = cv2.VideoWriter_fourcc(*'XVID')  # XVID кодек для .avi
@@ -98,19 +144,6 @@ def copy_video_with_codec_tests():
         print(f"❌ Ошибка: файл {input_path} не найден!")
         return
     
-    # Открываем входное видео
-    cap = cv2.VideoCapture(input_path)
-    
-    if not cap.isOpened():
-        print("❌ Не удалось открыть видео!")
-        return
-    
-    # Параметры видео
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    
     # Разные кодеки для тестирования
     # Используем только надёжные кодеки для Windows
     codecs = [
@@ -122,49 +155,39 @@ def copy_video_with_codec_tests():
     
     print("\n💡 Примечание: X264 заменён на AVC1 для совместимости с Windows")
     
-    for codec_name, extension, description in codecs:
+    # Первые 90 кадров декодируются один раз в общую память, каждый
+    # кодек работает в отдельном процессе; скорость считается по
+    # процессорному времени кодека
+    max_frames = 90
+    print(f"\n⏱️  Параллельный прогон {len(codecs)} кодеков на {max_frames} кадрах...")
+    
+    results = run_codec_matrix(
+        input_path,
+        [(codec_name, extension) for codec_name, extension, _ in codecs],
+        max_frames=max_frames
+    )
+    
+    for (_, _, description), result in zip(codecs, results):
         print(f"\n🎬 Кодек: {description}")
         
-        output_path = f"output/video_{codec_name}.{extension}"
-        
-        # Сбрасываем позицию в начало
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        if result["error"]:
+            print(f"   ⚠️  Не удалось: {result['error']}")
+            continue
         
-        try:
-            # Создаём fourcc
-            fourcc = cv2.VideoWriter_fourcc(*codec_name)
-            out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-            
-            if not out.isOpened():
-                print(f"   ⚠️  Не удалось инициализировать кодек {codec_name}")
-                continue
-            
-            # Записываем только первые 90 кадров для экономии времени
-            max_frames = min(90, frame_count)
-            
-            written_frames = 0
-            for i in range(max_frames):
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                out.write(frame)
-                written_frames += 1
-            
-            out.release()
-            
-            # Проверяем результат
-            if os.path.exists(output_path) and written_frames > 0:
-                file_size = os.path.getsize(output_path) / 1024  # КБ
-                print(f"   ✓ Файл: {output_path}")
-                print(f"   ✓ Кадров: {written_frames}")
-                print(f"   ✓ Размер: {file_size:.2f} КБ")
-            else:
-                print(f"   ❌ Файл не создан или пуст!")
-                
-        except Exception as e:
-            print(f"   ❌ Ошибка: {e}")
+        print(f"   ✓ Файл: {result['path']}")
+        print(f"   ✓ Кадров: {result['frames']}")
+        print(f"   ✓ Размер: {result['size_bytes'] / 1024:.2f} КБ "
+              f"({result['bits_per_frame'] / 1000:.1f} кбит/кадр)")
+        print(f"   ✓ Скорость кодирования: {result['encode_fps']:.1f} кадров/сек "
+              f"(по процессорному времени)")
+        if result["psnr"] is not None:
+            print(f"   ✓ PSNR: {result['psnr']:.2f} дБ, SSIM: {result['ssim']:.4f}")
+    
+    save_report(results, csv_path="output/codec_benchmark.csv",
+                json_path="output/codec_benchmark.json")
+    print("\n📊 Таблица результатов: output/codec_benchmark.csv, "
+          "output/codec_benchmark.json")
     
-    cap.release()
     print("\n✅ Тест кодеков завершен")
 
 
@@ -182,82 +205,47 @@ def copy_video_with_effects():
         print(f"❌ Ошибка: файл {input_path} не найден!")
         return
     
-    cap = cv2.VideoCapture(input_path)
+    max_frames = 90  # Ограничиваем для скорости
+    
+    # Кадры из хранилища (при ошибке хранилища - обычный VideoCapture)
+    if USE_FRAME_STORE:
+        cap = open_capture(input_path, max_frames=max_frames)
+    else:
+        cap = cv2.VideoCapture(input_path)
     
     if not cap.isOpened():
         print("❌ Не удалось открыть видео!")
         return
     
-    # Параметры
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
+    # Параметры (из кеша метаданных)
+    fps = probe_video(input_path).fps
     
-    # Эффекты
+    # Эффекты (имена из effect_graph.EFFECTS)
     effects = [
         ("grayscale", "Черно-белое видео"),
         ("resized", "Уменьшенное 50%"),
         ("flipped", "Отражённое по горизонтали"),
     ]
     
-    for effect_name, description in effects:
+    # Один проход декодирования: каждый кадр уходит во все ветви,
+    # каждая ветвь пишет свой файл в своём потоке
+    graph = EffectGraph(fps, fourcc='XVID')
+    for effect_name, _ in effects:
+        graph.add_branch(effect_name, f"output/video_{effect_name}.avi")
+    
+    graph.run(cap, max_frames=max_frames)
+    
+    for (_, description), branch in zip(effects, graph.branches):
         print(f"\n🎨 Эффект: {description}")
         
-        output_path = f"output/video_{effect_name}.avi"
-        
-        # Сброс позиции
-        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        
-        # Определяем размер для записи в зависимости от эффекта
-        if effect_name == "resized":
-            out_width = width // 2
-            out_height = height // 2
-        else:
-            out_width = width
-            out_height = height
-        
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        
-        # Для grayscale нужно указать isColor=False
-        if effect_name == "grayscale":
-            out = cv2.VideoWriter(output_path, fourcc, fps, 
-                                (out_width, out_height), isColor=False)
-        else:
-            out = cv2.VideoWriter(output_path, fourcc, fps, 
-                                (out_width, out_height))
-        
-        if not out.isOpened():
-            print(f"   ❌ Не удалось создать выходной файл!")
+        if branch.error is not None:
+            print(f"   ❌ Ошибка: {branch.error}")
             continue
         
-        frame_count = 0
-        max_frames = 90  # Ограничиваем для скорости
-        
-        while frame_count < max_frames:
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # Применяем эффект
-            if effect_name == "grayscale":
-                processed_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            elif effect_name == "resized":
-                processed_frame = cv2.resize(frame, (out_width, out_height))
-            elif effect_name == "flipped":
-                processed_frame = cv2.flip(frame, 1)  # 1 = horizontal flip
-            else:
-                processed_frame = frame
-            
-            out.write(processed_frame)
-            frame_count += 1
-        
-        out.release()
-        
-        if os.path.exists(output_path):
-            file_size = os.path.getsize(output_path) / 1024
-            print(f"   ✓ Файл: {output_path}")
-            print(f"   ✓ Кадров: {frame_count}")
+        if os.path.exists(branch.output_path):
+            file_size = os.path.getsize(branch.output_path) / 1024
+            print(f"   ✓ Файл: {branch.output_path}")
+            print(f"   ✓ Кадров: {branch.frames}")
             print(f"   ✓ Размер: {file_size:.2f} КБ")
     
     cap.release()
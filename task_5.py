@@ -2,6 +2,10 @@ import cv2
 import os
 import numpy as np
 
+from channel_stats import channel_stats
+from color_segmentation import ColorSegmenter, draw_segments
+from hsv_charts import hsv_cube_atlas, hsv_disc, hsv_spectrum
+
 
 def explain_hsv():
     """
@@ -33,9 +37,20 @@ HSV - цветовая модель, где:
     print("=" * 60)
 
 
-def show_image_bgr_and_hsv():
+def to_hsv(img_bgr, lut=None):
+    """
+    BGR -> HSV через cvtColor или, если задана, через таблицу HsvLut
+    """
+    if lut is None:
+        return cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    return lut.convert(img_bgr)
+
+
+def show_image_bgr_and_hsv(lut=None):
     """
     Задание 5: Отображение изображения в BGR и HSV форматах
+    
+    lut - необязательная таблица HsvLut вместо cv2.cvtColor
     """
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 5: Сравнение BGR и HSV форматов")
@@ -59,7 +74,7 @@ def show_image_bgr_and_hsv():
     print(f"   Тип данных: {img_bgr.dtype}")
     
     # Конвертация в HSV
-    img_hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    img_hsv = to_hsv(img_bgr, lut)
     
     print(f"\nИзображение в формате HSV:")
     print(f"   Размер: {img_hsv.shape}")
@@ -84,9 +99,11 @@ def show_image_bgr_and_hsv():
     cv2.destroyAllWindows()
 
 
-def show_hsv_channels_separately():
+def show_hsv_channels_separately(lut=None):
     """
     Дополнительно: Раздельное отображение каналов HSV
+    
+    lut - необязательная таблица HsvLut вместо cv2.cvtColor
     """
     print("\n" + "=" * 60)
     print("ДОПОЛНИТЕЛЬНО: Раздельные каналы HSV")
@@ -105,15 +122,20 @@ def show_hsv_channels_separately():
         return
     
     # Конвертация в HSV
-    img_hsv = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2HSV)
+    img_hsv = to_hsv(img_bgr, lut)
     
-    # Разделение на каналы
-    h, s, v = cv2.split(img_hsv)
+    # Статистика по гистограммам каналов (один проход на канал,
+    # без разделения изображения)
+    stats = channel_stats(img_hsv)
     
     print("\nСтатистика по каналам:")
-    print(f"   H (Hue):        min={h.min()}, max={h.max()}, mean={h.mean():.1f}")
-    print(f"   S (Saturation): min={s.min()}, max={s.max()}, mean={s.mean():.1f}")
-    print(f"   V (Value):      min={v.min()}, max={v.max()}, mean={v.mean():.1f}")
+    for label, st in zip(("H (Hue):       ", "S (Saturation):", "V (Value):     "),
+                         stats):
+        print(f"   {label} min={st.min}, max={st.max}, mean={st.mean:.1f}, "
+              f"std={st.std:.1f}")
+    
+    # Разделение на каналы (для отображения)
+    h, s, v = cv2.split(img_hsv)
     
     # Создание окон
     cv2.namedWindow('Original', cv2.WINDOW_NORMAL)
@@ -139,30 +161,76 @@ def show_hsv_channels_separately():
     cv2.destroyAllWindows()
 
 
-def create_hsv_visualization():
+def show_color_segmentation():
     """
-    Создание визуализации HSV цветового пространства
+    Дополнительно: Выделение объектов по цвету в HSV
     """
     print("\n" + "=" * 60)
-    print("ВИЗУАЛИЗАЦИЯ: HSV цветовое пространство")
+    print("ДОПОЛНИТЕЛЬНО: Сегментация по диапазонам HSV")
     print("=" * 60)
     
-    # Создание спектра HSV
-    width = 360
-    height = 256
+    image_path = "images/test_image.png"
+    
+    if not os.path.exists(image_path):
+        print(f"Ошибка: файл {image_path} не найден")
+        return
+    
+    img_bgr = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    
+    if img_bgr is None:
+        print("Ошибка: не удалось загрузить изображение")
+        return
+    
+    # Цвета рамок для диапазонов по умолчанию (BGR)
+    colors = {
+        "red": (0, 0, 255),
+        "yellow": (0, 255, 255),
+        "green": (0, 255, 0),
+        "blue": (255, 0, 0),
+    }
     
-    hsv_spectrum = np.zeros((height, width, 3), dtype=np.uint8)
+    with ColorSegmenter() as segmenter:
+        results = segmenter.process(img_bgr)
+        
+        print("\nНайденные объекты:")
+        for name, result in results.items():
+            print(f"   {name}: пикселей {result.pixels}, "
+                  f"объектов {len(result.boxes)}")
+            for (x, y, w, h, area), (cx, cy) in zip(result.boxes,
+                                                    result.centroids):
+                print(f"      рамка ({x}, {y}, {w}x{h}), площадь {area}, "
+                      f"центр ({cx:.0f}, {cy:.0f})")
+        
+        labeled = draw_segments(img_bgr.copy(), results, colors)
+        
+        cv2.namedWindow('Color Segmentation', cv2.WINDOW_NORMAL)
+        cv2.imshow('Color Segmentation', labeled)
+        for name, result in results.items():
+            cv2.namedWindow(f'Mask - {name}', cv2.WINDOW_NORMAL)
+            cv2.imshow(f'Mask - {name}', result.mask)
+        
+        print("\nОкна отображены. Нажмите любую клавишу...")
+        cv2.waitKey(0)
     
-    for x in range(width):
-        for y in range(height):
-            h = int(x * 179 / width)
-            s = 255
-            v = 255 - int(y * 255 / height)
-            
-            hsv_spectrum[y, x] = [h, s, v]
+    cv2.destroyAllWindows()
+
+
+def create_hsv_visualization(width=360, height=256):
+    """
+    Создание визуализации HSV цветового пространства
+    
+    width, height - размер спектра (подходит и для 4K-таблиц)
+    """
+    print("\n" + "=" * 60)
+    print("ВИЗУАЛИЗАЦИЯ: HSV цветовое пространство")
+    print("=" * 60)
+    
+    # Создание спектра HSV (строка тона и столбец яркости
+    # складываются broadcasting'ом, без цикла по пикселям)
+    hsv_spectrum_img = hsv_spectrum(width, height, fixed="s", level=255)
     
     # Конвертация в BGR
-    bgr_spectrum = cv2.cvtColor(hsv_spectrum, cv2.COLOR_HSV2BGR)
+    bgr_spectrum = cv2.cvtColor(hsv_spectrum_img, cv2.COLOR_HSV2BGR)
     
     # Добавление подписей
     labeled = bgr_spectrum.copy()
@@ -187,6 +255,14 @@ def create_hsv_visualization():
     print(f"   Ось Y: Value (255-0)")
     print(f"   Saturation: 255 (константа)")
     print(f"\nСохранено: {output_path}")
+    
+    # Дополнительные таблицы: круг тон/насыщенность и атлас куба HSV
+    disc_path = "output/hsv_disc.png"
+    atlas_path = "output/hsv_cube_atlas.png"
+    cv2.imwrite(disc_path, cv2.cvtColor(hsv_disc(), cv2.COLOR_HSV2BGR))
+    cv2.imwrite(atlas_path, cv2.cvtColor(hsv_cube_atlas(), cv2.COLOR_HSV2BGR))
+    print(f"Сохранено: {disc_path}")
+    print(f"Сохранено: {atlas_path}")
     print("\nНажмите любую клавишу...")
     
     cv2.waitKey(0)
@@ -216,6 +292,11 @@ def main():
         # Раздельные каналы
         show_hsv_channels_separately()
         
+        input("\nНажмите Enter для сегментации по цвету...")
+        
+        # Выделение объектов по цвету
+        show_color_segmentation()
+        
         input("\nНажмите Enter для визуализации...")
         
         # Визуализация
@@ -2,27 +2,45 @@ import os
 import cv2
 import numpy as np
 
+from frame_bus import BusCapture
+from frame_source import open_source
+from overlay import Overlay
+from snapshot_saver import SnapshotSaver
 
-def draw_cross_on_camera():
+# Сколько кадров сохраняется по одному нажатию SPACE
+SNAPSHOT_BURST = 1
+
+
+def draw_cross_on_camera(snapshot_format="png", snapshot_level=None,
+                         burst=SNAPSHOT_BURST, source=0, bus_name=None):
     """
     Задание 6: Захват изображения с камеры и рисование красного креста
+    
+    snapshot_format - формат снимков: png, jpg или webp
+    snapshot_level - уровень сжатия PNG или качество JPEG/WebP
+    burst - сколько кадров подряд сохраняет одно нажатие SPACE
+    source - номер камеры, видеофайл (по кругу), папка изображений или
+    "synthetic[:узор]" - см. frame_source.open_source
+    bus_name - читать кадры из шины общей памяти (frame_bus) вместо
+    камеры, чтобы камеру одновременно использовали несколько процессов
     """
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 6: Изображение с камеры + красный крест")
     print("=" * 60)
     
-    # Открываем веб-камеру (0 - первая камера)
-    cap = cv2.VideoCapture(0)
+    # Открываем источник кадров (0 - первая камера, разрешение 640x480)
+    # или шину кадров; предпросмотру нужен самый свежий кадр,
+    # промежуточные пропускаются
+    if bus_name is not None:
+        cap = BusCapture(bus_name, latest=True)
+    else:
+        cap = open_source(source, frame_size=(640, 480))
     
     if not cap.isOpened():
         print("Ошибка: не удалось открыть камеру")
         print("Убедитесь, что камера подключена и не используется другим приложением")
         return
     
-    # Устанавливаем разрешение (опционально)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     
@@ -42,52 +60,63 @@ def draw_cross_on_camera():
     horizontal_width = 180  # ширина горизонтальной части
     horizontal_height = 60  # высота горизонтальной части
     
+    # Вычисляем центр изображения
+    center_x = width // 2
+    center_y = height // 2
+    
+    # Крест и текст рисуются один раз в спрайты; в цикле они только
+    # накладываются на кадр внутри своих рамок, без копии кадра
+    overlay = Overlay((width, height))
+    
+    # Вертикальная часть креста
+    overlay.add_rectangle(
+        (center_x - vertical_width // 2, center_y - vertical_height // 2),
+        (center_x + vertical_width // 2, center_y + vertical_height // 2),
+        cross_color,
+        cross_thickness
+    )
+    
+    # Горизонтальная часть креста
+    overlay.add_rectangle(
+        (center_x - horizontal_width // 2, center_y - horizontal_height // 2),
+        (center_x + horizontal_width // 2, center_y + horizontal_height // 2),
+        cross_color,
+        cross_thickness
+    )
+    
+    # Текст с инструкцией
+    overlay.add_text(
+        "SPACE - snapshot, ESC - exit",
+        (10, 30),
+        0.7,
+        (0, 255, 0),
+        2
+    )
+    
     cv2.namedWindow('Camera with Cross', cv2.WINDOW_NORMAL)
     
-    snapshot_count = 0
+    # Снимки кодируются и записываются в фоне, не останавливая предпросмотр
+    def on_snapshot(path, latency, error):
+        if error is None:
+            print(f"Снимок сохранён: {path} ({latency * 1000:.0f} мс)")
+        else:
+            print(f"Ошибка сохранения снимка: {error}")
+    
+    saver = SnapshotSaver("output", "camera_snapshot", snapshot_format,
+                          snapshot_level, on_complete=on_snapshot)
+    
+    # Буфер кадра переиспользуется захватом
+    frame_with_cross = None
     
     while True:
-        ret, frame = cap.read()
+        ret, frame_with_cross = cap.read(frame_with_cross)
         
         if not ret:
             print("Ошибка: не удалось захватить кадр")
             break
         
-        # Создаём копию для рисования
-        frame_with_cross = frame.copy()
-        
-        # Вычисляем центр изображения
-        center_x = width // 2
-        center_y = height // 2
-        
-        # Рисуем вертикальную часть креста
-        cv2.rectangle(
-            frame_with_cross,
-            (center_x - vertical_width // 2, center_y - vertical_height // 2),
-            (center_x + vertical_width // 2, center_y + vertical_height // 2),
-            cross_color,
-            cross_thickness
-        )
-        
-        # Рисуем горизонтальную часть креста
-        cv2.rectangle(
-            frame_with_cross,
-            (center_x - horizontal_width // 2, center_y - horizontal_height // 2),
-            (center_x + horizontal_width // 2, center_y + horizontal_height // 2),
-            cross_color,
-            cross_thickness
-        )
-        
-        # Добавляем текст с инструкцией
-        cv2.putText(
-            frame_with_cross,
-            "SPACE - snapshot, ESC - exit",
-            (10, 30),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.7,
-            (0, 255, 0),
-            2
-        )
+        # Чистый кадр не нужен, поэтому рисуем прямо в буфере захвата
+        overlay.apply(frame_with_cross)
         
         # Отображаем
         cv2.imshow('Camera with Cross', frame_with_cross)
@@ -99,16 +128,18 @@ def draw_cross_on_camera():
             print("\nВыход из программы")
             break
         elif key == 32:  # SPACE
-            snapshot_count += 1
-            filename = f"output/camera_snapshot_{snapshot_count}.png"
-            cv2.imwrite(filename, frame_with_cross)
-            print(f"Снимок сохранён: {filename}")
+            saver.start_burst(burst)
+        
+        # Кадры серии (начиная с текущего) уходят в очередь записи
+        saver.feed(frame_with_cross)
     
-    # Освобождение ресурсов
+    # Освобождение ресурсов (close() дописывает оставшиеся снимки)
     cap.release()
     cv2.destroyAllWindows()
+    saver.close()
     
-    print(f"\nВсего снимков: {snapshot_count}")
+    print(f"\nВсего снимков: {saver.saved}")
+    saver.print_stats()
 
 
 def draw_cross_static_image():
@@ -1,58 +1,132 @@
 import cv2
+import numpy as np
 import os
+import time
 from datetime import datetime
 
+from async_writer import AsyncVideoWriter, OVERFLOW_DROP_OLDEST
+from frame_bus import BusCapture
+from frame_source import open_source
+from frame_timing import (ConstantRateConformer, TimestampTrack,
+                          measure_capture_fps)
+from overlay import Overlay
+from playback_clock import PlaybackClock
+from preroll_buffer import FrameRingBuffer
+from segmented_recorder import SegmentedVideoWriter
+from video_probe import probe_video
 
-def record_video_from_camera():
+# Размер очереди кадров перед кодировщиком
+WRITER_QUEUE_SIZE = 64
+
+# Сколько кадров используется для измерения FPS камеры
+FPS_PROBE_FRAMES = 30
+
+# FPS, если измерить частоту камеры не удалось
+FALLBACK_FPS = 20.0
+
+# Длительность предзаписи (секунд до нажатия R)
+PREROLL_SECONDS = 3.0
+
+# Ротация файлов записи: новый сегмент каждые N секунд или N МБ
+SEGMENT_SECONDS = 60.0
+SEGMENT_MEGABYTES = 100
+
+# Начало имени файлов записи; политика хранения сегментов действует
+# на все записи с этим началом, а не только на текущую сессию
+RECORDING_PREFIX = "output/webcam_recording_"
+
+
+def record_video_from_camera(source=0, overflow=OVERFLOW_DROP_OLDEST,
+                             constant_rate=True,
+                             preroll_seconds=PREROLL_SECONDS,
+                             segment_seconds=SEGMENT_SECONDS,
+                             segment_megabytes=SEGMENT_MEGABYTES,
+                             retention=None, bus_name=None):
     """
     Задание 7: Захват видео с веб-камеры и запись в файл
+    
+    source - номер камеры, видеофайл (по кругу, с частотой файла),
+    папка изображений или "synthetic[:узор]" - замена камеры для тестов
+    и замеров (см. frame_source.open_source)
+    overflow - политика переполнения очереди кодировщика
+    constant_rate - дублировать/отбрасывать кадры, чтобы файл имел
+    точно постоянную частоту кадров и реальную длительность
+    preroll_seconds - сколько секунд до нажатия R попадёт в запись
+    segment_seconds, segment_megabytes - ротация файлов-сегментов
+    (None и None - один файл на всю сессию)
+    retention - RetentionPolicy для удаления старых сегментов (всех
+    записей с веб-камеры в output/, включая прошлые сессии)
+    
+    Возвращает список файлов записи (сегменты по порядку) или None.
+    bus_name - читать кадры из шины общей памяти (frame_bus) вместо
+    source; запись получает все кадры шины по порядку
     """
     print("\n" + "=" * 60)
     print("ЗАДАНИЕ 7: Запись видео с веб-камеры")
     print("=" * 60)
     
-    # Открываем веб-камеру
-    cap = cv2.VideoCapture(0)
+    # Открываем источник кадров (камера 640x480) или шину кадров
+    if bus_name is not None:
+        cap = BusCapture(bus_name)
+    else:
+        cap = open_source(source, frame_size=(640, 480))
     
     if not cap.isOpened():
         print("Ошибка: не удалось открыть камеру")
         return None
     
-    # Устанавливаем параметры
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    
     # Получаем параметры видео
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = 20.0  # Устанавливаем FPS вручную для стабильности
+    
+    # FPS измеряется по реальному захвату, а не задаётся вручную
+    print("\nИзмерение частоты кадров камеры...")
+    measured_fps = measure_capture_fps(cap, FPS_PROBE_FRAMES)
+    fps = round(measured_fps, 2) if measured_fps > 0 else FALLBACK_FPS
     
     print(f"\nПараметры камеры:")
     print(f"   Разрешение: {width}x{height}")
-    print(f"   FPS: {fps}")
+    print(f"   FPS: {fps} (измерено)" if measured_fps > 0 else f"   FPS: {fps}")
     
     # Создаём папку output
     os.makedirs("output", exist_ok=True)
     
-    # Генерируем имя файла с датой и временем
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_filename = f"output/webcam_recording_{timestamp}.avi"
-    
-    # Создаём VideoWriter
-    fourcc = cv2.VideoWriter_fourcc(*'XVID')
-    out = cv2.VideoWriter(output_filename, fourcc, fps, (width, height))
+    # Файлы создаются только при первом нажатии R
+    out = None
+    track = None
+    output_filename = None
+    timestamps_filename = None
+    conformer = ConstantRateConformer(fps) if constant_rate else None
     
-    if not out.isOpened():
-        print("Ошибка: не удалось создать VideoWriter")
-        cap.release()
-        return None
+    # Буфер предзаписи: последние секунды до нажатия R. Память выделяется
+    # один раз, при первом кадре. preroll_tag - метка последнего кадра
+    # буфера, отданного кодировщику: пока она не записана, ячейки
+    # кольца нельзя перезаписывать
+    preroll = None
+    preroll_tag = None
     
-    print(f"\nФайл для записи: {output_filename}")
     print("\nУправление:")
     print("   R - начать/остановить запись")
     print("   ESC - выход")
     print("\nОжидание команды...")
     
+    # Статичные элементы интерфейса рисуются один раз
+    idle_overlay = Overlay((width, height))
+    rec_overlay = Overlay((width, height))
+    
+    # Текст "Готов к записи"
+    idle_overlay.add_text("Press R to start recording", (10, 30),
+                          0.7, (0, 255, 0), 2)
+    # Индикатор записи (красный кружок)
+    rec_overlay.add_circle((30, 30), 15, (0, 0, 255), -1)
+    # Инструкции
+    for hud in (idle_overlay, rec_overlay):
+        hud.add_text("R - record, ESC - exit", (10, height - 20),
+                     0.6, (255, 255, 255), 1)
+    
+    # Буфер для отображения во время записи (выделяется один раз)
+    display_buffer = None
+    
     cv2.namedWindow('Webcam Recording', cv2.WINDOW_NORMAL)
     
     recording = False
@@ -60,21 +134,43 @@ def record_video_from_camera():
     
     while True:
         ret, frame = cap.read()
+        capture_time = time.monotonic()
         
         if not ret:
             print("Ошибка: не удалось захватить кадр")
             break
         
-        # Создаём копию для отображения
-        display_frame = frame.copy()
+        # Пока запись не идёт, кадры копируются в буфер предзаписи
+        if not recording and preroll_seconds > 0:
+            if preroll is None:
+                preroll = FrameRingBuffer.for_duration(preroll_seconds, fps,
+                                                       frame.shape)
+                print(f"Буфер предзаписи: {preroll.capacity} кадров "
+                      f"({preroll_seconds:.1f} с), "
+                      f"{preroll.nbytes / (1024 * 1024):.1f} МБ")
+            if preroll_tag is not None:
+                # Обычно пачка давно записана; если нет - ждём её, а не
+                # перезаписываем кадры, которые кодировщик ещё не прочитал
+                if not track.settled(preroll_tag):
+                    out.drain()
+                preroll_tag = None
+            preroll.push(frame, capture_time)
         
         # Если идёт запись
         if recording:
-            out.write(frame)
+            # Сколько раз записать кадр для постоянной частоты кадров
+            repeats = conformer.frames_for(capture_time) if conformer else 1
+            tag = track.add(capture_time, repeats)
+            for _ in range(repeats):
+                out.write(frame, tag=tag)
             frame_count += 1
             
-            # Индикатор записи (красный кружок)
-            cv2.circle(display_frame, (30, 30), 15, (0, 0, 255), -1)
+            # Кадр ушёл в очередь кодировщика чистым, поэтому интерфейс
+            # рисуется в отдельном буфере
+            if display_buffer is None:
+                display_buffer = np.empty_like(frame)
+            np.copyto(display_buffer, frame)
+            display_frame = rec_overlay.apply(display_buffer)
             cv2.putText(
                 display_frame,
                 f"REC | Frames: {frame_count}",
@@ -85,27 +181,9 @@ def record_video_from_camera():
                 2
             )
         else:
-            # Текст "Готов к записи"
-            cv2.putText(
-                display_frame,
-                "Press R to start recording",
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 0),
-                2
-            )
-        
-        # Инструкции
-        cv2.putText(
-            display_frame,
-            "R - record, ESC - exit",
-            (10, height - 20),
-            cv2.FONT_HERSHEY_SIMPLEX,
-            0.6,
-            (255, 255, 255),
-            1
-        )
+            # Кадр никуда не записывается (буфер предзаписи уже сделал
+            # свою копию) - рисуем прямо на нём
+            display_frame = idle_overlay.apply(frame)
         
         cv2.imshow('Webcam Recording', display_frame)
         
@@ -117,78 +195,211 @@ def record_video_from_camera():
             break
         elif key == ord('r') or key == ord('R'):
             recording = not recording
+            if not recording:
+                # Пауза не заполняется дублями и не портит статистику
+                track.break_interval()
+                if conformer:
+                    conformer.pause()
+            if recording and out is None:
+                # Файл открывается только когда запись действительно началась
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                output_filename = f"{RECORDING_PREFIX}{timestamp}.avi"
+                
+                # Временные метки кадров пишутся в файл рядом с видео по
+                # мере записи; номер выходного кадра подтверждает поток
+                # кодирования, поэтому отброшенные очередью кадры не
+                # сбивают дорожку
+                timestamps_filename = (os.path.splitext(output_filename)[0]
+                                       + ".timestamps.csv")
+                track = TimestampTrack(timestamps_filename,
+                                       confirm_writes=True)
+                
+                # Кодирование идёт в отдельном потоке,
+                # чтобы медленная запись не задерживала захват кадров
+                if segment_seconds is None and segment_megabytes is None:
+                    out = AsyncVideoWriter(output_filename, 'XVID', fps,
+                                           (width, height),
+                                           queue_size=WRITER_QUEUE_SIZE,
+                                           overflow=overflow,
+                                           on_written=track.written,
+                                           on_dropped=track.dropped)
+                else:
+                    # Сегменты <имя>_0001.avi, <имя>_0002.avi, ...
+                    max_bytes = (int(segment_megabytes * 1024 * 1024)
+                                 if segment_megabytes is not None else None)
+                    out = SegmentedVideoWriter(output_filename, 'XVID', fps,
+                                               (width, height),
+                                               max_seconds=segment_seconds,
+                                               max_bytes=max_bytes,
+                                               retention=retention,
+                                               retention_prefix=RECORDING_PREFIX,
+                                               queue_size=WRITER_QUEUE_SIZE,
+                                               overflow=overflow,
+                                               on_written=track.written,
+                                               on_dropped=track.dropped)
+                
+                if not out.isOpened():
+                    print("Ошибка: не удалось создать VideoWriter")
+                    out = None
+                    recording = False
+                    track.close()
+                    os.remove(timestamps_filename)
+                    track = None
+                    continue
+                
+                print(f"\nФайл для записи: {out.path}")
             if recording:
+                # Сначала в файл уходят кадры из буфера предзаписи:
+                # одной пачкой без копирования и без ожидания
+                # кодировщика. Пачка ссылается на ячейки кольца, поэтому
+                # после паузы кольцо заполняется только когда она записана
+                if preroll is not None and len(preroll) > 0:
+                    batch_frames = []
+                    batch_tags = []
+                    for preroll_frame, preroll_time in preroll.frames():
+                        repeats = (conformer.frames_for(preroll_time)
+                                   if conformer else 1)
+                        tag = track.add(preroll_time, repeats)
+                        batch_frames.extend([preroll_frame] * repeats)
+                        batch_tags.extend([tag] * repeats)
+                        frame_count += 1
+                    out.write_batch(batch_frames, batch_tags)
+                    preroll_tag = tag
+                    preroll.clear()
                 print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Запись началась...")
             else:
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Запись остановлена. Записано кадров: {frame_count}")
     
-    # Освобождение ресурсов
+    # Освобождение ресурсов (release() дописывает очередь)
     cap.release()
-    out.release()
     cv2.destroyAllWindows()
     
+    if out is None:
+        print("\nЗапись не производилась")
+        return None
+    
+    out.release()
+    track.close()
+    
+    writer_stats = out.stats()
+    if writer_stats["dropped"] > 0:
+        print(f"\nКодировщик не успевал: отброшено кадров {writer_stats['dropped']}")
+    print(f"Максимальная глубина очереди записи: {writer_stats['max_depth']}")
+    frame_count = writer_stats["written"]
+    
+    # Файлы записи: один файл или список сегментов
+    if isinstance(out, SegmentedVideoWriter):
+        output_files = list(out.segments)
+    else:
+        output_files = [output_filename] if os.path.exists(output_filename) else []
+    
     # Проверяем результат
-    if frame_count > 0 and os.path.exists(output_filename):
-        file_size = os.path.getsize(output_filename) / (1024 * 1024)
+    if frame_count > 0 and output_files:
+        file_size = sum(os.path.getsize(f) for f in output_files) / (1024 * 1024)
         print(f"\nЗапись завершена:")
-        print(f"   Файл: {output_filename}")
+        if len(output_files) == 1:
+            print(f"   Файл: {output_files[0]}")
+        else:
+            print(f"   Сегментов: {len(output_files)} "
+                  f"({output_files[0]} ... {output_files[-1]})")
+        if writer_stats.get("removed"):
+            print(f"   Удалено политикой хранения: {writer_stats['removed']}")
+        print(f"   Временные метки: {timestamps_filename}")
         print(f"   Кадров: {frame_count}")
         print(f"   Размер: {file_size:.2f} МБ")
         print(f"   Длительность: {frame_count / fps:.1f} секунд")
-        return output_filename
+        
+        timing = track.stats()
+        print(f"\nСтатистика захвата:")
+        print(f"   Эффективная частота: {timing['effective_fps']:.2f} кадров/сек")
+        for p, value in timing["jitter_ms"].items():
+            print(f"   Джиттер p{p}: {value:.2f} мс "
+                  f"(интервал p{p}: {timing['interval_ms'][p]:.2f} мс)")
+        if conformer:
+            print(f"   Продублировано кадров: {conformer.duplicated}")
+            print(f"   Отброшено кадров: {conformer.dropped}")
+        return output_files
     else:
         print("\nЗапись не производилась или файл пуст")
-        if os.path.exists(output_filename):
-            os.remove(output_filename)
+        for filename in output_files + [output_filename, timestamps_filename]:
+            if os.path.exists(filename):
+                os.remove(filename)
         return None
 
 
-def playback_recorded_video(filename):
+def playback_recorded_video(filenames):
     """
     Воспроизведение записанного видео
+    
+    filenames - файл или список файлов-сегментов, они воспроизводятся
+    подряд как одно видео
     """
     print("\n" + "=" * 60)
     print("ВОСПРОИЗВЕДЕНИЕ ЗАПИСАННОГО ВИДЕО")
     print("=" * 60)
     
-    if filename is None or not os.path.exists(filename):
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    if not filenames or not all(os.path.exists(f) for f in filenames):
         print("Ошибка: файл не найден или не был создан")
         return
     
-    cap = cv2.VideoCapture(filename)
-    
-    if not cap.isOpened():
-        print("Ошибка: не удалось открыть видео файл")
-        return
-    
-    # Информация о файле
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    # Информация о файлах (из кеша метаданных)
+    infos = [probe_video(f) for f in filenames]
+    width, height = infos[0].width, infos[0].height
+    fps = infos[0].fps
+    frame_count = sum(info.frame_count for info in infos)
     
     print(f"\nИнформация о файле:")
+    if len(filenames) > 1:
+        print(f"   Сегментов: {len(filenames)}")
     print(f"   Разрешение: {width}x{height}")
     print(f"   FPS: {fps:.2f}")
     print(f"   Кадров: {frame_count}")
     print(f"   Длительность: {frame_count/fps:.1f} секунд")
     print("\nВоспроизведение (ESC - выход)...")
     
+    segment = 0
+    cap = cv2.VideoCapture(filenames[segment])
+    
+    if not cap.isOpened():
+        print("Ошибка: не удалось открыть видео файл")
+        return
+    
     cv2.namedWindow('Playback', cv2.WINDOW_NORMAL)
     
     current_frame = 0
     
+    # Часы воспроизведения учитывают время декодирования и отрисовки
+    clock = PlaybackClock(fps if fps > 0 else 30.0)
+    
     while True:
         ret, frame = cap.read()
         
         if not ret:
-            print("\nВидео закончилось, перезапуск...")
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            current_frame = 0
+            # Следующий сегмент продолжает то же видео без сброса часов
+            cap.release()
+            segment += 1
+            if segment == len(filenames):
+                if current_frame == 0:
+                    print("Ошибка: в файлах нет кадров")
+                    break
+                print("\nВидео закончилось, перезапуск...")
+                segment = 0
+                current_frame = 0
+                clock.reset()
+            cap = cv2.VideoCapture(filenames[segment])
+            if not cap.isOpened():
+                print(f"Ошибка: не удалось открыть {filenames[segment]}")
+                break
             continue
         
         current_frame += 1
         
+        # Опоздавший кадр пропускаем, чтобы не отставать от реального времени
+        if not clock.should_display():
+            continue
+        
         # Добавляем счётчик кадров
         cv2.putText(
             frame,
@@ -202,13 +413,12 @@ def playback_recorded_video(filename):
         
         cv2.imshow('Playback', frame)
         
-        # Задержка для корректного FPS
-        delay = int(1000 / fps) if fps > 0 else 30
-        
-        if cv2.waitKey(delay) & 0xFF == 27:  # ESC
+        # Задержка до времени показа следующего кадра
+        if cv2.waitKey(clock.wait_ms()) & 0xFF == 27:  # ESC
             print("\nВоспроизведение остановлено")
             break
     
+    clock.print_stats()
     cap.release()
     cv2.destroyAllWindows()
 
@@ -224,12 +434,12 @@ def main():
     
     try:
         # Шаг 1: Запись видео
-        recorded_file = record_video_from_camera()
+        recorded_files = record_video_from_camera()
         
         # Шаг 2: Воспроизведение
-        if recorded_file:
+        if recorded_files:
             input("\nНажмите Enter для воспроизведения записанного видео...")
-            playback_recorded_video(recorded_file)
+            playback_recorded_video(recorded_files)
         
         print("\n" + "=" * 60)
         print("ЗАДАНИЕ 7 ЗАВЕРШЕНО")
@@ -0,0 +1,129 @@
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+# Модули лежат в корне репозитория, рядом с task_*.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import video_probe  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """
+    Каждый тест работает во временной папке: пути по умолчанию
+    ("output/...") не попадают в репозиторий, кеш индексов пустой
+    """
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(video_probe, "_loaded_indexes", {})
+    return tmp_path
+
+
+def synthetic_frames(count, frame_size=(160, 120)):
+    """
+    Список различимых кадров: сдвигающийся цветной градиент с номером
+    """
+    width, height = frame_size
+    hsv = np.empty((height, 2 * width, 3), np.uint8)
+    hsv[..., 0] = np.arange(2 * width) % width * 180 // width
+    hsv[..., 1] = 255
+    hsv[..., 2] = np.linspace(255, 64, height).astype(np.uint8)[:, None]
+    base = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+    frames = []
+    for i in range(count):
+        offset = i * 4 % width
+        frame = base[:, offset:offset + width].copy()
+        cv2.putText(frame, str(i), (10, height - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        frames.append(frame)
+    return frames
+
+
+def write_video(path, frames, fourcc="MJPG", fps=25.0):
+    height, width = frames[0].shape[:2]
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc),
+                             fps, (width, height))
+    assert writer.isOpened(), f"VideoWriter {fourcc} недоступен"
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    return str(path)
+
+
+def read_all(path):
+    cap = cv2.VideoCapture(str(path))
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+@pytest.fixture
+def frames():
+    return synthetic_frames(40)
+
+
+@pytest.fixture
+def video_path(tmp_path, frames):
+    """
+    Короткое MJPG-видео 160x120, 40 кадров, 25 fps
+    """
+    return write_video(tmp_path / "input.avi", frames)
+
+
+@pytest.fixture
+def gop_video_path(tmp_path):
+    """
+    Видео с межкадровым сжатием (ключевые кадры не на каждом кадре)
+    """
+    return write_video(tmp_path / "gop.avi", synthetic_frames(90), "XVID")
+
+
+class ListCapture:
+    """
+    Минимальная замена VideoCapture над списком кадров
+    """
+
+    def __init__(self, frames, fps=25.0):
+        self.frames = frames
+        self.fps = fps
+        self.position = 0
+        self.released = False
+
+    def isOpened(self):
+        return not self.released
+
+    def read(self, image=None):
+        if self.position >= len(self.frames):
+            return False, None
+        frame = self.frames[self.position]
+        self.position += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame
+
+    def get(self, prop):
+        height, width = self.frames[0].shape[:2]
+        return {cv2.CAP_PROP_FRAME_WIDTH: float(width),
+                cv2.CAP_PROP_FRAME_HEIGHT: float(height),
+                cv2.CAP_PROP_FPS: self.fps,
+                cv2.CAP_PROP_FRAME_COUNT: float(len(self.frames)),
+                cv2.CAP_PROP_POS_FRAMES: float(self.position)}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_POS_FRAMES:
+            self.position = int(value)
+            return True
+        return False
+
+    def release(self):
+        self.released = True
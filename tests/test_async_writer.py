@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+import async_writer
+from async_writer import (OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST,
+                          AsyncVideoWriter)
+from conftest import read_all
+
+
+def open_writer(path, **kwargs):
+    return AsyncVideoWriter(str(path), "MJPG", 25.0, (160, 120), **kwargs)
+
+
+def test_writes_every_frame_and_reports_tags(tmp_path, frames):
+    written = []
+    writer = open_writer(tmp_path / "out.avi", on_written=written.append)
+
+    for i, frame in enumerate(frames[:10]):
+        assert writer.write(frame, tag=i)
+    writer.write_batch(frames[10:15], tags=list(range(10, 15)))
+    writer.release()
+
+    assert written == list(range(15))
+    assert writer.stats()["written"] == 15
+    assert len(read_all(tmp_path / "out.avi")) == 15
+
+
+def blocked_writer(path, overflow, tags, dropped):
+    """
+    Писатель, поток кодирования которого стоит до gate.set()
+    """
+    gate = threading.Event()
+
+    def on_written(tag):
+        gate.wait(5)
+        tags.append(tag)
+
+    writer = open_writer(path, queue_size=2, overflow=overflow,
+                         on_written=on_written, on_dropped=dropped.append)
+    return writer, gate
+
+
+def test_drop_newest_keeps_queued_frames(tmp_path, frames):
+    tags, dropped = [], []
+    writer, gate = blocked_writer(tmp_path / "out.avi", OVERFLOW_DROP_NEWEST,
+                                  tags, dropped)
+    writer.write(frames[0], tag=0)
+    # Кадр 0 уже у кодировщика, очередь на два кадра
+    while writer.depth():
+        time.sleep(0.001)
+    results = [writer.write(frames[i], tag=i) for i in range(1, 6)]
+    gate.set()
+    writer.release()
+
+    assert results == [True, True, False, False, False]
+    assert tags == [0, 1, 2]
+    assert dropped == [3, 4, 5]
+    assert writer.dropped == 3
+
+
+def test_drop_oldest_keeps_newest_frames(tmp_path, frames):
+    tags, dropped = [], []
+    writer, gate = blocked_writer(tmp_path / "out.avi", OVERFLOW_DROP_OLDEST,
+                                  tags, dropped)
+    writer.write(frames[0], tag=0)
+    while writer.depth():
+        time.sleep(0.001)
+    for i in range(1, 6):
+        assert writer.write(frames[i], tag=i)
+    gate.set()
+    writer.release()
+
+    assert tags == [0, 4, 5]
+    assert dropped == [1, 2, 3]
+    assert writer.stats()["dropped"] == 3
+
+
+def test_unknown_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        open_writer(tmp_path / "out.avi", overflow="spill")
+
+
+def test_callback_errors_do_not_stop_the_writer(tmp_path, frames):
+    def on_written(tag):
+        if tag == 1:
+            raise RuntimeError("callback failed")
+
+    writer = open_writer(tmp_path / "out.avi", on_written=on_written)
+    for i in range(4):
+        writer.write(frames[i], tag=i)
+    writer.drain()
+    writer.write(frames[4], tag=4)
+    writer.release()
+
+    assert isinstance(writer.error, RuntimeError)
+    assert writer.stats()["written"] == 5
+
+
+def test_bad_item_does_not_stop_the_writer(tmp_path, frames):
+    writer = open_writer(tmp_path / "out.avi")
+    # Пачка без меток - ошибка распаковки в потоке записи
+    writer._queue.put(async_writer._Batch([frames[0]]))
+    writer.write(frames[1])
+    writer.drain()
+    writer.release()
+
+    assert writer.error is not None
+    assert writer.stats()["written"] == 1
+
+
+def test_drop_oldest_never_drops_batches(tmp_path, frames):
+    tags, dropped = [], []
+    writer, gate = blocked_writer(tmp_path / "out.avi", OVERFLOW_DROP_OLDEST,
+                                  tags, dropped)
+    writer.write(frames[0], tag=0)
+    while writer.depth():
+        time.sleep(0.001)
+    writer.write_batch(frames[1:4], tags=[1, 2, 3])
+    # Очередь полна: вместо пачки отбрасывается кадр 4
+    for i in (4, 5):
+        assert writer.write(frames[i], tag=i)
+    gate.set()
+    writer.release()
+
+    assert tags == [0, 1, 2, 3, 5]
+    assert dropped == [4]
+
+
+def test_drop_oldest_with_only_batches_drops_new_frame(tmp_path, frames):
+    tags, dropped = [], []
+    writer, gate = blocked_writer(tmp_path / "out.avi", OVERFLOW_DROP_OLDEST,
+                                  tags, dropped)
+    writer.write(frames[0], tag=0)
+    while writer.depth():
+        time.sleep(0.001)
+    writer.write_batch(frames[1:3], tags=[1, 2])
+    writer.write_batch(frames[3:5], tags=[3, 4])
+    assert not writer.write(frames[5], tag=5)
+    gate.set()
+    writer.release()
+
+    assert tags == [0, 1, 2, 3, 4]
+    assert dropped == [5]
+    assert writer.stats()["dropped"] == 1
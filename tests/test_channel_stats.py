@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from channel_stats import (EwmaChannelStats, RollingChannelStats,
+                           channel_histograms, channel_stats, monitor_stream,
+                           white_balance_gains)
+from conftest import ListCapture
+
+
+def test_stats_match_numpy(frames):
+    img = frames[3]
+    stats = channel_stats(img)
+
+    for c, s in enumerate(stats):
+        channel = img[:, :, c]
+        assert (s.min, s.max) == (channel.min(), channel.max())
+        assert s.mean == pytest.approx(channel.mean())
+        assert s.std == pytest.approx(channel.std(), abs=1e-3)
+        assert s.clipped_high == pytest.approx((channel == 255).mean())
+
+
+def test_histograms_of_grayscale_and_buffer(frames):
+    gray = frames[0][:, :, 0].copy()
+    out = np.empty((1, 256), np.float32)
+    hist = channel_histograms(gray, out)
+    assert hist is out
+    assert np.array_equal(hist[0], np.bincount(gray.ravel(), minlength=256))
+
+
+def test_rolling_window_forgets_old_frames():
+    rolling = RollingChannelStats(window=2, channels=3)
+    for value in (10, 20, 30):
+        stats = rolling.update(np.full((4, 4, 3), value, np.uint8))
+
+    assert rolling.count == 2
+    assert (stats[0].min, stats[0].max) == (20, 30)
+    assert stats[0].mean == pytest.approx(25.0)
+
+
+def test_ewma_range_follows_current_frame():
+    ewma = EwmaChannelStats(alpha=0.5)
+    wide = np.zeros((4, 4, 3), np.uint8)
+    wide[0] = 200
+    ewma.update(wide)
+    stats = ewma.update(np.full((4, 4, 3), 50, np.uint8))
+
+    assert (stats[0].min, stats[0].max) == (50, 50)
+    # Среднее сглажено: (0.75*0 + 0.25*200) и 50 поровну
+    assert stats[0].mean == pytest.approx(0.5 * 50 + 0.5 * 50)
+
+
+def test_white_balance_gains():
+    stats = channel_stats(np.dstack([np.full((2, 2), v, np.uint8)
+                                     for v in (50, 100, 150)]))
+    assert white_balance_gains(stats) == pytest.approx([2.0, 1.0, 2 / 3])
+
+
+def test_monitor_stream(frames):
+    results = list(monitor_stream(ListCapture(frames[:5]), window=3))
+    assert [i for i, _, _ in results] == list(range(5))
@@ -0,0 +1,55 @@
+import csv
+import json
+import os
+
+import numpy as np
+import pytest
+
+import codec_bench
+from codec_bench import (decode_to_shared_memory, run_codec_matrix,
+                         save_report, ssim)
+from video_probe import VideoInfo
+
+
+def test_ssim_of_identical_and_different_images(frames):
+    assert ssim(frames[0], frames[0]) == pytest.approx(1.0)
+    noise = np.random.default_rng(0).integers(0, 256, frames[0].shape,
+                                              dtype=np.uint8)
+    assert ssim(frames[0], noise) < 0.5
+
+
+def test_codec_matrix_measures_each_codec(tmp_path, video_path):
+    results = run_codec_matrix(video_path, [("MJPG", "avi"), ("XVID", "avi")],
+                               max_frames=15, output_dir=str(tmp_path),
+                               workers=1)
+
+    assert [r["codec"] for r in results] == ["MJPG", "XVID"]
+    for result in results:
+        assert result["error"] is None
+        assert result["frames"] == 15
+        assert result["encode_fps"] > 0
+        assert os.path.getsize(result["path"]) == result["size_bytes"]
+        assert result["psnr"] > 25
+        assert 0.8 < result["ssim"] <= 1.0
+
+
+@pytest.mark.parametrize("width, frame_count, max_frames",
+                         [(0, 10, 10), (160, 10, 0)])
+def test_empty_source_is_an_io_error(monkeypatch, video_path, width,
+                                     frame_count, max_frames):
+    info = VideoInfo(width, 120, 25.0, frame_count, "", "")
+    monkeypatch.setattr(codec_bench, "probe_video", lambda path: info)
+
+    with pytest.raises(IOError, match="нет кадров"):
+        decode_to_shared_memory(video_path, max_frames)
+
+
+def test_save_report(tmp_path):
+    results = [{"codec": "MJPG", "frames": 3, "psnr": 40.0, "error": None}]
+    save_report(results, str(tmp_path / "r.csv"), str(tmp_path / "r.json"))
+
+    with open(tmp_path / "r.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows[0]["codec"] == "MJPG" and rows[0]["psnr"] == "40.0"
+    with open(tmp_path / "r.json", encoding="utf-8") as f:
+        assert json.load(f) == results
@@ -0,0 +1,36 @@
+import cv2
+import numpy as np
+
+from color_engine import COLOR_MODES, MultiColorConverter, color_stream
+from conftest import ListCapture
+
+
+def test_matches_cvtcolor_for_every_mode(frames):
+    with MultiColorConverter() as converter:
+        results = converter.process(frames[0])
+
+    assert list(results) == [name for name, _ in COLOR_MODES]
+    for name, code in COLOR_MODES:
+        expected = frames[0] if code is None else cv2.cvtColor(frames[0], code)
+        assert np.array_equal(results[name], expected)
+
+
+def test_buffers_follow_frame_size(frames):
+    modes = [("HSV", cv2.COLOR_BGR2HSV)]
+    with MultiColorConverter(modes) as converter:
+        small = converter.process(frames[0])["HSV"]
+        again = converter.process(frames[1])["HSV"]
+        larger = converter.process(cv2.resize(frames[2], (320, 240)))["HSV"]
+
+    assert again is small
+    assert larger.shape == (240, 320, 3)
+
+
+def test_color_stream_yields_numbered_results(frames):
+    modes = [("Gray", cv2.COLOR_BGR2GRAY)]
+    seen = [(i, result["Gray"].copy())
+            for i, result in color_stream(ListCapture(frames[:4]), modes)]
+
+    assert [i for i, _ in seen] == [0, 1, 2, 3]
+    assert np.array_equal(seen[2][1], cv2.cvtColor(frames[2],
+                                                   cv2.COLOR_BGR2GRAY))
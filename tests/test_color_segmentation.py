@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+
+from color_segmentation import (ColorRange, ColorSegmenter, draw_segments,
+                                segment_images)
+
+
+def scene():
+    img = np.zeros((120, 160, 3), np.uint8)
+    img[10:40, 20:60] = (255, 0, 0)      # синий прямоугольник 40x30
+    img[70:100, 100:150] = (0, 0, 255)   # красный (тон около 0)
+    img[5:7, 150:152] = (255, 0, 0)      # синий шум 2x2
+    return img
+
+
+def test_finds_objects_per_range():
+    with ColorSegmenter(min_area=50) as segmenter:
+        results = segmenter.process(scene())
+
+    # Открытие эллипсом скругляет углы, рамка при этом не меняется;
+    # шум 2x2 убран морфологией
+    blue = results["blue"]
+    (box,) = blue.boxes
+    assert box[:4] == (20, 10, 40, 30)
+    assert 1150 < box[4] <= 1200
+    assert blue.pixels == box[4]
+    assert blue.centroids[0] == (39.5, 24.5)
+    assert [b[:4] for b in results["red"].boxes] == [(100, 70, 50, 30)]
+    assert results["green"].boxes == []
+
+
+def test_wrapping_hue_range_covers_both_ends():
+    img = np.zeros((20, 40, 3), np.uint8)
+    hsv = np.zeros_like(img)
+    hsv[:, :20] = (175, 255, 255)
+    hsv[:, 20:] = (3, 255, 255)
+    img = cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
+
+    reds = [ColorRange("red", (170, 100, 100), (10, 255, 255))]
+    with ColorSegmenter(reds, min_area=1, kernel_size=0) as segmenter:
+        result = segmenter.process(img)["red"]
+    assert result.pixels == 20 * 40
+
+
+def test_segment_images_and_drawing():
+    img = scene()
+    (_, _, results), = list(segment_images([img], min_area=50))
+    drawn = draw_segments(img.copy(), results, {"blue": (0, 255, 0)})
+    assert (drawn[10, 20] == (0, 255, 0)).all()
@@ -0,0 +1,106 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import display_sinks
+from conftest import synthetic_frames, write_video
+from display_sinks import (ESC_KEY, FileSink, HighGuiSink, NullSink,
+                           create_sink, get_display, set_display,
+                           sink_from_env)
+
+
+@pytest.fixture(autouse=True)
+def no_display(monkeypatch):
+    # Текущий приёмник - глобальный, каждый тест начинает без него
+    monkeypatch.setattr(display_sinks, "_display", None)
+
+
+def test_null_sink_counts_and_stops_after_limit():
+    sink = NullSink(frame_limit=3)
+    sink.named_window("a")
+    keys = []
+    for _ in range(3):
+        sink.show("a", np.zeros((2, 2, 3), np.uint8))
+        keys.append(sink.wait_key(1000))
+
+    assert keys == [-1, -1, ESC_KEY]
+    assert sink.frames_shown == 3
+    # Новое окно - новый отсчёт
+    sink.named_window("b")
+    assert sink.wait_key() == -1
+
+
+def test_file_sink_writes_every_nth_frame(tmp_path):
+    sink = FileSink(str(tmp_path / "shots"), ext="png", every=2)
+    for frame in synthetic_frames(5, (32, 24)):
+        sink.show("Video: 1/2", frame)
+
+    names = sorted(os.listdir(tmp_path / "shots"))
+    assert names == ["Video_1_2_000001.png", "Video_1_2_000003.png",
+                     "Video_1_2_000005.png"]
+    assert sink.files_written == 3 and sink.frames_per_window == {
+        "Video: 1/2": 5}
+
+
+def test_sink_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("CV_DISPLAY", "file")
+    monkeypatch.setenv("CV_DISPLAY_DIR", str(tmp_path / "env"))
+    sink = sink_from_env()
+    assert isinstance(sink, FileSink)
+    assert sink.frame_limit == 300 and sink.output_dir == str(tmp_path / "env")
+
+    monkeypatch.setenv("CV_DISPLAY", "highgui")
+    monkeypatch.setenv("CV_DISPLAY_NO_WAIT", "1")
+    monkeypatch.setenv("CV_DISPLAY_FRAME_LIMIT", "7")
+    sink = sink_from_env()
+    assert isinstance(sink, HighGuiSink)
+    assert (sink.no_wait, sink.frame_limit) == (True, 7)
+
+    with pytest.raises(ValueError):
+        create_sink("window")
+
+
+def test_get_display_is_created_once_and_replaceable(monkeypatch):
+    monkeypatch.setenv("CV_DISPLAY", "null")
+    first = get_display()
+    assert isinstance(first, NullSink) and get_display() is first
+
+    replacement = NullSink()
+    set_display(replacement)
+    assert display_sinks.get_display() is replacement
+
+
+@pytest.fixture
+def headless():
+    sink = NullSink(frame_limit=15)
+    set_display(sink)
+    return sink
+
+
+def test_task_3_playback_runs_headless(headless):
+    import task_3
+
+    os.makedirs("videos")
+    write_video("videos/test_video.mp4", synthetic_frames(10, (64, 48)),
+                "mp4v")
+
+    task_3.play_video_original()
+
+    # Видео по кругу, пока NullSink не вернёт ESC на 15-м кадре
+    assert headless.frames_per_window["Original Video"] == 15
+
+
+def test_task_2_image_tests_run_headless(tmp_path, frames):
+    import task_2
+
+    sink = FileSink(str(tmp_path / "shown"), frame_limit=50)
+    set_display(sink)
+    os.makedirs("images")
+    cv2.imwrite("images/test_image.png", frames[0])
+
+    task_2.test_imread_flags()
+
+    assert sink.frames_shown == 3
+    assert len(os.listdir(tmp_path / "shown")) == 3
@@ -0,0 +1,66 @@
+import cv2
+import numpy as np
+import pytest
+
+import effect_graph
+from conftest import read_all
+from effect_graph import EffectGraph, register_effect
+
+
+def test_all_branches_from_one_decode(tmp_path, video_path):
+    graph = EffectGraph(25.0, fourcc="MJPG")
+    gray = graph.add_branch("grayscale", str(tmp_path / "gray.avi"))
+    small = graph.add_branch("resized", str(tmp_path / "small.avi"))
+
+    cap = cv2.VideoCapture(video_path)
+    decoded = graph.run(cap, max_frames=12)
+    cap.release()
+
+    assert decoded == 12
+    assert (gray.frames, gray.error) == (12, None)
+    assert small.frames == 12
+    assert read_all(tmp_path / "small.avi")[0].shape == (60, 80, 3)
+
+
+def test_second_run_starts_fresh(tmp_path, video_path):
+    graph = EffectGraph(25.0, fourcc="MJPG")
+    branch = graph.add_branch("flipped", str(tmp_path / "flip.avi"))
+
+    for count in (10, 5):
+        cap = cv2.VideoCapture(video_path)
+        assert graph.run(cap, max_frames=count) == count
+        cap.release()
+        assert branch.frames == count
+
+    assert len(read_all(tmp_path / "flip.avi")) == 5
+
+
+def test_branch_error_does_not_stop_others(tmp_path, video_path,
+                                           monkeypatch):
+    # Реестр эффектов общий: тест работает с его копией
+    monkeypatch.setattr(effect_graph, "EFFECTS", dict(effect_graph.EFFECTS))
+
+    def broken(frame):
+        raise RuntimeError("effect failed")
+
+    register_effect("broken", broken)
+    graph = EffectGraph(25.0, fourcc="MJPG")
+    bad = graph.add_branch("broken", str(tmp_path / "bad.avi"))
+    good = graph.add_branch("grayscale", str(tmp_path / "gray.avi"))
+
+    cap = cv2.VideoCapture(video_path)
+    graph.run(cap, max_frames=5)
+    cap.release()
+
+    assert isinstance(bad.error, RuntimeError)
+    assert good.frames == 5
+
+
+def test_configuration_errors():
+    graph = EffectGraph(25.0)
+    with pytest.raises(ValueError):
+        graph.run(None)
+    with pytest.raises(KeyError):
+        graph.add_branch("sepia", "out.avi")
+    with pytest.raises(TypeError):
+        register_effect("nothing", np.zeros(1))
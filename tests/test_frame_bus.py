@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+import pytest
+
+import frame_bus
+from conftest import ListCapture
+from frame_bus import (BusCapture, FrameBusConsumer, FrameBusProducer,
+                       publish_capture, start_producer_process)
+
+
+@pytest.fixture
+def bus_name():
+    return f"test_bus_{uuid.uuid4().hex[:12]}"
+
+
+def numbered(i, shape=(6, 8, 3)):
+    return np.full(shape, i, np.uint8)
+
+
+def test_frames_arrive_in_order(bus_name):
+    with FrameBusProducer(bus_name, (6, 8, 3), capacity=8, fps=30.0) as bus:
+        consumer = FrameBusConsumer(bus_name, timeout=1)
+        assert consumer.fps == 30.0
+        for i in range(5):
+            bus.publish(numbered(i), timestamp=i / 10)
+
+        values = []
+        for _ in range(5):
+            ret, frame = consumer.read(timeout=0)
+            values.append((int(frame[0, 0, 0]), consumer.last_timestamp))
+        assert values == [(i, i / 10) for i in range(5)]
+        assert consumer.read(timeout=0) == (False, None)
+        consumer.close()
+
+
+def test_slow_consumer_skips_overwritten_frames(bus_name):
+    with FrameBusProducer(bus_name, (6, 8, 3), capacity=4) as bus:
+        consumer = FrameBusConsumer(bus_name, timeout=1, from_start=True)
+        for i in range(10):
+            bus.publish(numbered(i))
+
+        assert consumer.lag() == 10
+        values = [int(consumer.read(timeout=0)[1][0, 0, 0]) for _ in range(3)]
+        # Доступны только capacity - 1 последних кадров
+        assert values == [7, 8, 9]
+        assert consumer.stats() == {"received": 3, "dropped": 7, "lag": 0}
+        consumer.close()
+
+
+def test_latest_consumer_and_zero_copy_read(bus_name):
+    with FrameBusProducer(bus_name, (6, 8), capacity=4) as bus:
+        consumer = FrameBusConsumer(bus_name, latest=True, timeout=1)
+        for i in range(3):
+            bus.publish(numbered(i, (6, 8)))
+
+        ret, view = consumer.read(timeout=0, copy=False)
+        assert ret and view[0, 0] == 2 and consumer.is_current()
+        for i in range(4):
+            bus.publish(numbered(10 + i, (6, 8)))
+        assert not consumer.is_current()
+        consumer.close()
+
+
+def test_close_ends_stream_after_remaining_frames(bus_name):
+    bus = FrameBusProducer(bus_name, (6, 8, 3), capacity=4)
+    capture = BusCapture(bus_name, timeout=1, read_timeout=1)
+    publish_capture(ListCapture([numbered(i) for i in range(2)]), bus)
+    bus.close(unlink=False)
+
+    assert [capture.read()[0] for _ in range(3)] == [True, True, False]
+    capture.release()
+    bus = FrameBusProducer(bus_name, (6, 8, 3), capacity=4)
+    bus.close()
+
+
+def test_missing_bus_is_not_opened(bus_name):
+    capture = BusCapture(bus_name, timeout=0)
+    assert not capture.isOpened()
+    assert capture.read() == (False, None)
+
+
+def test_dead_producer_stops_consumer_and_bus_is_replaced(bus_name):
+    process = start_producer_process("synthetic", bus_name, capacity=4,
+                                     fps=50, frame_size=(32, 24))
+    consumer = FrameBusConsumer(bus_name, timeout=10)
+    assert consumer.read(timeout=10)[0]
+
+    process.kill()
+    process.join()
+    start = time.monotonic()
+    while consumer.read(timeout=2)[0]:
+        pass
+    assert time.monotonic() - start < 1.5
+    assert consumer.closed()
+    consumer.close()
+
+    # Сегмент упавшего производителя заменяется новым
+    with FrameBusProducer(bus_name, (6, 8, 3), capacity=4) as bus:
+        reader = FrameBusConsumer(bus_name, timeout=1)
+        bus.publish(numbered(5))
+        assert reader.read(timeout=1)[1][0, 0, 0] == 5
+        reader.close()
+
+
+def test_live_producer_name_is_not_taken(bus_name):
+    with FrameBusProducer(bus_name, (6, 8, 3)):
+        with pytest.raises(FileExistsError):
+            FrameBusProducer(bus_name, (6, 8, 3))
+
+
+def test_process_alive_checks_without_signals(monkeypatch):
+    process = multiprocessing.Process(target=time.sleep, args=(0,))
+    process.start()
+    process.join()
+    assert frame_bus._process_alive(os.getpid())
+    assert not frame_bus._process_alive(process.pid)
+
+    # В Windows os.kill(pid, 0) отправил бы процессу Ctrl+C
+    def no_kill(pid, sig):
+        raise AssertionError("os.kill вызван в Windows")
+
+    checked = []
+    monkeypatch.setattr(sys, "platform", "win32")
+    monkeypatch.setattr(frame_bus.os, "kill", no_kill)
+    monkeypatch.setattr(frame_bus, "_windows_process_alive",
+                        lambda pid: checked.append(pid) or True)
+    assert frame_bus._process_alive(1234)
+    assert checked == [1234]
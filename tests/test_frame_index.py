@@ -0,0 +1,65 @@
+import json
+import os
+import random
+
+import numpy as np
+import pytest
+
+from conftest import read_all
+from frame_index import FrameIndex, scan_keyframes
+
+
+def test_random_access_matches_sequential_decode(gop_video_path):
+    expected = read_all(gop_video_path)
+    order = list(range(len(expected)))
+    random.Random(1).shuffle(order)
+
+    with FrameIndex(gop_video_path) as index:
+        assert len(index) == len(expected)
+        assert len(index.keyframes) > 1
+        for n in order[:40] + [-1]:
+            assert np.array_equal(index.get_frame(n), expected[n])
+
+
+def test_inexact_seek_falls_back_to_exact_frames(gop_video_path):
+    expected = read_all(gop_video_path)
+    with FrameIndex(gop_video_path, index_dir=None) as index:
+        # Неверное время ключевых кадров: переход по времени не туда
+        index.timestamps = [t + 500.0 for t in index.timestamps]
+        for n in (70, 5, 89, 30):
+            assert np.array_equal(index.get_frame(n), expected[n])
+
+
+def test_get_frames_is_sorted_and_clipped(video_path):
+    with FrameIndex(video_path, index_dir=None) as index:
+        numbers = [n for n, _ in index.get_frames(range(35, 50))]
+        assert numbers == list(range(35, 40))
+        assert [n for n, _ in index.get_frames([9, 2, 5])] == [2, 5, 9]
+        with pytest.raises(IndexError):
+            index.get_frame(40)
+
+
+def test_index_is_saved_and_invalidated(tmp_path, gop_video_path):
+    index_dir = str(tmp_path / "index")
+    FrameIndex(gop_video_path, index_dir=index_dir)
+    (path,) = [os.path.join(index_dir, name) for name in os.listdir(index_dir)]
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    assert data["frame_count"] == 90
+
+    # Сохранённый индекс используется без повторного сканирования
+    data["frame_count"] = 12
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    assert len(FrameIndex(gop_video_path, index_dir=index_dir)) == 12
+
+    # Изменённый файл сканируется заново
+    os.utime(gop_video_path, ns=(0, data["mtime_ns"] + 10 ** 9))
+    assert len(FrameIndex(gop_video_path, index_dir=index_dir)) == 90
+
+
+def test_scan_keyframes_starts_at_zero(gop_video_path):
+    count, keyframes = scan_keyframes(gop_video_path)
+    assert count == 90
+    assert keyframes[0][0] == 0
+    assert [k for k, _ in keyframes] == sorted(k for k, _ in keyframes)
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from conftest import ListCapture
+from frame_reader import ThreadedFrameReader
+
+
+def numbered(count):
+    return [np.full((2, 2), i, np.uint8) for i in range(count)]
+
+
+def test_reads_all_frames_in_order():
+    with ThreadedFrameReader(ListCapture(numbered(20)), prefetch=3) as reader:
+        values = [int(frame[0, 0]) for frame in reader]
+    assert values == list(range(20))
+
+
+def test_start_frame_and_max_frames():
+    cap = ListCapture(numbered(20))
+    with ThreadedFrameReader(cap, start_frame=5, max_frames=4) as reader:
+        values = [int(frame[0, 0]) for frame in reader]
+        assert reader.read() == (False, None)
+    assert values == [5, 6, 7, 8]
+
+
+def test_loop_reports_end_of_each_pass():
+    with ThreadedFrameReader(ListCapture(numbered(3)), loop=True) as reader:
+        results = [reader.read(timeout=1) for _ in range(8)]
+
+    values = [int(frame[0, 0]) if ret else None for ret, frame in results]
+    assert values == [0, 1, 2, None, 0, 1, 2, None]
+
+
+def test_capture_errors_are_raised_in_consumer():
+    class BrokenCapture(ListCapture):
+        def read(self, image=None):
+            raise RuntimeError("decoder failed")
+
+    with ThreadedFrameReader(BrokenCapture(numbered(1))) as reader:
+        with pytest.raises(RuntimeError, match="decoder failed"):
+            reader.read(timeout=1)
+
+
+def test_rejects_empty_prefetch():
+    with pytest.raises(ValueError):
+        ThreadedFrameReader(ListCapture(numbered(1)), prefetch=0)
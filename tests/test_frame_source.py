@@ -0,0 +1,119 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+import frame_source
+from conftest import write_video
+from frame_source import (FrameSource, ImageDirectorySource, SyntheticSource,
+                          VideoFileSource, _Pacer, benchmark_source,
+                          open_source)
+
+
+def test_pacer_holds_frame_rate():
+    pacer = _Pacer(100.0)
+    start = time.perf_counter()
+    for _ in range(11):
+        pacer.wait()
+    # Первый кадр сразу, затем 10 интервалов по 10 мс
+    assert time.perf_counter() - start >= 0.095
+
+
+def test_pacer_does_not_catch_up_after_stall(monkeypatch):
+    now = [0.0]
+    slept = []
+    monkeypatch.setattr(frame_source.time, "perf_counter", lambda: now[0])
+    monkeypatch.setattr(frame_source.time, "sleep", slept.append)
+
+    pacer = _Pacer(10.0)
+    pacer.wait()
+    now[0] = 1.0  # источник простоял 10 кадров
+    pacer.wait()
+    pacer.wait()
+
+    # После простоя отсчёт начат заново: второй кадр без паузы,
+    # третий - через интервал, а не пачкой без пауз
+    assert slept == [pytest.approx(0.1)]
+
+
+def test_frame_source_is_abstract():
+    with pytest.raises(TypeError):
+        FrameSource((4, 4), 10.0)
+
+
+@pytest.mark.parametrize("pattern", frame_source.SYNTHETIC_PATTERNS)
+def test_synthetic_frames_are_deterministic(pattern):
+    def take():
+        with SyntheticSource((64, 48), pattern=pattern, pace=False,
+                             frame_count=5) as source:
+            return [frame.copy() for frame in source]
+
+    first, second = take(), take()
+    assert len(first) == 5 and first[0].shape == (48, 64, 3)
+    assert all(np.array_equal(a, b) for a, b in zip(first, second))
+    assert not np.array_equal(first[0], first[1])
+
+
+def test_read_into_buffer_and_reuse_output():
+    source = SyntheticSource((64, 48), pace=False, reuse_output=True)
+    buffer = np.zeros((48, 64, 3), np.uint8)
+    assert source.read(buffer)[1] is buffer
+    assert source.read()[1] is source.read()[1]
+    assert source.get(cv2.CAP_PROP_POS_FRAMES) == 3
+    source.release()
+    assert source.read() == (False, None)
+
+
+def test_video_file_source_loops(tmp_path, frames):
+    path = write_video(tmp_path / "v.avi", frames[:4])
+    with VideoFileSource(path, pace=False) as source:
+        assert source.fps == pytest.approx(25.0)
+        read = [source.read()[0] for _ in range(10)]
+    assert all(read) and source.loops == 2
+
+    with VideoFileSource(path, pace=False, loop=False) as source:
+        assert len(list(source)) == 4
+
+
+@pytest.fixture
+def image_dir(tmp_path, frames):
+    folder = tmp_path / "images"
+    folder.mkdir()
+    for i, frame in enumerate(frames[:3]):
+        cv2.imwrite(str(folder / f"{i}.png"), frame)
+    cv2.imwrite(str(folder / "3.png"), cv2.resize(frames[3], (80, 60)))
+    (folder / "4.png").write_bytes(b"broken")
+    return str(folder)
+
+
+def test_image_directory_preloaded_and_streamed_agree(image_dir, frames):
+    preloaded = ImageDirectorySource(image_dir, pace=False, loop=False)
+    streamed = ImageDirectorySource(image_dir, pace=False, loop=False,
+                                    max_bytes=1)
+    assert preloaded.preloaded and not streamed.preloaded
+
+    a, b = list(preloaded), list(streamed)
+    assert len(a) == len(b) == 4
+    assert all(np.array_equal(x, y) for x, y in zip(a, b))
+    assert np.array_equal(a[1], frames[1])
+    # Изображение другого размера приведено к размеру первого
+    assert a[3].shape == (120, 160, 3)
+
+
+def test_streamed_directory_loops_past_bad_files(image_dir):
+    source = ImageDirectorySource(image_dir, pace=False, max_bytes=1)
+    assert sum(1 for _, _ in zip(range(9), source)) == 9
+
+
+def test_open_source_dispatch(image_dir, tmp_path, frames):
+    synthetic = open_source("synthetic:checker", (32, 24), pace=False)
+    assert isinstance(synthetic, SyntheticSource)
+    assert synthetic.pattern == "checker"
+    assert isinstance(open_source(image_dir), ImageDirectorySource)
+    path = write_video(tmp_path / "v.avi", frames[:2])
+    assert isinstance(open_source(path), VideoFileSource)
+    assert open_source(synthetic) is synthetic
+    with pytest.raises(ValueError):
+        open_source("synthetic:plaid")
+    assert benchmark_source(synthetic, frames=20) > 0
@@ -0,0 +1,94 @@
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+import frame_store
+from conftest import read_all, write_video
+from frame_store import FrameStore, StoredCapture, open_capture
+
+
+@pytest.fixture(autouse=True)
+def no_default_store(monkeypatch):
+    # Хранилище по умолчанию создаётся в текущем каталоге теста
+    monkeypatch.setattr(frame_store, "_default_store", None)
+
+
+def test_stored_frames_match_decode(tmp_path, video_path):
+    store = FrameStore(str(tmp_path / "store"), verbose=False)
+    video = store.open(video_path)
+
+    expected = read_all(video_path)
+    assert video.shape == (40, 120, 160, 3)
+    assert all(np.array_equal(video[i], expected[i]) for i in range(40))
+    assert video.fps == pytest.approx(25.0)
+
+
+def test_one_entry_serves_every_request(tmp_path, video_path, capsys):
+    store = FrameStore(str(tmp_path / "store"))
+
+    partial = store.open(video_path, max_frames=10)
+    assert len(partial) == 10
+    assert len(store.open(video_path, max_frames=5)) == 5
+    assert capsys.readouterr().out.count("декодирование") == 1
+
+    # Больше кадров - запись заменяется полной, затем используется она
+    assert len(store.open(video_path)) == 40
+    assert len(store.open(video_path, max_frames=20)) == 20
+    assert capsys.readouterr().out.count("декодирование") == 1
+    assert len(store.entries()) == 1
+
+
+def test_changed_source_is_rebuilt(tmp_path, video_path, capsys):
+    store = FrameStore(str(tmp_path / "store"))
+    store.open(video_path)
+    stat = os.stat(video_path)
+    os.utime(video_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    store.open(video_path)
+    assert capsys.readouterr().out.count("декодирование") == 2
+
+
+def test_lru_eviction(tmp_path, frames):
+    paths = [write_video(tmp_path / f"v{i}.avi", frames[:10])
+             for i in range(3)]
+    one_video = 10 * 120 * 160 * 3
+    store = FrameStore(str(tmp_path / "store"), max_bytes=2 * one_video,
+                       verbose=False)
+
+    store.open(paths[0])
+    store.open(paths[1])
+    store.open(paths[0])  # paths[1] теперь самый старый
+    store.open(paths[2])
+
+    sources = sorted(header["source"][0] for _, header in store.entries())
+    assert sources == sorted(os.path.abspath(p) for p in (paths[0], paths[2]))
+    assert store.total_bytes() <= 2 * one_video
+    with pytest.raises(ValueError):
+        FrameStore(str(tmp_path / "tiny"), max_bytes=1,
+                   verbose=False).open(paths[0])
+
+
+def test_stored_capture_interface(tmp_path, video_path):
+    cap = FrameStore(str(tmp_path / "store"), verbose=False) \
+        .open(video_path).capture()
+    assert isinstance(cap, StoredCapture)
+    assert cap.get(cv2.CAP_PROP_FRAME_COUNT) == 40
+    assert cap.set(cv2.CAP_PROP_POS_FRAMES, 38)
+
+    buffer = np.zeros((120, 160, 3), np.uint8)
+    ret, frame = cap.read(buffer)
+    assert ret and frame is buffer
+    assert cap.get(cv2.CAP_PROP_POS_FRAMES) == 39
+    assert cap.read()[0] and cap.read() == (False, None)
+    cap.release()
+    assert not cap.isOpened()
+
+
+def test_open_capture_falls_back_to_videocapture(tmp_path, capsys):
+    cap = open_capture(str(tmp_path / "missing.avi"))
+    assert isinstance(cap, cv2.VideoCapture)
+    assert "недоступно" in capsys.readouterr().out
+    with pytest.raises(IOError):
+        open_capture(str(tmp_path / "missing.avi"), fallback=False)
@@ -0,0 +1,118 @@
+import csv
+
+import pytest
+
+import frame_timing
+from conftest import ListCapture, synthetic_frames
+from frame_timing import (ConstantRateConformer, TimestampTrack,
+                          measure_capture_fps)
+
+
+def test_conformer_duplicates_gaps_and_drops_extra_frames():
+    conformer = ConstantRateConformer(10.0)
+
+    # 0.0 и 0.1 - по кадру, 0.35 - пропущены кадры 0.2 и 0.3,
+    # 0.37 - лишний кадр того же интервала
+    repeats = [conformer.frames_for(t) for t in (0.0, 0.1, 0.35, 0.37)]
+
+    assert repeats == [1, 1, 2, 0]
+    assert conformer.emitted == 4
+    assert conformer.duplicated == 1
+    assert conformer.dropped == 1
+
+
+def test_conformer_pause_skips_the_gap():
+    conformer = ConstantRateConformer(10.0)
+    conformer.frames_for(0.0)
+    conformer.pause()
+    assert conformer.frames_for(60.0) == 1
+
+
+def read_rows(path):
+    with open(path, encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_track_counts_only_confirmed_writes(tmp_path):
+    path = tmp_path / "track.csv"
+    track = TimestampTrack(str(path), confirm_writes=True)
+    tags = [track.add(t, repeats) for t, repeats in ((10.0, 1), (10.1, 1),
+                                                     (10.2, 2))]
+
+    # Кадр 1 отброшен очередью, кадр 2 записан дважды
+    track.written(tags[0])
+    track.dropped(tags[1])
+    track.written(tags[2])
+    track.written(None)
+    # Строка кадра пишется, когда все его копии покинули очередь
+    assert len(read_rows(path)) == 2
+    track.written(tags[2])
+    assert track.output_frames == 3
+
+    rows = read_rows(path)
+    assert [(r["output_index"], r["repeats"]) for r in rows] == [
+        ("0", "1"), ("1", "0"), ("1", "2")]
+    assert float(rows[2]["capture_ms"]) == pytest.approx(200.0)
+    track.close()
+
+
+def test_track_rows_wait_for_earlier_frames(tmp_path):
+    path = tmp_path / "track.csv"
+    track = TimestampTrack(str(path), confirm_writes=True)
+    tags = [track.add(t) for t in (0.0, 0.1, 0.2)]
+
+    # Кадр 2 записан раньше кадра 1 (другой сегмент)
+    track.written(tags[0])
+    track.written(tags[2])
+    assert [r["capture_index"] for r in read_rows(path)] == ["0"]
+
+    assert track.settled(tags[0]) and not track.settled(tags[2])
+
+    # Неподтверждённые строки дописываются при закрытии
+    track.close()
+    rows = read_rows(path)
+    assert [(r["output_index"], r["repeats"]) for r in rows] == [
+        ("0", "1"), ("1", "0"), ("1", "1")]
+
+
+def test_track_without_confirmation_streams_rows(tmp_path):
+    path = tmp_path / "track.csv"
+    track = TimestampTrack(str(path))
+    track.add(0.0, 2)
+    track.add(0.1, 0)
+
+    assert [r["output_index"] for r in read_rows(path)] == ["0", "2"]
+    assert track.output_frames == 2
+    track.close()
+
+
+def test_track_stats_ignore_breaks():
+    track = TimestampTrack()
+    for t in (0.0, 0.1, 0.2):
+        track.add(t)
+    track.break_interval()
+    track.add(5.0)
+
+    stats = track.stats()
+    assert stats["frames"] == 4
+    assert stats["effective_fps"] == pytest.approx(10.0)
+
+
+def test_track_keeps_a_bounded_interval_window(monkeypatch):
+    monkeypatch.setattr(frame_timing, "INTERVAL_WINDOW", 4)
+    track = TimestampTrack()
+    for i in range(10):
+        track.add(i * (0.1 if i < 5 else 0.2))
+
+    stats = track.stats()
+    assert len(track._intervals) == 4
+    # Частота - по всем интервалам, перцентили - по последним
+    assert stats["effective_fps"] == pytest.approx(9 / 1.8)
+    assert stats["interval_ms"][50] == pytest.approx(200.0)
+
+
+def test_measure_capture_fps_uses_clock():
+    times = iter(i * 0.04 for i in range(100))
+    fps = measure_capture_fps(ListCapture(synthetic_frames(20)), frames=10,
+                              clock=lambda: next(times))
+    assert fps == pytest.approx(25.0)
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from hsv_charts import (hsv_cube_atlas, hsv_disc, hsv_spectrum,
+                        hsv_spectrum_loop)
+
+
+def test_vectorized_spectrum_matches_loop():
+    assert np.array_equal(hsv_spectrum(90, 64), hsv_spectrum_loop(90, 64))
+
+
+def test_spectrum_with_fixed_value():
+    spectrum = hsv_spectrum(20, 10, fixed="v", level=128)
+    assert (spectrum[:, :, 2] == 128).all()
+    assert spectrum[0, 0, 1] == 255 and spectrum[-1, 0, 1] < 255
+    with pytest.raises(ValueError):
+        hsv_spectrum(fixed="h")
+
+
+def test_disc_center_and_outside():
+    disc = hsv_disc(65, value=200)
+    assert tuple(disc[32, 32, 1:]) == (0, 200)
+    assert disc[0, 0, 2] == 0
+    # Вправо от центра - тон 0, вверх - четверть круга
+    assert disc[32, 60, 0] == 0
+    assert disc[4, 32, 0] == 45
+
+
+def test_atlas_tiles_increase_value():
+    atlas = hsv_cube_atlas(tile_width=10, tile_height=8, levels=4,
+                           columns=2, gap=2)
+    assert atlas.shape == (18, 22, 3)
+    values = [atlas[y, x, 2] for y, x in ((0, 0), (0, 12), (10, 0), (10, 12))]
+    assert values == [64, 128, 191, 255]
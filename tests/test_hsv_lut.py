@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+import pytest
+
+from hsv_lut import HsvLut, build_table, load_table, measure_error
+
+
+@pytest.fixture(scope="module")
+def lut8(tmp_path_factory):
+    return HsvLut(8, cache_dir=str(tmp_path_factory.mktemp("lut")))
+
+
+def random_image(shape=(67, 91, 3), seed=0):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def test_exact_table_matches_cvtcolor(lut8):
+    img = random_image()
+    assert np.array_equal(lut8.convert(img), cv2.cvtColor(img,
+                                                         cv2.COLOR_BGR2HSV))
+
+
+def test_small_tiles_and_strided_input(tmp_path):
+    lut = HsvLut(8, cache_dir=str(tmp_path), tile_pixels=100)
+    img = random_image((40, 60, 3))[:, ::2]
+    assert np.array_equal(lut.convert(img), cv2.cvtColor(
+        np.ascontiguousarray(img), cv2.COLOR_BGR2HSV))
+
+
+def test_writes_into_non_contiguous_dst(lut8):
+    img = random_image((30, 40, 3))
+    canvas = np.zeros((30, 80, 3), np.uint8)
+    dst = canvas[:, ::2]
+
+    assert lut8.convert(img, dst) is dst
+    assert np.array_equal(dst, cv2.cvtColor(img, cv2.COLOR_BGR2HSV))
+    assert (canvas[:, 1::2] == 0).all()
+
+
+def test_rejects_bad_arguments(lut8):
+    with pytest.raises(ValueError):
+        lut8.convert(np.zeros((4, 4), np.uint8))
+    with pytest.raises(ValueError):
+        lut8.convert(random_image((4, 4, 3)), np.zeros((4, 5, 3), np.uint8))
+
+
+def test_reduced_table_is_cached_and_close(tmp_path):
+    table = load_table(5, str(tmp_path))
+    assert isinstance(table, np.memmap)
+    assert np.array_equal(table, build_table(5))
+
+    errors = measure_error(HsvLut(5, cache_dir=str(tmp_path)),
+                           random_image((64, 64, 3)))
+    # Ошибка яркости не больше половины ячейки (8 уровней при 5 битах)
+    assert errors["V"][0] <= 4
+    with pytest.raises(ValueError):
+        build_table(9)
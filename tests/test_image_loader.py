@@ -0,0 +1,102 @@
+import struct
+import zlib
+
+import cv2
+import numpy as np
+import pytest
+
+import image_loader
+from image_loader import (decode_variants, expand_paths, load_images,
+                          may_have_exif)
+
+
+def encode(ext, img):
+    ok, data = cv2.imencode(ext, img)
+    assert ok
+    return data
+
+
+def image(shape=(20, 30, 3)):
+    return np.random.default_rng(0).integers(0, 256, shape, dtype=np.uint8)
+
+
+def png_with_exif(img, orientation):
+    """
+    PNG с блоком eXIf, содержащим только тег Orientation
+    """
+    data = encode(".png", img).tobytes()
+    tiff = (b"MM\x00\x2a\x00\x00\x00\x08\x00\x01"
+            + struct.pack(">HHIHH", 0x0112, 3, 1, orientation, 0)
+            + b"\x00\x00\x00\x00")
+    chunk = (struct.pack(">I", len(tiff)) + b"eXIf" + tiff
+             + struct.pack(">I", zlib.crc32(b"eXIf" + tiff)))
+    # Сразу после IHDR (8 байт подписи + 25 байт блока)
+    return np.frombuffer(data[:33] + chunk + data[33:], np.uint8)
+
+
+@pytest.mark.parametrize("ext", [".png", ".jpg", ".bmp", ".webp"])
+def test_plain_files_have_no_exif(ext):
+    assert not may_have_exif(encode(ext, image()))
+
+
+def test_exif_is_detected_per_container():
+    assert may_have_exif(png_with_exif(image(), 6))
+    assert may_have_exif(encode(".tiff", image()))
+
+    jpeg = encode(".jpg", image()).tobytes()
+    app1 = b"\xff\xe1\x00\x10Exif\x00\x00" + b"\x00" * 8
+    assert may_have_exif(np.frombuffer(jpeg[:2] + app1 + jpeg[2:], np.uint8))
+
+
+def test_png_orientation_is_applied_like_imread_color():
+    data = png_with_exif(image(), 6)
+    images = decode_variants(data, ("color", "unchanged"))
+
+    assert np.array_equal(images["color"],
+                          cv2.imdecode(data, cv2.IMREAD_COLOR))
+    assert images["color"].shape == (30, 20, 3)
+    assert images["unchanged"].shape == (20, 30, 3)
+
+
+def test_variants_match_imdecode():
+    data = encode(".png", image())
+    images = decode_variants(data, ("color", "grayscale", "unchanged"))
+    for name, flag in (("color", cv2.IMREAD_COLOR),
+                       ("grayscale", cv2.IMREAD_GRAYSCALE),
+                       ("unchanged", cv2.IMREAD_UNCHANGED)):
+        assert np.array_equal(images[name], cv2.imdecode(data, flag))
+
+
+def test_load_images_reports_bad_files(tmp_path):
+    cv2.imwrite(str(tmp_path / "a.png"), image())
+    cv2.imwrite(str(tmp_path / "b.jpg"), image())
+    (tmp_path / "c.png").write_bytes(b"not an image")
+    (tmp_path / "notes.txt").write_text("skip")
+
+    paths = expand_paths(str(tmp_path))
+    assert [p.rsplit("/", 1)[1] for p in paths] == ["a.png", "b.jpg", "c.png"]
+
+    results = {r.path: r for r in load_images(str(tmp_path), ("color",))}
+    assert results[paths[0]].images["color"].shape == (20, 30, 3)
+    assert results[paths[1]].error is None
+    assert results[paths[2]].error is not None
+    with pytest.raises(ValueError):
+        list(load_images(paths, ("sepia",)))
+
+
+def test_load_images_keeps_a_bounded_window(monkeypatch):
+    started = []
+
+    def fake_load(path, variants, exact_grayscale):
+        started.append(path)
+        return path
+
+    monkeypatch.setattr(image_loader, "_load", fake_load)
+    paths = [f"{i}.png" for i in range(20)]
+    results = load_images(paths, workers=2)
+
+    first = next(results)
+    # Не больше IN_FLIGHT_PER_WORKER * workers файлов до первой выдачи
+    assert first in paths and len(started) <= 4
+    assert sorted([first] + list(results)) == sorted(paths)
+    assert len(started) == 20
@@ -0,0 +1,123 @@
+import os
+import struct
+
+import cv2
+import numpy as np
+import pytest
+
+from image_preview import (ThumbnailCache, choose_reduction, fit_size,
+                           load_preview, read_exif_orientation,
+                           read_image_size, read_oriented_size)
+
+
+def jpeg_with_orientation(path, img, orientation):
+    """
+    JPEG с блоком APP1 (EXIF), содержащим только тег Orientation
+    """
+    ok, data = cv2.imencode(".jpg", img)
+    assert ok
+    tiff = (b"II*\x00\x08\x00\x00\x00\x01\x00"
+            + struct.pack("<HHIHH", 0x0112, 3, 1, orientation, 0)
+            + b"\x00\x00\x00\x00")
+    payload = b"Exif\x00\x00" + tiff
+    app1 = b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload
+    data = data.tobytes()
+    with open(path, "wb") as f:
+        f.write(data[:2] + app1 + data[2:])
+    return str(path)
+
+
+@pytest.fixture
+def photo(tmp_path):
+    img = np.random.default_rng(0).integers(0, 256, (600, 800, 3),
+                                            dtype=np.uint8)
+    paths = {}
+    for ext in ("png", "jpg", "bmp"):
+        paths[ext] = str(tmp_path / f"photo.{ext}")
+        cv2.imwrite(paths[ext], img)
+    return paths
+
+
+def test_read_image_size_from_headers(photo, tmp_path):
+    for path in photo.values():
+        assert read_image_size(path) == (800, 600)
+    (tmp_path / "bad.jpg").write_bytes(b"\xff\xd8garbage")
+    assert read_image_size(str(tmp_path / "bad.jpg")) is None
+
+
+def test_reduction_and_fit():
+    assert choose_reduction((800, 600), (200, 150)) == 4
+    assert choose_reduction((800, 600), (201, 150)) == 2
+    assert choose_reduction(None, (10, 10)) == 1
+    assert fit_size((800, 600), (256, 256)) == (256, 192)
+    assert fit_size((100, 50), (256, 256)) == (100, 50)
+
+
+def test_load_preview_fits_box(photo):
+    for path in photo.values():
+        assert load_preview(path, (256, 256)).shape == (192, 256, 3)
+    assert load_preview(photo["jpg"], (64, 64), grayscale=True).shape == (48, 64)
+
+
+def test_thumbnail_cache_hits_on_second_read(tmp_path, photo):
+    cache = ThumbnailCache(str(tmp_path / "thumbs"), max_size=(128, 128))
+    first = cache.get(photo["png"])
+    second = cache.get(photo["png"])
+
+    assert (cache.misses, cache.hits) == (1, 1)
+    assert first.shape == second.shape == (96, 128, 3)
+
+    results = dict(cache.get_many(list(photo.values())))
+    assert all(thumb is not None for thumb in results.values())
+    cache.clear()
+    assert cache.get(photo["png"]) is not None
+    assert cache.misses == 4
+
+
+def test_reduction_uses_exif_rotated_size(tmp_path):
+    img = np.random.default_rng(1).integers(0, 256, (400, 1600, 3),
+                                            dtype=np.uint8)
+    path = jpeg_with_orientation(tmp_path / "rotated.jpg", img, 6)
+
+    assert read_exif_orientation(path) == 6
+    assert read_image_size(path) == (1600, 400)
+    assert read_oriented_size(path) == (400, 1600)
+    # По заголовку 1600x400 в рамку 400x800 подошёл бы коэффициент 4
+    # (100x400 после поворота), что меньше нужных 200x800
+    preview = load_preview(path, (400, 800))
+    assert preview.shape == (800, 200, 3)
+
+
+def test_thumbnail_cache_evicts_least_recently_used(tmp_path):
+    rng = np.random.default_rng(2)
+    paths = []
+    for i in range(4):
+        path = str(tmp_path / f"img{i}.png")
+        cv2.imwrite(path, rng.integers(0, 256, (64, 64, 3), dtype=np.uint8))
+        paths.append(path)
+    cache_dir = str(tmp_path / "thumbs")
+
+    cache = ThumbnailCache(cache_dir, max_size=(64, 64), max_bytes=None)
+    cache.get(paths[0])
+    one = os.path.getsize(os.path.join(cache_dir, os.listdir(cache_dir)[0]))
+    cache.clear()
+
+    cache = ThumbnailCache(cache_dir, max_size=(64, 64),
+                           max_bytes=int(one * 2.5))
+    cache.get(paths[0])
+    cache.get(paths[1])
+    cache.get(paths[0])
+    cache.get(paths[2])
+
+    assert cache.evicted == 1
+    assert len(os.listdir(cache_dir)) == 2
+    cache.get(paths[0])
+    assert cache.hits == 2
+    cache.get(paths[1])
+    assert cache.misses == 4
+
+    # Новый экземпляр подхватывает миниатюры с диска и тот же предел
+    reopened = ThumbnailCache(cache_dir, max_size=(64, 64),
+                              max_bytes=int(one * 1.5))
+    assert reopened.evicted == 1
+    assert len(os.listdir(cache_dir)) == 1
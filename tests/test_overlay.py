@@ -0,0 +1,49 @@
+import cv2
+import numpy as np
+import pytest
+
+from overlay import Overlay, OverlaySprite
+
+
+def test_opaque_shape_matches_direct_drawing(frames):
+    overlay = Overlay((160, 120))
+    overlay.add_rectangle((10, 20), (60, 50), (0, 255, 0), -1)
+    overlay.add_rectangle((100, 10), (150, 40), (255, 0, 255), 2)
+
+    frame = frames[0].copy()
+    expected = frames[0].copy()
+    cv2.rectangle(expected, (10, 20), (60, 50), (0, 255, 0), -1)
+    cv2.rectangle(expected, (100, 10), (150, 40), (255, 0, 255), 2)
+
+    assert overlay.apply(frame) is frame
+    assert np.array_equal(frame, expected)
+
+
+def test_antialiased_edges_are_blended():
+    overlay = Overlay((64, 48))
+    sprite = overlay.add(lambda canvas: cv2.circle(
+        canvas, (32, 24), 12, (255, 255, 255) if canvas.ndim == 3 else 255,
+        2, cv2.LINE_AA))
+
+    alpha = sprite.sprite[:, :, 3]
+    assert ((alpha > 0) & (alpha < 255)).any()
+
+    frame = np.full((48, 64, 3), 100, np.uint8)
+    overlay.apply(frame)
+    # Края - между фоном (100) и белым, фон вне рамки не тронут
+    assert set(np.unique(frame)) > {100, 255}
+    assert (frame[:5] == 100).all()
+
+
+def test_apply_rejects_wrong_frame():
+    sprite = OverlaySprite.from_drawing(
+        (64, 48), lambda canvas: cv2.line(canvas, (0, 0), (10, 10), 255, 1))
+    with pytest.raises(ValueError):
+        sprite.apply(np.zeros((48, 64, 3), np.uint8)[:, ::-1])
+    with pytest.raises(ValueError):
+        sprite.apply(np.zeros((10, 10, 3), np.uint8))
+
+
+def test_empty_drawing_is_an_error():
+    with pytest.raises(ValueError):
+        OverlaySprite.from_drawing((64, 48), lambda canvas: None)
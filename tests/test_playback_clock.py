@@ -0,0 +1,80 @@
+import pytest
+
+from playback_clock import PlaybackClock
+
+
+class FakeTime:
+    """
+    Управляемые часы: sleep() только двигает время
+    """
+
+    def __init__(self):
+        self.now = 100.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def make_clock(fps=10.0, **kwargs):
+    fake = FakeTime()
+    return PlaybackClock(fps, clock=fake.clock, sleep=fake.sleep,
+                         **kwargs), fake
+
+
+def test_rejects_non_positive_fps():
+    with pytest.raises(ValueError):
+        PlaybackClock(0)
+
+
+def test_wait_covers_remaining_time_to_next_deadline():
+    clock, fake = make_clock(10.0)
+
+    assert clock.should_display()
+    fake.now += 0.03  # отрисовка заняла 30 мс
+    clock.wait()
+
+    assert fake.slept == [pytest.approx(0.07)]
+    assert fake.now == pytest.approx(100.1)
+
+
+def test_late_frames_are_dropped_without_drift():
+    clock, fake = make_clock(10.0)
+
+    assert clock.should_display()
+    clock.wait()
+    # Кадр 1 опоздал на 250 мс (больше допуска в один кадр)
+    fake.now += 0.25
+    assert not clock.should_display()
+    assert not clock.should_display()
+    # Кадр 3 должен был показаться в 100.3, сейчас 100.35 - в допуске
+    assert clock.should_display()
+
+    stats = clock.stats()
+    assert stats["displayed"] == 2
+    assert stats["dropped"] == 2
+    assert stats["drift_ms"] == pytest.approx(50.0)
+
+
+def test_wait_ms_follows_explicit_pts():
+    clock, fake = make_clock(25.0)
+
+    assert clock.should_display(pts=0.0)
+    fake.now += 0.01
+    assert clock.wait_ms(next_pts=0.5) == 490
+
+
+def test_reset_starts_new_timeline_and_keeps_stats():
+    clock, fake = make_clock(10.0)
+    assert clock.should_display()
+    fake.now += 5.0
+
+    clock.reset()
+
+    assert clock.should_display()
+    assert clock.stats()["displayed"] == 2
+    assert clock.stats()["dropped"] == 0
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from preroll_buffer import FrameRingBuffer
+
+
+def frame(value, shape=(4, 6, 3)):
+    return np.full(shape, value, np.uint8)
+
+
+def test_keeps_last_frames_oldest_first():
+    ring = FrameRingBuffer(3, (4, 6, 3))
+    for i in range(5):
+        ring.push(frame(i), timestamp=i / 10)
+
+    assert len(ring) == 3
+    items = [(int(f[0, 0, 0]), t) for f, t in ring.frames()]
+    assert items == [(2, 0.2), (3, 0.3), (4, 0.4)]
+
+
+def test_push_copies_frame():
+    ring = FrameRingBuffer(2, (4, 6, 3))
+    source = frame(7)
+    ring.push(source)
+    source[:] = 0
+
+    stored, _ = next(ring.frames())
+    assert stored[0, 0, 0] == 7
+
+
+def test_for_duration_rounds_up_and_clear_empties():
+    ring = FrameRingBuffer.for_duration(1.5, 15, (2, 2, 3))
+    assert ring.capacity == 23
+    assert ring.nbytes == 23 * 2 * 2 * 3 + 23 * 8
+
+    ring.push(frame(1, (2, 2, 3)))
+    ring.clear()
+    assert len(ring) == 0
+    assert list(ring.frames()) == []
+
+
+def test_rejects_zero_capacity():
+    with pytest.raises(ValueError):
+        FrameRingBuffer(0, (2, 2, 3))
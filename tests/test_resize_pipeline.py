@@ -0,0 +1,53 @@
+import cv2
+import numpy as np
+import pytest
+
+from conftest import ListCapture
+from resize_pipeline import MultiScaleResizer, resize_stream
+
+
+def test_scales_match_cv2_resize(frames):
+    frame = frames[0]
+    resizer = MultiScaleResizer(160, 120, [0.5, 0.25, 1.5])
+
+    outputs = resizer.process(frame)
+
+    assert [o.shape for o in outputs] == [(60, 80, 3), (30, 40, 3),
+                                          (180, 240, 3)]
+    for scale, output in zip(resizer.scales, outputs):
+        expected = cv2.resize(frame, (int(160 * scale), int(120 * scale)))
+        assert np.array_equal(output, expected)
+
+
+def test_buffers_are_reused_between_frames(frames):
+    resizer = MultiScaleResizer(160, 120, [0.5])
+    first = resizer.process(frames[0])[0]
+    second = resizer.process(frames[1])[0]
+    assert first is second
+
+
+def test_stream_decodes_each_frame_once(frames):
+    cap = ListCapture(frames[:6])
+    results = [(i, [o.copy() for o in outs])
+               for i, outs in resize_stream(cap, [0.5, 0.25])]
+
+    assert [i for i, _ in results] == list(range(6))
+    assert cap.position == 6
+    assert np.array_equal(results[3][1][1], cv2.resize(frames[3], (40, 30)))
+
+
+def test_requires_a_scale():
+    with pytest.raises(ValueError):
+        MultiScaleResizer(160, 120, [])
+
+
+@pytest.mark.parametrize("frame", [
+    np.zeros((120, 160), dtype=np.uint8),
+    np.zeros((120, 160, 4), dtype=np.uint8),
+    np.zeros((240, 320, 3), dtype=np.uint8),
+    np.zeros((120, 160, 3), dtype=np.float32),
+])
+def test_rejects_frames_that_do_not_fit_buffers(frame):
+    resizer = MultiScaleResizer(160, 120, [0.5])
+    with pytest.raises(ValueError):
+        resizer.process(frame)
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+import segmented_copy as segmented_copy_module
+from conftest import read_all, write_video
+from segmented_copy import (_seam_windows, ffmpeg_available, plan_segments,
+                            segmented_copy, verify_copy)
+
+
+def test_plan_segments_covers_all_frames():
+    assert plan_segments(7, 3) == [(0, 3), (3, 6), (6, 7)]
+    assert plan_segments(0, 3) == []
+    with pytest.raises(ValueError):
+        plan_segments(10, 0)
+
+
+def test_seam_windows_surround_each_boundary():
+    windows = _seam_windows([(0, 10), (10, 20)], 20, radius=2)
+    assert windows == [0, 1, 8, 9, 10, 11]
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason="нужен ffmpeg")
+def test_segmented_copy_is_frame_exact(tmp_path, video_path):
+    output = str(tmp_path / "copy.avi")
+    result = segmented_copy(video_path, output, segment_size=12, workers=2,
+                            fourcc="MJPG")
+
+    assert result["problems"] == []
+    assert (result["frames"], result["segments"]) == (40, 4)
+    copied = read_all(output)
+    original = read_all(video_path)
+    assert len(copied) == 40
+    # MJPG перекодируется с потерями, но кадры те же и в том же порядке
+    assert all(np.abs(a.astype(int) - b).mean() < 4
+               for a, b in zip(copied, original))
+
+
+def test_segmented_copy_requires_ffmpeg(tmp_path, video_path, monkeypatch):
+    monkeypatch.setattr(segmented_copy_module, "ffmpeg_available",
+                        lambda: False)
+    output = tmp_path / "copy.avi"
+
+    with pytest.raises(RuntimeError):
+        segmented_copy(video_path, str(output), segment_size=12)
+    assert not output.exists()
+
+
+def copy_results(segments, path):
+    return [(start, end, end - start, path) for start, end in segments]
+
+
+def test_verify_detects_shifted_seam(tmp_path, frames, video_path):
+    segments = plan_segments(40, 20)
+    # Второй сегмент начат на кадр позже, последний кадр повторён
+    shifted = frames[:20] + frames[21:] + frames[-1:]
+    output = write_video(tmp_path / "shifted.avi", shifted)
+
+    problems = verify_copy(video_path, output, segments,
+                           copy_results(segments, output))
+
+    assert any("ближе к кадру 21" in p for p in problems)
+
+
+def test_verify_checks_counts(tmp_path, frames, video_path):
+    segments = plan_segments(40, 20)
+    short = write_video(tmp_path / "short.avi", frames[:39])
+    results = copy_results(segments, short)
+
+    problems = verify_copy(video_path, short, segments, results,
+                           segment_frames=[20, 19])
+
+    assert any("в файле 19" in p for p in problems)
+    assert any("39 кадров" in p for p in problems)
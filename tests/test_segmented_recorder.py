@@ -0,0 +1,106 @@
+import os
+
+from conftest import read_all
+from segmented_recorder import RetentionPolicy, SegmentedVideoWriter
+
+
+def test_rotates_by_duration_and_keeps_every_frame(tmp_path, frames):
+    written = []
+    writer = SegmentedVideoWriter(str(tmp_path / "rec.avi"), "MJPG", 10.0,
+                                  (160, 120), max_seconds=1.0,
+                                  on_written=written.append)
+    for i, frame in enumerate(frames[:15]):
+        writer.write(frame, block=True, tag=i)
+    # Пачка делится на границе сегмента
+    writer.write_batch(frames[15:27], tags=list(range(15, 27)))
+    writer.release()
+
+    names = [os.path.basename(p) for p in writer.segments]
+    assert names == ["rec_0001.avi", "rec_0002.avi", "rec_0003.avi"]
+    assert [len(read_all(p)) for p in writer.segments] == [10, 10, 7]
+    assert sorted(written) == list(range(27))
+    assert writer.stats()["written"] == 27
+
+
+def test_drain_waits_for_rotated_segments(tmp_path, frames):
+    writer = SegmentedVideoWriter(str(tmp_path / "rec.avi"), "MJPG", 10.0,
+                                  (160, 120), max_seconds=0.5)
+    for frame in frames[:12]:
+        writer.write(frame, block=True)
+    writer.drain()
+
+    assert len(writer.segments) == 2
+    assert writer.stats()["written"] == 12
+    writer.release()
+
+
+def test_retention_removes_oldest_over_budget(tmp_path):
+    paths = []
+    for i, size in enumerate((100, 200, 300)):
+        path = tmp_path / f"seg_{i}.avi"
+        path.write_bytes(b"x" * size)
+        os.utime(path, (1000 + i, 1000 + i))
+        paths.append(str(path))
+
+    removed = RetentionPolicy(max_total_bytes=350).apply(paths, now=2000)
+
+    assert removed == paths[:2]
+    assert os.path.exists(paths[2])
+
+
+def test_retention_removes_by_age(tmp_path):
+    old, new = tmp_path / "old.avi", tmp_path / "new.avi"
+    for path, mtime in ((old, 100), (new, 950)):
+        path.write_bytes(b"x")
+        os.utime(path, (mtime, mtime))
+
+    removed = RetentionPolicy(max_age_seconds=120).apply(
+        [str(old), str(new)], now=1000)
+
+    assert removed == [str(old)]
+
+
+def old_files(folder, names):
+    paths = []
+    for name in names:
+        path = folder / name
+        path.write_bytes(b"x")
+        os.utime(path, (1000, 1000))
+        paths.append(str(path))
+    return paths
+
+
+def record_one_rotation(base_path, frames, **kwargs):
+    writer = SegmentedVideoWriter(str(base_path), "MJPG", 10.0, (160, 120),
+                                  max_seconds=0.5,
+                                  retention=RetentionPolicy(
+                                      max_age_seconds=3600),
+                                  **kwargs)
+    for frame in frames[:6]:
+        writer.write(frame, block=True)
+    writer.drain()
+    writer.release()
+    return writer
+
+
+def test_retention_sees_long_segment_numbers(tmp_path, frames):
+    old = old_files(tmp_path, ["rec_0009.avi", "rec_10000.avi"])
+    kept = old_files(tmp_path, ["rec_old_0001.avi", "rec.avi"])
+
+    writer = record_one_rotation(tmp_path / "rec.avi", frames)
+
+    assert sorted(writer.removed) == sorted(old)
+    assert all(os.path.exists(p) for p in kept)
+    assert len(writer.segments) == 2
+
+
+def test_retention_covers_earlier_runs(tmp_path, frames):
+    old = old_files(tmp_path, ["rec_a_0001.avi", "rec_a_10000.avi",
+                               "rec_b_0002.avi"])
+    other = old_files(tmp_path, ["other_0001.avi", "rec_b_0001.mp4"])
+
+    writer = record_one_rotation(tmp_path / "rec_c.avi", frames,
+                                 retention_prefix=str(tmp_path / "rec_"))
+
+    assert sorted(writer.removed) == sorted(old)
+    assert all(os.path.exists(p) for p in other + writer.segments)
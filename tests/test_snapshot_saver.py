@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+import snapshot_saver
+from snapshot_saver import SnapshotSaver, encode_params
+
+
+def test_saves_snapshots_and_bursts(tmp_path, frames):
+    completed = []
+    with SnapshotSaver(str(tmp_path / "snaps"), fmt="jpg",
+                       on_complete=lambda *args: completed.append(args)) as s:
+        first = s.save(frames[0])
+        s.start_burst(3)
+        burst = [s.feed(frame) for frame in frames[1:6]]
+
+    assert burst[3:] == [None, None]
+    paths = [first] + burst[:3]
+    assert all(os.path.exists(p) and p.endswith(".jpg") for p in paths)
+    assert sorted(p for p, _, _ in completed) == sorted(paths)
+    assert all(error is None for _, _, error in completed)
+
+
+def test_latency_stats_are_running_totals(tmp_path, frames, monkeypatch):
+    monkeypatch.setattr(snapshot_saver, "LATENCY_WINDOW", 4)
+    with SnapshotSaver(str(tmp_path), fmt="png", max_pending=100) as saver:
+        for frame in frames[:10]:
+            saver.save(frame)
+
+    stats = saver.stats()
+    assert stats["saved"] == 10
+    assert sum(count for _, count in saver.latency_histogram()) == 10
+    assert len(saver._recent) == 4
+    assert 0 < stats["mean_ms"] <= stats["max_ms"]
+    assert stats["p95_ms"] <= stats["max_ms"]
+
+
+def test_skips_when_too_many_pending(tmp_path, frames):
+    saver = SnapshotSaver(str(tmp_path), max_pending=0)
+    assert saver.save(frames[0]) is None
+    saver.close()
+    assert saver.stats()["skipped"] == 1
+
+
+def test_encode_params():
+    assert encode_params("jpg", 80)[1][1] == 80
+    with pytest.raises(ValueError):
+        encode_params("gif")
@@ -0,0 +1,108 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import video_probe
+from video_probe import (DEFAULT_INDEX_PATH, file_key, fourcc_to_str,
+                         probe_video, probe_videos)
+
+
+def test_probe_reads_metadata(video_path):
+    info = probe_video(video_path, index_path=None)
+    assert (info.width, info.height, info.frame_count) == (160, 120, 40)
+    assert info.fps == pytest.approx(25.0)
+    assert info.fourcc == "MJPG"
+
+
+def test_probe_is_cached_in_index(video_path, monkeypatch):
+    first = probe_video(video_path)
+    with open(DEFAULT_INDEX_PATH, encoding="utf-8") as f:
+        assert file_key(video_path)[0] in json.load(f)
+
+    monkeypatch.setattr(video_probe.cv2, "VideoCapture", None)
+    assert probe_video(video_path) == first
+
+
+@pytest.mark.parametrize("entry", [
+    None, 5, {}, {"size": 1},
+    {"info": {"width": 1}},
+    "keys",
+])
+def test_malformed_entry_is_reprobed(video_path, entry):
+    abs_path, size, mtime_ns = file_key(video_path)
+    if isinstance(entry, dict) and "info" in entry:
+        entry = dict(entry, size=size, mtime_ns=mtime_ns)
+    with open("index.json", "w", encoding="utf-8") as f:
+        json.dump({abs_path: entry}, f)
+
+    info = probe_video(video_path, index_path="index.json")
+
+    assert info.frame_count == 40
+    with open("index.json", encoding="utf-8") as f:
+        assert json.load(f)[abs_path]["info"]["frame_count"] == 40
+
+
+def test_probe_videos_reports_errors(video_path, tmp_path):
+    results = probe_videos([video_path, str(tmp_path / "missing.avi")])
+    assert results[video_path].width == 160
+    assert isinstance(results[str(tmp_path / "missing.avi")], Exception)
+
+
+def test_probe_videos_without_index(video_path, tmp_path):
+    results = probe_videos([video_path, str(tmp_path / "missing.avi")],
+                           index_path=None)
+    assert results[video_path].frame_count == 40
+    assert isinstance(results[str(tmp_path / "missing.avi")], IOError)
+    assert not os.path.exists(DEFAULT_INDEX_PATH)
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", "5", "null", "{broken"])
+def test_index_that_is_not_a_dict_is_rebuilt(video_path, content):
+    with open("index.json", "w", encoding="utf-8") as f:
+        f.write(content)
+
+    assert probe_video(video_path, index_path="index.json").width == 160
+    with open("index.json", encoding="utf-8") as f:
+        assert list(json.load(f)) == [file_key(video_path)[0]]
+
+
+def test_save_keeps_entries_of_other_processes(video_path, tmp_path):
+    other = shutil.copy(video_path, tmp_path / "other.avi")
+    probe_video(video_path, index_path="index.json")
+
+    # Другой процесс дописал запись после загрузки индекса в этот
+    entry = {"size": 1, "mtime_ns": 1, "info": {}}
+    with open("index.json", encoding="utf-8") as f:
+        on_disk = json.load(f)
+    on_disk[os.path.abspath(other)] = entry
+    with open("index.json", "w", encoding="utf-8") as f:
+        json.dump(on_disk, f)
+
+    moved = shutil.copy(video_path, tmp_path / "moved.avi")
+    probe_video(moved, index_path="index.json")
+
+    with open("index.json", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved[os.path.abspath(other)] == entry
+    assert set(saved) == {os.path.abspath(p)
+                          for p in (video_path, other, moved)}
+
+
+def test_entries_of_deleted_files_are_pruned(video_path, tmp_path):
+    old = shutil.copy(video_path, tmp_path / "old.avi")
+    probe_videos([video_path, old], index_path="index.json")
+    os.remove(old)
+
+    new = shutil.copy(video_path, tmp_path / "new.avi")
+    probe_video(new, index_path="index.json")
+
+    with open("index.json", encoding="utf-8") as f:
+        saved = json.load(f)
+    assert set(saved) == {os.path.abspath(p) for p in (video_path, new)}
+    assert set(video_probe._loaded_indexes["index.json"]) == set(saved)
+
+
+def test_fourcc_to_str():
+    assert fourcc_to_str(0x47504A4D) == "MJPG"
@@ -0,0 +1,195 @@
+import cv2
+import json
+import os
+from collections import namedtuple
+
+
+# Метаданные видеофайла
+VideoInfo = namedtuple(
+    "VideoInfo", ["width", "height", "fps", "frame_count", "backend", "fourcc"]
+)
+
+# Индекс с кешем метаданных (ключ - абсолютный путь к файлу)
+DEFAULT_INDEX_PATH = "output/video_index.json"
+
+# Загруженные индексы: путь к индексу -> словарь записей
+_loaded_indexes = {}
+
+
+def fourcc_to_str(fourcc):
+    """
+    Преобразование числового кода FourCC в строку из 4 символов
+    """
+    fourcc = int(fourcc)
+    chars = [chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)]
+    return "".join(chars).strip("\x00")
+
+
+def read_video_info(cap):
+    """
+    Чтение метаданных из уже открытого VideoCapture
+    """
+    return VideoInfo(
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        fps=cap.get(cv2.CAP_PROP_FPS),
+        frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        backend=cap.getBackendName(),
+        fourcc=fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC)),
+    )
+
+
+def file_key(path):
+    """
+    Ключ файла в индексе: путь, размер и время изменения
+    """
+    stat = os.stat(path)
+    return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+
+def _read_index(index_path):
+    """
+    Индекс с диска; отсутствующий или повреждённый - пустой словарь
+    """
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        # Повреждённый индекс просто строится заново
+        return {}
+    # Корректный JSON, но не словарь (например, список) - тоже повреждён
+    return index if isinstance(index, dict) else {}
+
+
+def _load_index(index_path):
+    if index_path not in _loaded_indexes:
+        _loaded_indexes[index_path] = _read_index(index_path)
+    return _loaded_indexes[index_path]
+
+
+def _save_index(index_path, index, updated):
+    """
+    Сохранение записей updated (абсолютные пути) из index
+
+    Индекс на диске перечитывается перед записью: его могли дополнить
+    другие процессы с тех пор, как он был загружен в этот. Записи
+    удалённых файлов при этом отбрасываются. index обновляется до
+    сохранённого состояния.
+    """
+    merged = _read_index(index_path)
+    for key in updated:
+        if key in index:
+            merged[key] = index[key]
+    merged = {key: entry for key, entry in merged.items()
+              if os.path.exists(key)}
+
+    directory = os.path.dirname(index_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Запись через временный файл, чтобы индекс не повредился
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(merged, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, index_path)
+
+    index.clear()
+    index.update(merged)
+
+
+def _probe_file(path):
+    """
+    Метаданные прямо из контейнера, без индекса
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть видео: {path}")
+    info = read_video_info(cap)
+    cap.release()
+    return info
+
+
+def _probe_cached(path, index):
+    """
+    Метаданные из индекса или из файла; второе значение - ключ
+    добавленной или обновлённой записи (None - запись уже была)
+    """
+    abs_path, size, mtime_ns = file_key(path)
+
+    # Повреждённая запись (не словарь, нет полей, другие поля VideoInfo)
+    # не ошибка - видео просто читается заново
+    entry = index.get(abs_path)
+    if (isinstance(entry, dict) and entry.get("size") == size
+            and entry.get("mtime_ns") == mtime_ns):
+        try:
+            return VideoInfo(**entry["info"]), None
+        except (KeyError, TypeError):
+            pass
+
+    info = _probe_file(path)
+    index[abs_path] = {"size": size, "mtime_ns": mtime_ns,
+                       "info": info._asdict()}
+    return info, abs_path
+
+
+def probe_video(path, index_path=DEFAULT_INDEX_PATH):
+    """
+    Метаданные видео с кешированием в индексе
+
+    Контейнер открывается только если файла нет в индексе или он
+    изменился (другой размер или время изменения).
+    index_path=None отключает кеширование.
+    """
+    if index_path is None:
+        return _probe_file(path)
+
+    index = _load_index(index_path)
+    info, updated = _probe_cached(path, index)
+    if updated is not None:
+        _save_index(index_path, index, [updated])
+    return info
+
+
+def probe_videos(paths, index_path=DEFAULT_INDEX_PATH):
+    """
+    Пакетное получение метаданных: индекс сохраняется один раз в конце
+
+    Возвращает словарь {путь: VideoInfo или исключение}.
+    index_path=None отключает кеширование.
+    """
+    index = _load_index(index_path) if index_path is not None else None
+    results = {}
+    updated = []
+
+    for path in paths:
+        try:
+            if index is None:
+                results[path] = _probe_file(path)
+                continue
+            info, key = _probe_cached(path, index)
+            if key is not None:
+                updated.append(key)
+            results[path] = info
+        except (OSError, IOError) as e:
+            results[path] = e
+
+    if updated:
+        _save_index(index_path, index, updated)
+    return results
+
+
+def print_video_info(info):
+    """
+    Вывод информации о видео
+    """
+    duration = info.frame_count / info.fps if info.fps > 0 else 0.0
+
+    print(f"\n📹 Информация о видео:")
+    print(f"   • Разрешение: {info.width}x{info.height}")
+    print(f"   • FPS (кадров/сек): {info.fps:.2f}")
+    print(f"   • Всего кадров: {info.frame_count}")
+    print(f"   • Длительность: {duration:.2f} секунд")
+    print(f"   • Backend: {info.backend}")
+    print(f"   • Кодек: {info.fourcc}")